@@ -0,0 +1,244 @@
+"""Benchmark dei loader di generate_popolazione.py a 1x, 10x, 100x la dimensione attuale.
+
+Genera input sintetici nel formato dei file reali:
+  - intercensuaria Italia-Ripartizioni: 6 blocchi x scala
+  - intercensuaria Regioni: 20 blocchi x scala (nomi regione reali, ripetuti)
+  - intercensuaria Province: 107 file x scala (scala copie della cartella Province,
+    ciascuna in una raw_dir separata, perche' i file sono mappati per nome provincia)
+  - popres1.csv (DCIS_POPRES1): ~960 righe x scala, codici reali incluse le ripartizioni
+
+Per ogni scala misura tempo e picco di memoria (RSS) di ogni loader. Ogni misura
+gira in un processo nuovo, cosi' il picco RSS non e' sporcato dalle misure
+precedenti; "base" e' il picco del processo prima di chiamare il loader
+(interprete + import).
+
+Uso: python scripts/benchmarks/bench_popolazione.py [--scales 1,10,100] [--workers N] [--json out.json]
+
+Con --workers N il pool di processi del loader province viene creato per ogni
+copia della cartella: a scale alte il costo di avvio del pool e' incluso.
+
+Il picco RSS usa il modulo resource (solo Linux/macOS): altrove viene riportato "n/d".
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_popolazione import (
+    PROVINCE_FILE_TO_NUTS3,
+    YEARS_INTERCENSUARIA,
+    classify_popres1,
+    load_intercensuaria_italia,
+    load_intercensuaria_province,
+    load_intercensuaria_regioni,
+    load_popres1,
+)
+from territori import NUTS1_NAMES, NUTS2_NAMES, NUTS3_DISPLAY_NAMES, PROVINCE_SPECIALI
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Colonne anno dei file intercensuaria reali
+YEARS_FILE = list(range(2002, 2020))
+# Righe di popres1.csv reale (anni 2019-2025)
+POPRES1_ROWS = 960
+
+TITLE = '"Ricostruzione della popolazione intercensuaria - Popolazione al 1° gennaio per età"'
+PROVINCE_STEM = "PopolazioneEta-SingolaArea-Province"
+
+REGIONI_FILE_NAMES = [
+    "Piemonte", "Valle D'Aosta/Vallée D'Aoste", "Lombardia", "Liguria",
+    "Trentino-Alto Adige/Südtirol", "Veneto", "Friuli-Venezia Giulia", "Emilia-Romagna",
+    "Toscana", "Umbria", "Marche", "Lazio", "Abruzzo", "Molise", "Campania", "Puglia",
+    "Basilicata", "Calabria", "Sicilia", "Sardegna",
+]
+
+# File provincia reali: esclusi i codici ISTAT speciali, senza file intercensuaria singolo
+PROVINCE_FILE_NAMES = [
+    name for name, code in PROVINCE_FILE_TO_NUTS3.items() if code not in PROVINCE_SPECIALI
+]
+
+
+def _section(label: str, rng: np.random.Generator) -> list[str]:
+    """Sotto-tabella eta' x anno (0..99, "100 e oltre", Totale) con valori casuali."""
+    values = rng.integers(0, 30_000, size=(101, len(YEARS_FILE)))
+    lines = [f"Età/Anno;{';'.join(map(str, YEARS_FILE))}", f"Età;{label}"]
+    for eta, row in enumerate(values):
+        eta_label = "100 e oltre" if eta == 100 else str(eta)
+        lines.append(f"{eta_label};{';'.join(map(str, row))}")
+    lines.append(f"Totale;{';'.join(map(str, values.sum(axis=0)))}")
+    return lines
+
+
+def _block(header: str, rng: np.random.Generator) -> list[str]:
+    """Blocco "<header>" con le sotto-tabelle Totale, Maschi, Femmine."""
+    lines = [TITLE, f'"{header}"']
+    for label in ("Totale", "Maschi", "Femmine"):
+        lines.extend(_section(label, rng))
+    lines.append("")
+    return lines
+
+
+def write_intercensuaria(path: Path, title: str, headers: list[str], rng: np.random.Generator) -> None:
+    lines = [f'"{title}"', ""]
+    for header in headers:
+        lines.extend(_block(header, rng))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def write_synthetic_inputs(root: Path, scale: int, seed: int = 0) -> list[Path]:
+    """Scrive gli input sintetici per una scala. Ritorna le raw_dir (una per copia Province)."""
+    rng = np.random.default_rng(seed)
+    raw_dirs = [root / f"copia_{i:03d}" for i in range(scale)]
+    main_dir = raw_dirs[0]
+
+    # Italia + ripartizioni, regioni: un solo file con blocchi ripetuti
+    main_dir.mkdir(parents=True)
+    italia = ["Tutte le cittadinanze - Italia"] + [
+        f"Tutte le cittadinanze - Ripartizione: {nome}" for nome in NUTS1_NAMES.values()
+    ]
+    write_intercensuaria(
+        main_dir / "PopolazioneEta-SingolaArea-Italia-Ripartizioni.csv",
+        "Popolazione per età, vista per singola area - Italia", italia * scale, rng,
+    )
+    regioni = [f"Tutte le cittadinanze - Regione: {nome}" for nome in REGIONI_FILE_NAMES]
+    write_intercensuaria(
+        main_dir / "PopolazioneEta-SingolaArea-Regioni.csv",
+        "Popolazione per età, vista per singola area - Regioni", regioni * scale, rng,
+    )
+
+    # Province: una cartella generata, le altre copie sono hard link (o copie)
+    prov_dir = main_dir / PROVINCE_STEM
+    prov_dir.mkdir()
+    for name in PROVINCE_FILE_NAMES:
+        label = f"Provincia: {name.replace('_', ' ')}"
+        headers = [f"{pop} - {label}" for pop in
+                   ("Tutte le cittadinanze", "Cittadinanza italiana", "Cittadinanza straniera")]
+        write_intercensuaria(
+            prov_dir / f"PopolazioneEta-SingolaArea-Provincia_{name}.csv",
+            f"Popolazione per età, vista per singola area - {label}", headers, rng,
+        )
+    for raw_dir in raw_dirs[1:]:
+        target = raw_dir / PROVINCE_STEM
+        target.mkdir(parents=True)
+        for src in prov_dir.iterdir():
+            try:
+                os.link(src, target / src.name)
+            except OSError:
+                shutil.copyfile(src, target / src.name)
+
+    # POPRES1: codici reali campionati, ripartizioni comprese (vengono scartate)
+    codes = np.array(["IT", *NUTS1_NAMES, *NUTS2_NAMES, *NUTS3_DISPLAY_NAMES])
+    n_rows = POPRES1_ROWS * scale
+    pd.DataFrame({
+        "REF_AREA": rng.choice(codes, size=n_rows),
+        "DATA_TYPE": "JAN",
+        "SEX": 9,
+        "AGE": "TOTAL",
+        "TIME_PERIOD": rng.integers(2019, 2026, size=n_rows),
+        "OBS_VALUE": rng.integers(10_000, 5_000_000, size=n_rows),
+    }).to_csv(main_dir / "popres1.csv", sep=";", index=False)
+
+    return raw_dirs
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: kilobyte, macOS: byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_italia(raw_dirs: list[Path], workers: int) -> int:
+    return len(load_intercensuaria_italia(raw_dirs[0], YEARS_INTERCENSUARIA))
+
+
+def _run_regioni(raw_dirs: list[Path], workers: int) -> int:
+    return len(load_intercensuaria_regioni(raw_dirs[0], YEARS_INTERCENSUARIA))
+
+
+def _run_province(raw_dirs: list[Path], workers: int) -> int:
+    rows = []
+    for raw_dir in raw_dirs:
+        rows.extend(load_intercensuaria_province(raw_dir, YEARS_INTERCENSUARIA, workers=workers))
+    return len(rows)
+
+
+def _run_popres1(raw_dirs: list[Path], workers: int) -> int:
+    return len(classify_popres1(load_popres1(raw_dirs[0])))
+
+
+LOADERS = {
+    "intercensuaria_italia": _run_italia,
+    "intercensuaria_regioni": _run_regioni,
+    "intercensuaria_province": _run_province,
+    "popres1": _run_popres1,
+}
+
+
+def measure(loader: str, raw_dirs: list[Path], workers: int) -> dict:
+    """Esegue un loader e ne misura tempo e picco RSS (da chiamare in un processo nuovo)."""
+    # Il blocco Trentino-Alto Adige (ripetuto x scala) logga un avviso atteso ogni volta
+    logging.getLogger("generate_popolazione").setLevel(logging.ERROR)
+    rss_base = _peak_rss_mb()
+    t0 = time.perf_counter()
+    n_rows = LOADERS[loader](raw_dirs, workers)
+    return {
+        "secondi": time.perf_counter() - t0,
+        "righe": n_rows,
+        "rss_picco_mb": _peak_rss_mb(),
+        "rss_base_mb": rss_base,
+    }
+
+
+def _fmt_mb(value: float | None) -> str:
+    return "n/d" if value is None else f"{value:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loader popolazione")
+    parser.add_argument("--scales", default="1,10,100", help="Fattori di scala separati da virgola")
+    parser.add_argument("--workers", type=int, default=1, help="Processi per il loader province")
+    parser.add_argument("--json", type=Path, help="Salva i risultati in questo file JSON")
+    args = parser.parse_args()
+    scales = [int(s) for s in args.scales.split(",")]
+
+    results = []
+    print(f"{'scala':>6}  {'loader':<24} {'righe':>10} {'secondi':>9} {'RSS picco MB':>13} {'base MB':>8}")
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            raw_dirs = write_synthetic_inputs(Path(tmp), scale)
+            print(f"{scale:>5}x  (input sintetici generati in {time.perf_counter() - t0:.1f} s)")
+
+            for loader in LOADERS:
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    res = executor.submit(measure, loader, raw_dirs, args.workers).result()
+                results.append({"scala": scale, "loader": loader, "workers": args.workers, **res})
+                print(
+                    f"{scale:>5}x  {loader:<24} {res['righe']:>10,} {res['secondi']:>9.2f} "
+                    f"{_fmt_mb(res['rss_picco_mb']):>13} {_fmt_mb(res['rss_base_mb']):>8}"
+                )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Risultati salvati in {args.json}")
+
+
+if __name__ == "__main__":
+    main()
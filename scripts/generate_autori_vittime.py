@@ -6,8 +6,12 @@ Output:
   - public/data/autori_vittime_reati.json    (per reato, Italia, ultimo anno, OFFEND+VICTIM)
   - public/data/autori_vittime_province.json (per provincia, multi-anno, OFFEND+VICTIM)
   - public/data/autori_vittime_regioni.json  (per regione, multi-anno, OFFEND+VICTIM, con tasso)
+  - public/data/autori_vittime_regioni_colonne.json (stessi record in formato colonnare, per i grafici)
 
-Uso: conda activate osservatorio && python scripts/generate_autori_vittime.py
+Uso: conda activate osservatorio && python scripts/generate_autori_vittime.py [--jobs 2]
+
+Con --jobs 2 OFFEND e VICTIM vengono letti ed elaborati in due processi; i
+record sono poi uniti nell'ordine fisso OFFEND, VICTIM (output identico).
 
 Mappatura codici CP verificata su brocardi.it (fonte ufficiale codice penale):
   CP572    -> art. 572 c.p.     -> Maltrattamenti contro familiari o conviventi
@@ -24,11 +28,27 @@ Unificazione STALK/CP612BIS:
   Questo produce una serie unica CP612BIS 2009-2024.
 """
 
+import argparse
 import json
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+from popolazione_io import read_popolazione
+from territori import (
+    NUTS1_NAMES,
+    NUTS2_SHORT_NAMES,
+    NUTS3_DISPLAY_NAMES,
+    PROVINCE_SPECIALI,
+    TERRITORI,
+    TRENTINO_PARTS,
+    aggrega_virtuali,
+)
 
 log = logging.getLogger(__name__)
 
@@ -112,47 +132,7 @@ CRIME_NAMES = {
 }
 
 # Ripartizioni geografiche
-RIPARTIZIONI = {
-    "IT": "Italia",
-    "ITC": "Nord-ovest",
-    "ITD": "Nord-est",
-    "ITE": "Centro",
-    "ITF": "Sud",
-    "ITG": "Isole",
-}
-
-# Regioni (NUTS2)
-REGIONI = {
-    "ITC1": "Piemonte",
-    "ITC2": "Valle d'Aosta",
-    "ITC3": "Liguria",
-    "ITC4": "Lombardia",
-    "ITD1": "Provincia Autonoma Bolzano",
-    "ITD2": "Provincia Autonoma Trento",
-    "ITD3": "Veneto",
-    "ITD4": "Friuli-Venezia Giulia",
-    "ITD5": "Emilia-Romagna",
-    "ITE1": "Toscana",
-    "ITE2": "Umbria",
-    "ITE3": "Marche",
-    "ITE4": "Lazio",
-    "ITF1": "Abruzzo",
-    "ITF2": "Molise",
-    "ITF3": "Campania",
-    "ITF4": "Puglia",
-    "ITF5": "Basilicata",
-    "ITF6": "Calabria",
-    "ITG1": "Sicilia",
-    "ITG2": "Sardegna",
-}
-
-# Province speciali (nuove province non nel sistema NUTS3 standard)
-# Codici ISTAT: 108=MB, 109=FM, 110=BT (create 2009, fuori dalla codifica NUTS3)
-PROVINCE_SPECIALI = {
-    "IT108": ("Monza e della Brianza", "Lombardia"),
-    "IT109": ("Fermo", "Marche"),
-    "IT110": ("Barletta-Andria-Trani", "Puglia"),
-}
+RIPARTIZIONI = {"IT": "Italia", **NUTS1_NAMES}
 
 # Regioni per l'output (20 regioni: Bolzano+Trento aggregate in Trentino-Alto Adige)
 REGIONI_OUTPUT = {
@@ -178,7 +158,15 @@ REGIONI_OUTPUT = {
     "ITG2": "Sardegna",
 }
 
-# Reati curati per vista regionale (evita file troppo grande con tutti i 59 reati)
+# autori_vittime_regioni.json in formato colonnare (vedi colonnare), letto dai grafici
+REGIONI_COLONNARE = "autori_vittime_regioni_colonne.json"
+
+# Trentino-Alto Adige nei JSON autori/vittime (codice storico dell'output)
+REGIONI_VIRTUALI_AVT = {"ITD1+ITD2": TRENTINO_PARTS}
+
+# Reati pubblicati nella vista regionale: il calcolo non ne dipende (un solo
+# groupby), ma tutti i reati renderebbero autori_vittime_regioni.json ~40% piu'
+# grande e allargherebbero le coppie candidate di generate_insights.
 # Include reati ad alto volume o alta rilevanza sociale
 REATI_REGIONI = {
     "TOT", "INTENHOM", "ATTEMPHOM", "RAPE", "RAPEUN18",
@@ -192,9 +180,9 @@ def load_territory_names(project_root: Path) -> dict[str, str]:
     """Costruisce mapping REF_AREA -> nome territorio da CSV processati."""
     names = {}
     names.update(RIPARTIZIONI)
-    names.update(REGIONI)
-    for code, (nome, _) in PROVINCE_SPECIALI.items():
-        names[code] = nome
+    names.update(NUTS2_SHORT_NAMES)
+    for code in PROVINCE_SPECIALI:
+        names[code] = NUTS3_DISPLAY_NAMES[code]
 
     # Province dai CSV processati (fonte autorevole per i nomi)
     prov_csv = project_root / "data" / "processed" / "delitti_province_normalizzato.csv"
@@ -206,46 +194,15 @@ def load_territory_names(project_root: Path) -> dict[str, str]:
     return names
 
 
-def load_popolazione(project_root: Path) -> dict[tuple[str, int], int]:
-    """Carica popolazione regionale da CSV. Ritorna {(REF_AREA, anno): popolazione}.
+def load_popolazione(project_root: Path) -> pd.DataFrame:
+    """Carica popolazione regionale (popolazione_io): REF_AREA, Anno, Popolazione.
 
     Aggrega Bolzano+Trento in Trentino-Alto Adige (ITD1+ITD2).
     """
-    csv_path = project_root / "data" / "processed" / "popolazione_regioni_province.csv"
-    df = pd.read_csv(csv_path, dtype={"REF_AREA": str})
-    df = df[df["livello"] == "regione"]
-
-    pop: dict[tuple[str, int], int] = {}
-    for _, row in df.iterrows():
-        pop[(row["REF_AREA"], int(row["Anno"]))] = int(row["Popolazione"])
-
-    # Aggrega Bolzano + Trento
-    for anno in df["Anno"].unique():
-        anno = int(anno)
-        bz = pop.get(("ITD1", anno), 0)
-        tn = pop.get(("ITD2", anno), 0)
-        if bz > 0 and tn > 0:
-            pop[("ITD1+ITD2", anno)] = bz + tn
-
-    return pop
-
-
-def get_region_name(ref_area: str) -> str:
-    """Dato un codice NUTS3 provincia, restituisce il nome della regione."""
-    if ref_area in PROVINCE_SPECIALI:
-        return PROVINCE_SPECIALI[ref_area][1]
-    # NUTS3: primi 4 caratteri = NUTS2 regione
-    region_code = ref_area[:4] if len(ref_area) >= 5 else ref_area
-    return REGIONI.get(region_code, region_code)
-
-
-def is_province(ref_area: str) -> bool:
-    """True se il codice e' una provincia (NUTS3 o codice speciale)."""
-    if ref_area in PROVINCE_SPECIALI:
-        return True
-    # NUTS3 standard: 5+ caratteri (es. ITC11)
-    # ITD1 e ITD2 sono regioni/province autonome: li trattiamo come regioni
-    return len(ref_area) >= 5
+    df = read_popolazione(project_root / "data" / "processed")
+    df = df.loc[df["livello"] == "regione", ["REF_AREA", "Anno", "Popolazione"]]
+    df = aggrega_virtuali(df, REGIONI_VIRTUALI_AVT, by=["Anno"], agg={"Popolazione": "sum"})
+    return df.astype({"REF_AREA": str})
 
 
 def _unify_stalk_cp612bis(df: pd.DataFrame) -> pd.DataFrame:
@@ -258,53 +215,116 @@ def _unify_stalk_cp612bis(df: pd.DataFrame) -> pd.DataFrame:
     Strategia: rinomina STALK -> CP612BIS, poi rimuove i duplicati
     mantenendo il record CP612BIS originale (ha breakdown completo).
     Il sort mette CP612BIS prima di STALK-rinominato grazie al flag,
-    e drop_duplicates tiene il primo (= CP612BIS originale).
+    e drop_duplicates tiene il primo (= CP612BIS originale). Solo le righe
+    dei due codici passano per sort e drop_duplicates, le altre restano
+    invariate (le chiavi SDMX degli altri reati sono gia' uniche).
     """
     stalk_count = (df["TYPE_CRIME"] == "STALK").sum()
     if stalk_count == 0:
         return df
 
-    df = df.copy()
+    if isinstance(df["TYPE_CRIME"].dtype, pd.CategoricalDtype):
+        # CP612BIS tra le categorie, mantenendole ordinate
+        categorie = df["TYPE_CRIME"].cat.categories.union(["CP612BIS"])
+        df = df.assign(TYPE_CRIME=df["TYPE_CRIME"].cat.set_categories(categorie))
+    coinvolti = df["TYPE_CRIME"].isin(["STALK", "CP612BIS"])
+    sub = df[coinvolti].copy()
     # Flag per distinguere i record originali CP612BIS da quelli rinominati
-    df["_from_stalk"] = df["TYPE_CRIME"] == "STALK"
-    df.loc[df["TYPE_CRIME"] == "STALK", "TYPE_CRIME"] = "CP612BIS"
+    sub["_from_stalk"] = sub["TYPE_CRIME"] == "STALK"
+    sub.loc[sub["_from_stalk"], "TYPE_CRIME"] = "CP612BIS"
 
     # In caso di overlap, tieni CP612BIS originale (ha breakdown completo)
-    key_cols = [c for c in df.columns if c not in ("OBS_VALUE", "_from_stalk")]
-    df = df.sort_values("_from_stalk")  # False (originale) prima di True (ex-STALK)
-    df = df.drop_duplicates(subset=key_cols, keep="first")
-    df = df.drop(columns=["_from_stalk"])
+    key_cols = [c for c in sub.columns if c not in ("OBS_VALUE", "_from_stalk")]
+    sub = sub.sort_values("_from_stalk")  # False (originale) prima di True (ex-STALK)
+    sub = sub.drop_duplicates(subset=key_cols, keep="first")
+    df = pd.concat([df[~coinvolti], sub.drop(columns=["_from_stalk"])])
+    if isinstance(df["TYPE_CRIME"].dtype, pd.CategoricalDtype):
+        df["TYPE_CRIME"] = df["TYPE_CRIME"].cat.remove_unused_categories()
 
     log.info("  Unificazione STALK -> CP612BIS: %d righe STALK rinominate", stalk_count)
     return df
 
 
-def load_data(project_root: Path) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Carica DF_7 (OFFEND) e DF_8 (VICTIM), unificando STALK in CP612BIS."""
-    raw_dir = project_root / "data" / "raw" / "autvittps"
-    cols = ["REF_AREA", "DATA_TYPE", "TYPE_CRIME", "SEX", "AGE",
-            "CITIZENSHIP", "TIME_PERIOD", "OBS_VALUE"]
+# File raw per data_type, nell'ordine in cui compaiono nei JSON
+DATA_FILES = {"OFFEND": "autvittps_7.csv", "VICTIM": "autvittps_8.csv"}
+
+# Righe per blocco di lettura dei CSV autvittps (vedi read_autvittps)
+AUTVITTPS_CHUNK_ROWS = 500_000
+
+# Colonne lette: codici come categoriali, anno e valore ridotti. OBS_VALUE sono
+# conteggi di singole celle ISTAT, interi < 2^24 che float32 rappresenta
+# esattamente; le somme possono superare 2^24, quindi si fanno in float64
+# (vedi compute_metrics e regioni_records).
+AUTVITTPS_CATEGORICAL = ["REF_AREA", "DATA_TYPE", "TYPE_CRIME", "SEX", "AGE", "CITIZENSHIP"]
+AUTVITTPS_DTYPES = {
+    **{col: "category" for col in AUTVITTPS_CATEGORICAL},
+    "TIME_PERIOD": "int16",
+    "OBS_VALUE": "float32",
+}
 
-    log.info("Lettura autvittps_7.csv (OFFEND)...")
-    df7 = pd.read_csv(
-        raw_dir / "autvittps_7.csv", sep=";", usecols=cols,
-        dtype={"REF_AREA": str, "SEX": str, "OBS_VALUE": float},
-    )
-    df7 = _unify_stalk_cp612bis(df7)
 
-    log.info("Lettura autvittps_8.csv (VICTIM)...")
-    df8 = pd.read_csv(
-        raw_dir / "autvittps_8.csv", sep=";", usecols=cols,
-        dtype={"REF_AREA": str, "SEX": str, "OBS_VALUE": float},
+def read_autvittps(
+    filepath: Path, reati: set[str], chunk_rows: int = AUTVITTPS_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """Legge un CSV autvittps a blocchi, tenendo solo i codici TYPE_CRIME in reati.
+
+    Ogni blocco e' letto con i tipi di AUTVITTPS_DTYPES e filtrato prima di
+    essere tenuto; i categoriali dei blocchi sono poi uniti con categorie
+    ordinate, cosi' i groupby restituiscono i gruppi nello stesso ordine delle
+    stringhe.
+    """
+    parts = []
+    reader = pd.read_csv(
+        filepath, sep=";", usecols=list(AUTVITTPS_DTYPES),
+        dtype=AUTVITTPS_DTYPES, chunksize=chunk_rows,
     )
-    df8 = _unify_stalk_cp612bis(df8)
+    for chunk in reader:
+        parts.append(chunk[chunk["TYPE_CRIME"].isin(reati)])
+
+    df = pd.DataFrame({
+        col: (
+            union_categoricals([part[col] for part in parts], sort_categories=True)
+            if col in AUTVITTPS_CATEGORICAL
+            else np.concatenate([part[col].to_numpy() for part in parts])
+        )
+        for col in AUTVITTPS_DTYPES
+    })
+    for col in AUTVITTPS_CATEGORICAL:
+        df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def load_dataset(project_root: Path, data_type: str) -> pd.DataFrame:
+    """Carica DF_7 (OFFEND) o DF_8 (VICTIM), unificando STALK in CP612BIS.
+
+    Vengono tenuti solo i reati di CRIME_NAMES (piu' STALK, unificato in CP612BIS).
+    """
+    filename = DATA_FILES[data_type]
+    log.info("Lettura %s (%s)...", filename, data_type)
+    df = read_autvittps(project_root / "data" / "raw" / "autvittps" / filename, {*CRIME_NAMES, "STALK"})
+    df = _unify_stalk_cp612bis(df)
+    log.info("  %s: %d righe (%.1f MB)", data_type, len(df), df.memory_usage(deep=True).sum() / 1e6)
+    return df
+
+
+# Celle (SEX, AGE, CITIZENSHIP) usate dalle metriche, con il nome della colonna pivot
+METRIC_CELLS = {
+    ("9", "TOTAL", "TOTAL"): "tot",
+    ("9", "TOTAL", "ITL"): "tot_itl",
+    ("9", "TOTAL", "FRG"): "tot_frg",
+    ("9", "Y_UN17", "TOTAL"): "min",
+    ("9", "Y_UN17", "FRG"): "min_frg",
+    ("9", "Y_UN17", "ITL"): "min_itl",
+    ("1", "TOTAL", "TOTAL"): "maschi",
+    ("2", "TOTAL", "TOTAL"): "femmine",
+}
 
-    log.info("  OFFEND: %d righe, VICTIM: %d righe", len(df7), len(df8))
-    return df7, df8
+METRIC_COUNTS = ["totale", "stranieri", "minori", "maschi", "femmine"]
+METRIC_PCTS = ["pct_stranieri", "pct_maschi", "pct_femmine", "pct_minori"]
 
 
-def extract_metrics(df: pd.DataFrame) -> dict:
-    """Da un subset filtrato per anno+reato+territorio, estrae totale/stranieri/minori.
+def compute_metrics(df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """Totale/stranieri/minori/maschi/femmine e percentuali per ogni gruppo di keys.
 
     Gestisce due strutture dati ISTAT:
     - 2022+: matrice completa (SEX=9, AGE=TOTAL/Y_UN17, CITIZENSHIP=TOTAL/FRG/ITL)
@@ -312,103 +332,88 @@ def extract_metrics(df: pd.DataFrame) -> dict:
       AGE=Y_UN17 non disponibile per tutti i reati)
 
     Verifica 2022: FRG(270567) + ITL(548265) = TOTAL(818832) -> FRG+ITL e' affidabile.
-    """
-    sex9 = df[df["SEX"] == "9"]
+    Maschi (SEX=1) e femmine (SEX=2) hanno CITIZENSHIP=TOTAL anche pre-2022.
 
-    # Totale: preferisci CITIZENSHIP=TOTAL, fallback su FRG+ITL
-    totale_direct = sex9[
-        (sex9["AGE"] == "TOTAL") & (sex9["CITIZENSHIP"] == "TOTAL")
-    ]["OBS_VALUE"].sum()
-
-    if totale_direct > 0:
-        totale = totale_direct
-    else:
-        # Fallback: somma italiani + stranieri
-        italiani = sex9[
-            (sex9["AGE"] == "TOTAL") & (sex9["CITIZENSHIP"] == "ITL")
-        ]["OBS_VALUE"].sum()
-        stranieri_val = sex9[
-            (sex9["AGE"] == "TOTAL") & (sex9["CITIZENSHIP"] == "FRG")
-        ]["OBS_VALUE"].sum()
-        totale = italiani + stranieri_val
-
-    stranieri = sex9[
-        (sex9["AGE"] == "TOTAL") & (sex9["CITIZENSHIP"] == "FRG")
-    ]["OBS_VALUE"].sum()
-
-    # Minori: potrebbe non esistere per tutti gli anni/reati
-    minori_direct = sex9[
-        (sex9["AGE"] == "Y_UN17") & (sex9["CITIZENSHIP"] == "TOTAL")
-    ]["OBS_VALUE"].sum()
-
-    if minori_direct > 0:
-        minori = minori_direct
-    else:
-        # Fallback: somma minori FRG + ITL
-        minori_frg = sex9[
-            (sex9["AGE"] == "Y_UN17") & (sex9["CITIZENSHIP"] == "FRG")
-        ]["OBS_VALUE"].sum()
-        minori_itl = sex9[
-            (sex9["AGE"] == "Y_UN17") & (sex9["CITIZENSHIP"] == "ITL")
-        ]["OBS_VALUE"].sum()
-        minori = minori_frg + minori_itl  # 0 se nessuna delle due esiste
-
-    # Maschi (SEX=1) e femmine (SEX=2): hanno CITIZENSHIP=TOTAL anche pre-2022
-    maschi = df[
-        (df["SEX"] == "1") & (df["AGE"] == "TOTAL") & (df["CITIZENSHIP"] == "TOTAL")
-    ]["OBS_VALUE"].sum()
-    femmine = df[
-        (df["SEX"] == "2") & (df["AGE"] == "TOTAL") & (df["CITIZENSHIP"] == "TOTAL")
-    ]["OBS_VALUE"].sum()
-
-    result = {
-        "totale": int(totale),
-        "stranieri": int(stranieri),
-        "minori": int(minori),
-        "maschi": int(maschi),
-        "femmine": int(femmine),
-        "pct_stranieri": round(stranieri / totale * 100, 1) if totale > 0 else 0,
-        "pct_maschi": round(maschi / totale * 100, 1) if totale > 0 and maschi > 0 else None,
-        "pct_femmine": round(femmine / totale * 100, 1) if totale > 0 and femmine > 0 else None,
-    }
-    # pct_minori solo se il dato minori e' disponibile
-    if minori > 0:
-        result["pct_minori"] = round(minori / totale * 100, 1) if totale > 0 else 0
-    else:
-        result["pct_minori"] = None
+    Le righe delle celle in METRIC_CELLS sono sommate con un solo groupby e
+    portate in colonne (pivot di SEX, AGE, CITIZENSHIP); i fallback
+    TOTAL -> FRG+ITL e Y_UN17 TOTAL -> FRG+ITL sono np.where sulle colonne.
+    I gruppi senza nessuna di queste celle (totale 0) non compaiono.
 
+    Returns:
+        Una riga per gruppo, ordinata per keys, con le colonne di keys,
+        METRIC_COUNTS e METRIC_PCTS (NaN dove la percentuale non e' definita:
+        pct_maschi/pct_femmine senza maschi/femmine, pct_minori senza minori).
+    """
+    cells = pd.MultiIndex.from_tuples(list(METRIC_CELLS))
+    pos = cells.get_indexer(pd.MultiIndex.from_arrays([
+        df["SEX"].astype(str), df["AGE"].astype(str), df["CITIZENSHIP"].astype(str),
+    ]))
+    found = pos >= 0
+    cella = np.array(list(METRIC_CELLS.values()), dtype=object)[pos[found]]
+
+    wide = (
+        df.loc[found, [*keys, "OBS_VALUE"]]
+        .astype({"OBS_VALUE": np.float64})
+        .assign(_cella=cella)
+        .groupby([*keys, "_cella"], observed=True)["OBS_VALUE"].sum()
+        .unstack("_cella", fill_value=0)
+        .reindex(columns=list(METRIC_CELLS.values()), fill_value=0)
+    )
+    c = {col: wide[col].to_numpy(dtype=float) for col in wide.columns}
+
+    # Totale: preferisci CITIZENSHIP=TOTAL, fallback su FRG+ITL; idem per i minori
+    totale = np.where(c["tot"] > 0, c["tot"], c["tot_itl"] + c["tot_frg"])
+    minori = np.where(c["min"] > 0, c["min"], c["min_frg"] + c["min_itl"])
+    stranieri, maschi, femmine = c["tot_frg"], c["maschi"], c["femmine"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        def pct(values: np.ndarray) -> np.ndarray:
+            return np.round(values / totale * 100, 1)
+
+        result = wide.index.to_frame(index=False)
+        result["totale"] = totale
+        result["stranieri"] = stranieri
+        result["minori"] = minori
+        result["maschi"] = maschi
+        result["femmine"] = femmine
+        result["pct_stranieri"] = np.where(totale > 0, pct(stranieri), 0)
+        result["pct_maschi"] = np.where((totale > 0) & (maschi > 0), pct(maschi), np.nan)
+        result["pct_femmine"] = np.where((totale > 0) & (femmine > 0), pct(femmine), np.nan)
+        result["pct_minori"] = np.where(minori > 0, np.where(totale > 0, pct(minori), 0), np.nan)
     return result
 
 
-def generate_trend(
-    df_offend: pd.DataFrame,
-    df_victim: pd.DataFrame,
-    out_dir: Path,
-) -> None:
-    """Genera autori_vittime_trend.json: serie storica Italia, tutti i reati, OFFEND+VICTIM."""
-    records = []
+def metrics_records(metrics: pd.DataFrame) -> list[dict]:
+    """Righe di compute_metrics -> dict per i JSON (int per i conteggi, None per NaN)."""
+    columns = [metrics[col].to_numpy(dtype=float).astype(np.int64).tolist() for col in METRIC_COUNTS]
+    for col in METRIC_PCTS:
+        values = metrics[col].to_numpy(dtype=float)
+        columns.append([None if np.isnan(v) else v for v in values.tolist()])
+    names = METRIC_COUNTS + METRIC_PCTS
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def trend_records(data_type: str, df: pd.DataFrame) -> list[dict]:
+    """Record di autori_vittime_trend.json per un data_type: serie storica Italia, tutti i reati."""
+    metrics = compute_metrics(df[df["REF_AREA"] == "IT"], ["TYPE_CRIME", "TIME_PERIOD"])
+    metrics = metrics[metrics["TYPE_CRIME"].isin(CRIME_NAMES) & (metrics["totale"] > 0)]
+
+    return [
+        {
+            "data_type": data_type,
+            "codice_reato": crime_code,
+            "reato": CRIME_NAMES[crime_code],
+            "anno": int(anno),
+            **values,
+        }
+        for crime_code, anno, values in zip(
+            metrics["TYPE_CRIME"], metrics["TIME_PERIOD"], metrics_records(metrics),
+        )
+    ]
 
-    for data_type, df in [("OFFEND", df_offend), ("VICTIM", df_victim)]:
-        df_it = df[df["REF_AREA"] == "IT"]
-
-        for crime_code in sorted(df_it["TYPE_CRIME"].unique()):
-            if crime_code not in CRIME_NAMES:
-                continue
-            df_crime = df_it[df_it["TYPE_CRIME"] == crime_code]
-
-            for anno in sorted(df_crime["TIME_PERIOD"].unique()):
-                year_data = df_crime[df_crime["TIME_PERIOD"] == anno]
-                metrics = extract_metrics(year_data)
-                if metrics["totale"] == 0:
-                    continue
-                records.append({
-                    "data_type": data_type,
-                    "codice_reato": crime_code,
-                    "reato": CRIME_NAMES[crime_code],
-                    "anno": int(anno),
-                    **metrics,
-                })
 
+def generate_trend(records: list[dict], out_dir: Path) -> None:
+    """Genera autori_vittime_trend.json: serie storica Italia, tutti i reati, OFFEND+VICTIM."""
     out_path = out_dir / "autori_vittime_trend.json"
     out_path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
     size_kb = out_path.stat().st_size / 1024
@@ -417,36 +422,29 @@ def generate_trend(
              out_path.name, len(records), n_crimes, size_kb)
 
 
-def generate_reati(
-    df_offend: pd.DataFrame,
-    df_victim: pd.DataFrame,
-    out_dir: Path,
-) -> None:
-    """Genera autori_vittime_reati.json: breakdown per reato, Italia, anno ANNO_REF."""
-    records = []
-
-    for data_type, df in [("OFFEND", df_offend), ("VICTIM", df_victim)]:
-        mask = (
-            (df["REF_AREA"] == "IT")
-            & (df["TIME_PERIOD"] == ANNO_REF)
-            & (df["TYPE_CRIME"] != "TOT")
-        )
-        df_year = df[mask]
-
-        for crime_code in sorted(df_year["TYPE_CRIME"].unique()):
-            crime_data = df_year[df_year["TYPE_CRIME"] == crime_code]
-            metrics = extract_metrics(crime_data)
+def reati_records(data_type: str, df: pd.DataFrame) -> list[dict]:
+    """Record di autori_vittime_reati.json per un data_type: per reato, Italia, anno ANNO_REF."""
+    mask = (
+        (df["REF_AREA"] == "IT")
+        & (df["TIME_PERIOD"] == ANNO_REF)
+        & (df["TYPE_CRIME"] != "TOT")
+    )
+    metrics = compute_metrics(df[mask], ["TYPE_CRIME"])
+    metrics = metrics[metrics["totale"] > 0]
 
-            if metrics["totale"] == 0:
-                continue
+    return [
+        {
+            "data_type": data_type,
+            "codice_reato": crime_code,
+            "reato": CRIME_NAMES.get(crime_code, crime_code),
+            **values,
+        }
+        for crime_code, values in zip(metrics["TYPE_CRIME"], metrics_records(metrics))
+    ]
 
-            records.append({
-                "data_type": data_type,
-                "codice_reato": crime_code,
-                "reato": CRIME_NAMES.get(crime_code, crime_code),
-                **metrics,
-            })
 
+def generate_reati(records: list[dict], out_dir: Path) -> None:
+    """Genera autori_vittime_reati.json: breakdown per reato, Italia, anno ANNO_REF."""
     out_path = out_dir / "autori_vittime_reati.json"
     out_path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
     size_kb = out_path.stat().st_size / 1024
@@ -456,42 +454,40 @@ def generate_reati(
              out_path.name, n_offend, n_victim, size_kb)
 
 
-def generate_province(
-    df_offend: pd.DataFrame,
-    df_victim: pd.DataFrame,
-    territory_names: dict[str, str],
-    out_dir: Path,
-) -> None:
+def province_records(data_type: str, df: pd.DataFrame, territory_names: dict[str, str]) -> list[dict]:
+    """Record di autori_vittime_province.json per un data_type: dati provinciali multi-anno."""
+    df_prov = df[TERRITORI.is_nuts3(df["REF_AREA"])]
+    region_names = dict(zip(
+        df_prov["REF_AREA"].unique(),
+        TERRITORI.nome_regione(df_prov["REF_AREA"].unique(), names=NUTS2_SHORT_NAMES),
+    ))
+
+    metrics = compute_metrics(df_prov, ["REF_AREA", "TYPE_CRIME", "TIME_PERIOD"])
+    metrics = metrics[metrics["TYPE_CRIME"].isin(CRIME_NAMES) & (metrics["totale"] > 0)]
+
+    return [
+        {
+            "data_type": data_type,
+            "ref_area": ref_area,
+            "provincia": territory_names.get(ref_area, ref_area),
+            "regione": region_names[ref_area],
+            "codice_reato": crime_code,
+            "reato": CRIME_NAMES.get(crime_code, crime_code),
+            "anno": int(anno),
+            **values,
+        }
+        for ref_area, crime_code, anno, values in zip(
+            metrics["REF_AREA"], metrics["TYPE_CRIME"], metrics["TIME_PERIOD"], metrics_records(metrics),
+        )
+    ]
+
+
+def generate_province(records: list[dict], out_dir: Path) -> None:
     """Genera autori_vittime_province.json: dati provinciali multi-anno.
 
     TOT disponibile solo per ANNO_REF (2022).
     Singoli reati disponibili 2022-2024.
     """
-    records = []
-
-    for data_type, df in [("OFFEND", df_offend), ("VICTIM", df_victim)]:
-        df_prov = df[df["REF_AREA"].apply(is_province)]
-
-        for (ref_area, crime_code, anno), group in df_prov.groupby(
-            ["REF_AREA", "TYPE_CRIME", "TIME_PERIOD"]
-        ):
-            if crime_code not in CRIME_NAMES:
-                continue
-            metrics = extract_metrics(group)
-            if metrics["totale"] == 0:
-                continue
-
-            records.append({
-                "data_type": data_type,
-                "ref_area": ref_area,
-                "provincia": territory_names.get(ref_area, ref_area),
-                "regione": get_region_name(ref_area),
-                "codice_reato": crime_code,
-                "reato": CRIME_NAMES.get(crime_code, crime_code),
-                "anno": int(anno),
-                **metrics,
-            })
-
     out_path = out_dir / "autori_vittime_province.json"
     out_path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
     size_kb = out_path.stat().st_size / 1024
@@ -501,65 +497,58 @@ def generate_province(
              out_path.name, n_province, f"{anni[0]}-{anni[-1]}", size_kb)
 
 
-def generate_regioni(
-    df_offend: pd.DataFrame,
-    df_victim: pd.DataFrame,
-    popolazione: dict[tuple[str, int], int],
-    out_dir: Path,
-) -> None:
-    """Genera autori_vittime_regioni.json: dati regionali multi-anno con tasso per 100k.
+def regioni_records(
+    data_type: str, df: pd.DataFrame, popolazione: pd.DataFrame,
+) -> list[dict]:
+    """Record di autori_vittime_regioni.json per un data_type: regioni multi-anno con tasso."""
+    # Filtra solo regioni NUTS2, Bolzano+Trento sommate in una sola groupby
+    df_reg = df[df["REF_AREA"].isin(NUTS2_SHORT_NAMES)].astype({"OBS_VALUE": np.float64})
+    df_reg = aggrega_virtuali(
+        df_reg, REGIONI_VIRTUALI_AVT,
+        by=[c for c in df_reg.columns if c not in ("REF_AREA", "OBS_VALUE")],
+        agg={"OBS_VALUE": "sum"},
+    )
 
-    Aggrega Bolzano+Trento in Trentino-Alto Adige.
-    Solo reati in REATI_REGIONI per contenere la dimensione del file.
-    """
-    records = []
+    metrics = compute_metrics(df_reg, ["TYPE_CRIME", "TIME_PERIOD", "REF_AREA"])
+    metrics = metrics[
+        metrics["TYPE_CRIME"].isin(REATI_REGIONI & CRIME_NAMES.keys())
+        & metrics["REF_AREA"].isin(REGIONI_OUTPUT)
+        & (metrics["totale"] > 0)
+    ]
+    # Popolazione per regione e anno con un solo merge (NaN se mancante)
+    metrics = metrics.merge(
+        popolazione.rename(columns={"Anno": "TIME_PERIOD"}),
+        on=["REF_AREA", "TIME_PERIOD"], how="left",
+    )
+    # Per reato e anno, regioni nell'ordine di REGIONI_OUTPUT
+    ordine = metrics["REF_AREA"].map({code: i for i, code in enumerate(REGIONI_OUTPUT)})
+    metrics = metrics.assign(_ordine=ordine).sort_values(["TYPE_CRIME", "TIME_PERIOD", "_ordine"])
 
-    for data_type, df in [("OFFEND", df_offend), ("VICTIM", df_victim)]:
-        # Filtra solo regioni NUTS2
-        df_reg = df[df["REF_AREA"].isin(REGIONI)]
-
-        for crime_code in sorted(REATI_REGIONI):
-            if crime_code not in CRIME_NAMES:
-                continue
-            df_crime = df_reg[df_reg["TYPE_CRIME"] == crime_code]
-
-            # Raggruppa per regione e anno, poi aggrega BZ+TN
-            for anno in sorted(df_crime["TIME_PERIOD"].unique()):
-                df_year = df_crime[df_crime["TIME_PERIOD"] == anno]
-
-                # Regioni singole (escluse BZ e TN, aggregate dopo)
-                for reg_code, reg_name in REGIONI_OUTPUT.items():
-                    if reg_code == "ITD1+ITD2":
-                        # Aggrega Bolzano + Trento
-                        df_bz = df_year[df_year["REF_AREA"] == "ITD1"]
-                        df_tn = df_year[df_year["REF_AREA"] == "ITD2"]
-                        df_merged = pd.concat([df_bz, df_tn])
-                        if df_merged.empty:
-                            continue
-                        metrics = extract_metrics(df_merged)
-                    else:
-                        df_single = df_year[df_year["REF_AREA"] == reg_code]
-                        if df_single.empty:
-                            continue
-                        metrics = extract_metrics(df_single)
-
-                    if metrics["totale"] == 0:
-                        continue
-
-                    pop = popolazione.get((reg_code, int(anno)))
-                    tasso = round(metrics["totale"] / pop * 100_000, 1) if pop else None
-
-                    records.append({
-                        "data_type": data_type,
-                        "codice_regione": reg_code,
-                        "regione": reg_name,
-                        "codice_reato": crime_code,
-                        "reato": CRIME_NAMES[crime_code],
-                        "anno": int(anno),
-                        "tasso": tasso,
-                        **metrics,
-                    })
+    records = []
+    for crime_code, anno, reg_code, pop, values in zip(
+        metrics["TYPE_CRIME"], metrics["TIME_PERIOD"], metrics["REF_AREA"],
+        metrics["Popolazione"].tolist(), metrics_records(metrics),
+    ):
+        tasso = round(values["totale"] / pop * 100_000, 1) if pop > 0 else None
+
+        records.append({
+            "data_type": data_type,
+            "codice_regione": reg_code,
+            "regione": REGIONI_OUTPUT[reg_code],
+            "codice_reato": crime_code,
+            "reato": CRIME_NAMES[crime_code],
+            "anno": int(anno),
+            "tasso": tasso,
+            **values,
+        })
+    return records
+
+
+def generate_regioni(records: list[dict], out_dir: Path) -> None:
+    """Genera autori_vittime_regioni.json: dati regionali multi-anno con tasso per 100k.
 
+    Aggrega Bolzano+Trento in Trentino-Alto Adige. Solo reati in REATI_REGIONI.
+    """
     out_path = out_dir / "autori_vittime_regioni.json"
     out_path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
     size_kb = out_path.stat().st_size / 1024
@@ -568,8 +557,81 @@ def generate_regioni(
     log.info("OK  %-45s (%d regioni, %d reati, %d record, %.1f KB)",
              out_path.name, n_regioni, n_crimes, len(records), size_kb)
 
+    col_path = out_dir / REGIONI_COLONNARE
+    col_path.write_text(json.dumps(colonnare(records), ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    log.info("OK  %-45s (colonnare, %.1f KB)", col_path.name, col_path.stat().st_size / 1024)
+
+
+def colonnare(records: list[dict]) -> dict:
+    """Codifica una lista di record con gli stessi campi in formato colonnare.
+
+    Ogni campo diventa un array di n valori; i campi stringa sono codificati a
+    dizionario ({"valori": stringhe distinte, "codici": indici in valori}),
+    cosi' etichette come regione e reato compaiono una volta sola. Decodifica
+    lato client: src/lib/colonnare.ts.
+    """
+    colonne: dict[str, list | dict] = {}
+    for name in records[0] if records else []:
+        values = [r[name] for r in records]
+        if all(isinstance(v, str) for v in values):
+            codici, valori = pd.factorize(pd.Series(values, dtype=object))
+            colonne[name] = {"valori": list(valori), "codici": codici.tolist()}
+        else:
+            colonne[name] = values
+    return {"n": len(records), "colonne": colonne}
+
+
+def process_data_type(
+    project_root: Path,
+    data_type: str,
+    territory_names: dict[str, str],
+    popolazione: pd.DataFrame,
+) -> dict[str, list[dict]]:
+    """Carica un data_type e costruisce i record di tutti gli output ({output: record})."""
+    df = load_dataset(project_root, data_type)
+    return {
+        "trend": trend_records(data_type, df),
+        "reati": reati_records(data_type, df),
+        "province": province_records(data_type, df, territory_names),
+        "regioni": regioni_records(data_type, df, popolazione),
+    }
+
+
+def process_all(
+    project_root: Path,
+    territory_names: dict[str, str],
+    popolazione: pd.DataFrame,
+    jobs: int = 1,
+) -> dict[str, list[dict]]:
+    """process_data_type per OFFEND e VICTIM, in processi separati se jobs > 1.
+
+    Ogni worker legge il proprio CSV e restituisce solo i record, quindi
+    lettura ed elaborazione dei due dataset procedono in parallelo.
+
+    Returns:
+        {output: record}, con i record concatenati nell'ordine di DATA_FILES
+        (OFFEND poi VICTIM) qualunque worker finisca per primo.
+    """
+    args = (territory_names, popolazione)
+    if jobs > 1:
+        with ProcessPoolExecutor(min(jobs, len(DATA_FILES))) as executor:
+            futures = [executor.submit(process_data_type, project_root, dt, *args) for dt in DATA_FILES]
+            results = [f.result() for f in futures]
+    else:
+        results = [process_data_type(project_root, dt, *args) for dt in DATA_FILES]
+    return {name: [r for result in results for r in result[name]] for name in results[0]}
+
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera i JSON autori/vittime da DCCV_AUTVITTPS")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Processi per OFFEND e VICTIM (default: 1, seriale; 2 li elabora in parallelo)",
+    )
+    args = parser.parse_args()
+
     logging.basicConfig(level=logging.INFO, format="%(message)s")
     project_root = Path(__file__).resolve().parent.parent
     out_dir = project_root / "public" / "data"
@@ -581,12 +643,14 @@ def main() -> None:
     popolazione = load_popolazione(project_root)
     log.info("Popolazione: %d record", len(popolazione))
 
-    df_offend, df_victim = load_data(project_root)
+    start = time.perf_counter()
+    records = process_all(project_root, territory_names, popolazione, jobs=args.jobs)
+    log.info("OFFEND+VICTIM elaborati in %.2fs (%d processi)", time.perf_counter() - start, args.jobs)
 
-    generate_trend(df_offend, df_victim, out_dir)
-    generate_reati(df_offend, df_victim, out_dir)
-    generate_province(df_offend, df_victim, territory_names, out_dir)
-    generate_regioni(df_offend, df_victim, popolazione, out_dir)
+    generate_trend(records["trend"], out_dir)
+    generate_reati(records["reati"], out_dir)
+    generate_province(records["province"], out_dir)
+    generate_regioni(records["regioni"], out_dir)
 
     log.info("\nCompletato.")
 
@@ -5,6 +5,7 @@ Sostituisce il notebook analisi_delitti.ipynb e assorbe generate_allarme_regioni
 Input:
   - data/raw/delittips/delittips_1.csv (DF_1: Italia + tutti territori, numeri assoluti)
   - data/processed/popolazione_regioni_province.csv
+    (anni mancanti completati con popolazione_interpolazione, vedi POP_METODO)
   - data/raw/percezione_criminalita_istat.csv
 
 Output CSV (data/processed/):
@@ -14,18 +15,64 @@ Output CSV (data/processed/):
   - delitti_categorie_normalizzato.csv
   - reati_allarme_sociale.csv
   - percezione_vs_dati.csv
+  - delitti_tassonomie.csv (solo con --tassonomie)
 
 Output JSON (public/data/):
   - reati_allarme_sociale_regioni.json
-  - reati_allarme_sociale_province.json
+  - reati_allarme_sociale_province.json (+ reati_allarme_sociale_province/, uno shard per regione)
+  - delitti_province_reati/ (province x reati x anni, uno shard per provincia + index.json;
+    export per analisi e per grafici futuri: nessun componente lo legge ancora,
+    quindi non e' versionato, vedi .gitignore)
+
+Uso: python scripts/generate_delittips.py [--no-cache] [--jobs N] [--tassonomie JSON ...]
+
+Struttura: build_cubo() indicizza DF_1 una sola volta per (livello, REF_AREA,
+TYPE_CRIME, Anno) e unisce la popolazione una sola volta (con ITD12 gia'
+aggregato); build_dati() ne ricava con un solo prodotto sparso le categorie
+di tutte le tassonomie (CATEGORY_MAP, ALLARME_CODES e quelle passate con
+--tassonomie, vedi tassonomie.py); ogni generate_* legge solo la propria
+sezione. Con --jobs N i generatori girano in N processi che condividono i dati
+(vedi run_generators); a fine esecuzione viene riportato il tempo di ciascuno.
+
+Cache: il frame filtrato di delittips_1.csv e' salvato in data/cache/delittips/
+(Arrow IPC, colonnare) con chiave hash del CSV raw + FILTERS + codice di
+load_delittips. Finche' questi non cambiano, le esecuzioni successive non
+riparsano il CSV.
 """
 
+import argparse
+import hashlib
+import inspect
 import json
 import logging
+import multiprocessing
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import NamedTuple
 
+import numpy as np
 import pandas as pd
 
+from popolazione_interpolazione import FONTE_COL, complete_popolazione
+from popolazione_io import read_popolazione
+from raw_cache import cached_frame, sha256_file
+from tassonomie import (
+    CATEGORIA_COL,
+    TASSONOMIA_COL,
+    aggrega_tassonomie,
+    carica_tassonomie,
+    codici_non_mappati,
+)
+from territori import (
+    NUTS2_NAMES,
+    REGIONI_VIRTUALI,
+    REGIONI_VIRTUALI_NOMI,
+    TERRITORI,
+    aggrega_virtuali,
+)
+
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
 
@@ -36,6 +83,15 @@ FILTERS = {
     "DATA_TYPE": "CRIMEN",  # numeri assoluti
 }
 
+# Righe per blocco di lettura di delittips_1.csv (vedi load_delittips)
+DELITTIPS_CHUNK_ROWS = 500_000
+
+# Cache del frame filtrato (vedi load_delittips_cached)
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "delittips"
+
+# Completamento popolazione per anni mancanti: "lineare" o "geometrica"
+POP_METODO = "lineare"
+
 # Mapping codice SDMX -> etichetta reato
 CRIME_LABELS = {
     "ARSON": "Incendi", "ARTTHEF": "Furti opere d'arte", "ATTACK": "Attentati",
@@ -86,6 +142,13 @@ CATEGORY_MAP = {
     "ROADHOM": "Altro", "SMUGGL": "Altro", "UNINTHOM": "Altro", "USURY": "Altro",
 }
 
+# Shard per regione di reati_allarme_sociale_province.json (vedi write_shard_regioni)
+ALLARME_PROVINCE_SHARD_DIR = "reati_allarme_sociale_province"
+
+# Matrice province x reati x anni: uno shard JSON per provincia + indice
+PROVINCE_REATI_DIR = "delitti_province_reati"
+TOT_LABEL = "Totale delitti"
+
 # Reati allarme sociale
 ALLARME_CODES = {
     "INTENHOM": "Omicidi volontari consumati",
@@ -96,83 +159,161 @@ ALLARME_CODES = {
     "HOUSEROB": "Rapine in abitazione",
 }
 
-# Mapping NUTS2 -> nome regione
-NUTS2_NAMES = {
-    "ITC1": "Piemonte", "ITC2": "Valle d'Aosta / Vallée d'Aoste",
-    "ITC3": "Liguria", "ITC4": "Lombardia",
-    "ITD1": "Provincia Autonoma Bolzano / Bozen", "ITD2": "Provincia Autonoma Trento",
-    "ITD3": "Veneto", "ITD4": "Friuli-Venezia Giulia", "ITD5": "Emilia-Romagna",
-    "ITE1": "Toscana", "ITE2": "Umbria", "ITE3": "Marche", "ITE4": "Lazio",
-    "ITF1": "Abruzzo", "ITF2": "Molise", "ITF3": "Campania", "ITF4": "Puglia",
-    "ITF5": "Basilicata", "ITF6": "Calabria", "ITG1": "Sicilia", "ITG2": "Sardegna",
-}
+# Tassonomie calcolate a ogni esecuzione (vedi tassonomie.py); altre con --tassonomie
+TASSONOMIE = {"categorie": CATEGORY_MAP, "allarme": ALLARME_CODES}
 
-# Province con codici speciali
-PROVINCE_SPECIALI = {"IT108", "IT109", "IT110"}
 
-# Mapping provincia -> regione (derivato dal prefisso NUTS)
-PROVINCE_TO_REGIONE = {
-    "IT108": "Lombardia",  # Monza e della Brianza
-    "IT109": "Marche",     # Fermo
-    "IT110": "Puglia",     # Barletta-Andria-Trani
-}
+def load_delittips(project_root: Path, chunk_rows: int = DELITTIPS_CHUNK_ROWS) -> pd.DataFrame:
+    """Carica e filtra DF_1 (Italia + tutti i territori).
 
-
-def nuts3_to_regione(code: str) -> str:
-    """Deriva il nome regione dal codice NUTS3 della provincia."""
-    if code in PROVINCE_TO_REGIONE:
-        return PROVINCE_TO_REGIONE[code]
-    # Prefisso NUTS2: prime 4 lettere (es. ITC11 -> ITC1)
-    prefix = code[:4]
-    # Eccezione: ITC4x (ITC41-ITC4B) -> ITC4
-    if prefix in NUTS2_NAMES:
-        return NUTS2_NAMES[prefix]
-    # Casi come ITD10 -> ITD1
-    prefix3 = code[:3] + code[3]
-    if prefix3 in NUTS2_NAMES:
-        return NUTS2_NAMES[prefix3]
-    return "Sconosciuta"
-
-
-def load_delittips(project_root: Path) -> pd.DataFrame:
-    """Carica e filtra DF_1 (Italia + tutti i territori)."""
+    Il CSV SDMX viene letto a blocchi di chunk_rows righe, solo con le colonne
+    usate (output + FILTERS) e con tipi fissi: ogni blocco e' filtrato con una
+    sola maschera su tutti i FILTERS prima di essere tenuto, quindi la memoria
+    di picco dipende dal blocco e dalle righe filtrate, non dalla dimensione del file.
+    """
     filepath = project_root / "data" / "raw" / "delittips" / "delittips_1.csv"
-    df = pd.read_csv(filepath, sep=";", dtype={"REF_AREA": str}, low_memory=False)
-
-    for col, val in FILTERS.items():
-        df = df[df[col] == val]
-
-    df = df[["REF_AREA", "TYPE_CRIME", "TIME_PERIOD", "OBS_VALUE"]].copy()
+    out_cols = ["REF_AREA", "TYPE_CRIME", "TIME_PERIOD", "OBS_VALUE"]
+    dtypes = {col: str for col in [*out_cols, *FILTERS]}
+    dtypes["TIME_PERIOD"] = "int64"
+
+    parts = []
+    reader = pd.read_csv(filepath, sep=";", usecols=list(dtypes), dtype=dtypes, chunksize=chunk_rows)
+    for chunk in reader:
+        mask = np.logical_and.reduce([chunk[col] == str(val) for col, val in FILTERS.items()])
+        parts.append(chunk.loc[mask, out_cols])
+
+    if parts:
+        df = pd.concat(parts, ignore_index=True)
+    else:
+        # CSV senza righe dati: frame vuoto con le stesse colonne e tipi
+        df = pd.DataFrame({col: pd.Series(dtype=dtypes[col]) for col in out_cols})
     df = df.rename(columns={"TIME_PERIOD": "Anno", "OBS_VALUE": "Delitti"})
     df["Delitti"] = pd.to_numeric(df["Delitti"], errors="coerce").fillna(0).astype(int)
     return df
 
 
+def delittips_fingerprint(filepath: Path) -> str:
+    """Chiave della cache del frame filtrato: hash del CSV raw, FILTERS e codice del loader."""
+    loader_src = inspect.getsource(load_delittips).encode("utf-8")
+    return json.dumps({
+        "raw_sha256": sha256_file(filepath),
+        "filters": FILTERS,
+        "loader": hashlib.sha256(loader_src).hexdigest(),
+    }, sort_keys=True)
+
+
+def load_delittips_cached(project_root: Path, use_cache: bool = True) -> pd.DataFrame:
+    """load_delittips con cache colonnare del risultato (vedi raw_cache.cached_frame)."""
+    if not use_cache:
+        return load_delittips(project_root)
+    filepath = project_root / "data" / "raw" / "delittips" / "delittips_1.csv"
+    return cached_frame(
+        CACHE_DIR / "delittips_1.arrow",
+        delittips_fingerprint(filepath),
+        lambda: load_delittips(project_root),
+    )
+
+
 def load_popolazione(project_root: Path) -> pd.DataFrame:
-    """Carica CSV popolazione."""
-    filepath = project_root / "data" / "processed" / "popolazione_regioni_province.csv"
-    return pd.read_csv(filepath, dtype={"REF_AREA": str})
+    """Carica popolazione tipizzata (sidecar Arrow, fallback CSV)."""
+    return read_popolazione(project_root / "data" / "processed")
+
+
+CUBO_INDEX = ["livello", "REF_AREA", "TYPE_CRIME", "Anno"]
+
+
+def build_cubo(df: pd.DataFrame, pop: pd.DataFrame) -> pd.DataFrame:
+    """Indicizza DF_1 una sola volta e unisce la popolazione una sola volta.
+
+    Ogni riga di df e' assegnata al suo livello (italia, regione, provincia);
+    a livello regionale ITD1+ITD2 sono sostituite da ITD12 (REGIONI_VIRTUALI:
+    delitti e popolazione sommati, fonte popolazione piu' "debole"). Le righe
+    di territori non usati dagli output (ripartizioni, codici senza
+    popolazione provinciale) sono scartate.
+
+    Returns:
+        DataFrame indicizzato e ordinato per (livello, REF_AREA, TYPE_CRIME, Anno)
+        con colonne Delitti, Territorio, Popolazione e FONTE_COL: tutti gli
+        output si ricavano da sue sezioni (vedi sezione_cubo).
+    """
+    # Aggrega ITD1 + ITD2 -> ITD12 (Trentino-Alto Adige), per delitti e popolazione
+    df = aggrega_virtuali(df, REGIONI_VIRTUALI, by=["TYPE_CRIME", "Anno"], agg={"Delitti": "sum"})
+    pop_prov_codes = pop.loc[pop["livello"] == "provincia", "REF_AREA"].unique()
+    pop = aggrega_virtuali(
+        pop[["REF_AREA", "Anno", "Territorio", "Popolazione", FONTE_COL]],
+        REGIONI_VIRTUALI,
+        by=["Anno"],
+        # fonte piu' "debole" tra i componenti
+        agg={"Popolazione": "sum", FONTE_COL: "max"},
+        nomi=REGIONI_VIRTUALI_NOMI,
+    )
 
+    # Livello per codice, calcolato sui soli valori distinti di REF_AREA
+    codes = pd.Index(df["REF_AREA"].unique())
+    livelli = pd.Series(None, index=codes, dtype=object)
+    livelli[codes == "IT"] = "italia"
+    livelli[codes.isin([*NUTS2_NAMES, *REGIONI_VIRTUALI])] = "regione"
+    livelli[codes.isin(pop_prov_codes)] = "provincia"
+    livelli = livelli.dropna()
 
-def is_nuts2(code: str) -> bool:
-    """Verifica se un codice e' NUTS2 (regione)."""
-    return code in NUTS2_NAMES
+    delitti = df[df["REF_AREA"].isin(livelli.index)]
+    delitti = delitti.assign(livello=delitti["REF_AREA"].map(livelli).to_numpy())
 
+    cubo = delitti.merge(pop, on=["REF_AREA", "Anno"], how="left")
+    return cubo.set_index(CUBO_INDEX).sort_index()
 
-def is_nuts3(code: str) -> bool:
-    """Verifica se un codice e' NUTS3 (provincia)."""
-    if code in PROVINCE_SPECIALI:
-        return True
-    # NUTS3: 5+ caratteri alfanumerici (es. ITC11, ITE1A, ITC4B)
-    return len(code) >= 5 and code[:2] == "IT"
 
+def sezione_cubo(cubo: pd.DataFrame, livello: str, crimini=None) -> pd.DataFrame:
+    """Sezione del cubo per livello e TYPE_CRIME (codice o lista; None = tutti), con chiavi come colonne."""
+    part = cubo.loc[livello]
+    if crimini is not None:
+        crimini = [crimini] if isinstance(crimini, str) else list(crimini)
+        part = part[part.index.get_level_values("TYPE_CRIME").isin(crimini)]
+    return part.reset_index()
+
+
+class DatiDelitti(NamedTuple):
+    """Input condiviso dai generatori: cubo e aggregati per tassonomia."""
+
+    cubo: pd.DataFrame          # vedi build_cubo
+    tassonomie: pd.DataFrame    # indicizzato per (Tassonomia, livello), vedi build_dati
+
+
+def build_dati(
+    df: pd.DataFrame, pop: pd.DataFrame, tassonomie: dict[str, dict[str, str]] = TASSONOMIE,
+) -> DatiDelitti:
+    """Costruisce il cubo e, con un solo prodotto sparso, tutte le categorie di tutte le tassonomie.
+
+    Gli aggregati hanno una riga per (tassonomia, livello, REF_AREA, Anno,
+    categoria) con Territorio, Popolazione e FONTE_COL del territorio x anno.
+    """
+    cubo = build_cubo(df, pop)
+    aggregati = aggrega_tassonomie(
+        cubo.reset_index(), tassonomie,
+        keys=["livello", "REF_AREA", "Anno"], value_col="Delitti",
+        attrs=["Territorio", "Popolazione", FONTE_COL],
+    )
+    aggregati = aggregati.set_index([TASSONOMIA_COL, "livello"]).sort_index()
+    return DatiDelitti(cubo, aggregati)
+
+
+def sezione_tassonomia(dati: DatiDelitti, nome: str, livello: str) -> pd.DataFrame:
+    """Aggregati di una tassonomia a un livello: REF_AREA, Anno, Categoria, Delitti, ..."""
+    return dati.tassonomie.loc[(nome, livello)].reset_index(drop=True)
+
+
+def log_popolazione_stimata(result: pd.DataFrame) -> None:
+    """Segnala le righe il cui tasso usa popolazione interpolata/estrapolata."""
+    stimate = result[result[FONTE_COL].isin(["interpolata", "estrapolata"])]
+    if len(stimate) > 0:
+        per_fonte = stimate.groupby(FONTE_COL, observed=True)["Anno"].agg(["size", "min", "max"])
+        for fonte, row in per_fonte.iterrows():
+            log.info(f"  Popolazione {fonte}: {row['size']} righe (anni {row['min']}-{row['max']})")
 
-def generate_italia(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) -> None:
-    """Genera delitti_italia_normalizzato.csv."""
-    df_it = df[(df["REF_AREA"] == "IT") & (df["TYPE_CRIME"] == "TOT")].copy()
-    pop_it = pop[pop["livello"] == "italia"][["Anno", "Popolazione"]]
 
-    result = df_it.merge(pop_it, on="Anno", how="left")
+def generate_italia(dati: DatiDelitti, project_root: Path) -> None:
+    """Genera delitti_italia_normalizzato.csv."""
+    result = sezione_cubo(dati.cubo, "italia", "TOT")
     result["Tasso_per_1000"] = result["Delitti"] / result["Popolazione"] * 1000
     result = result[["Anno", "Delitti", "Popolazione", "Tasso_per_1000"]].sort_values("Anno")
 
@@ -181,35 +322,11 @@ def generate_italia(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) ->
     log.info(f"  {out.name}: {len(result)} righe, anni {result['Anno'].min()}-{result['Anno'].max()}")
 
 
-def generate_regioni(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) -> None:
+def generate_regioni(dati: DatiDelitti, project_root: Path) -> None:
     """Genera delitti_regioni_normalizzato.csv."""
-    region_codes = set(NUTS2_NAMES.keys())
-    df_reg = df[(df["REF_AREA"].isin(region_codes)) & (df["TYPE_CRIME"] == "TOT")].copy()
-
-    # Aggrega ITD1 + ITD2 -> ITD12 (Trentino-Alto Adige)
-    mask_trentino = df_reg["REF_AREA"].isin(["ITD1", "ITD2"])
-    df_trentino = (
-        df_reg[mask_trentino]
-        .groupby("Anno", as_index=False)["Delitti"]
-        .sum()
-    )
-    df_trentino["REF_AREA"] = "ITD12"
-    df_trentino["TYPE_CRIME"] = "TOT"
-    df_reg = pd.concat([df_reg[~mask_trentino], df_trentino], ignore_index=True)
-
-    # Popolazione: ITD12 = ITD1 + ITD2
-    pop_reg = pop[pop["livello"] == "regione"][["REF_AREA", "Anno", "Territorio", "Popolazione"]].copy()
-    pop_trentino = pop_reg[pop_reg["REF_AREA"].isin(["ITD1", "ITD2"])]
-    pop_trentino_agg = pop_trentino.groupby("Anno", as_index=False)["Popolazione"].sum()
-    pop_trentino_agg["REF_AREA"] = "ITD12"
-    pop_trentino_agg["Territorio"] = "Trentino-Alto Adige"
-    pop_reg = pd.concat([
-        pop_reg[~pop_reg["REF_AREA"].isin(["ITD1", "ITD2"])],
-        pop_trentino_agg,
-    ], ignore_index=True)
-
-    result = df_reg.merge(pop_reg[["REF_AREA", "Anno", "Territorio", "Popolazione"]], on=["REF_AREA", "Anno"], how="left")
+    result = sezione_cubo(dati.cubo, "regione", "TOT")
     result["Tasso_per_1000"] = (result["Delitti"] / result["Popolazione"] * 1000).round(2)
+    log_popolazione_stimata(result)
     result = result[["REF_AREA", "Territorio", "Anno", "Delitti", "Popolazione", "Tasso_per_1000"]]
     result = result.sort_values(["REF_AREA", "Anno"])
 
@@ -223,16 +340,12 @@ def generate_regioni(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) ->
         log.warning(result[result["Popolazione"].isna()][["REF_AREA", "Anno"]].to_string())
 
 
-def generate_province(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) -> None:
+def generate_province(dati: DatiDelitti, project_root: Path) -> None:
     """Genera delitti_province_normalizzato.csv."""
-    pop_prov = pop[pop["livello"] == "provincia"][["REF_AREA", "Territorio", "Anno", "Popolazione"]].copy()
-    prov_codes = set(pop_prov["REF_AREA"].unique())
-
-    df_prov = df[(df["REF_AREA"].isin(prov_codes)) & (df["TYPE_CRIME"] == "TOT")].copy()
-
-    result = df_prov.merge(pop_prov, on=["REF_AREA", "Anno"], how="left")
-    result["Regione"] = result["REF_AREA"].apply(nuts3_to_regione)
+    result = sezione_cubo(dati.cubo, "provincia", "TOT")
+    result["Regione"] = TERRITORI.nome_regione(result["REF_AREA"], default="Sconosciuta")
     result["Tasso_per_1000"] = (result["Delitti"] / result["Popolazione"] * 1000).round(2)
+    log_popolazione_stimata(result)
     result = result[["REF_AREA", "Territorio", "Anno", "Delitti", "Regione", "Popolazione", "Tasso_per_1000"]]
     result = result.sort_values(["REF_AREA", "Anno"])
 
@@ -245,20 +358,15 @@ def generate_province(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) -
         log.warning(f"  ATTENZIONE: {missing} righe senza popolazione!")
 
 
-def generate_categorie(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) -> None:
+def generate_categorie(dati: DatiDelitti, project_root: Path) -> None:
     """Genera delitti_categorie_normalizzato.csv."""
-    df_it = df[df["REF_AREA"] == "IT"].copy()
-    df_it = df_it[df_it["TYPE_CRIME"] != "TOT"]
-    df_it["Categoria"] = df_it["TYPE_CRIME"].map(CATEGORY_MAP)
-
     # Codici senza categoria
-    unmapped = df_it[df_it["Categoria"].isna()]["TYPE_CRIME"].unique()
+    reati = sezione_cubo(dati.cubo, "italia")["TYPE_CRIME"].unique()
+    unmapped = [code for code in codici_non_mappati(CATEGORY_MAP, reati) if code != "TOT"]
     if len(unmapped) > 0:
-        log.warning(f"  Codici senza categoria: {list(unmapped)}")
+        log.warning(f"  Codici senza categoria: {unmapped}")
 
-    df_cat = df_it.groupby(["Anno", "Categoria"], as_index=False)["Delitti"].sum()
-    pop_it = pop[pop["livello"] == "italia"][["Anno", "Popolazione"]]
-    result = df_cat.merge(pop_it, on="Anno", how="left")
+    result = sezione_tassonomia(dati, "categorie", "italia")
     result["Tasso_per_1000"] = result["Delitti"] / result["Popolazione"] * 1000
     result = result[["Anno", "Categoria", "Delitti", "Popolazione", "Tasso_per_1000"]]
     result = result.sort_values(["Anno", "Categoria"])
@@ -268,14 +376,9 @@ def generate_categorie(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path)
     log.info(f"  {out.name}: {len(result)} righe, categorie: {sorted(result['Categoria'].unique())}")
 
 
-def generate_allarme_sociale(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) -> None:
+def generate_allarme_sociale(dati: DatiDelitti, project_root: Path) -> None:
     """Genera reati_allarme_sociale.csv (Italia)."""
-    df_it = df[df["REF_AREA"] == "IT"].copy()
-    df_it = df_it[df_it["TYPE_CRIME"].isin(ALLARME_CODES)]
-    df_it["Reato"] = df_it["TYPE_CRIME"].map(ALLARME_CODES)
-
-    pop_it = pop[pop["livello"] == "italia"][["Anno", "Popolazione"]]
-    result = df_it.merge(pop_it, on="Anno", how="left")
+    result = sezione_tassonomia(dati, "allarme", "italia").rename(columns={CATEGORIA_COL: "Reato"})
     result["Tasso_per_100k"] = result["Delitti"] / result["Popolazione"] * 100_000
     result = result[["Anno", "Reato", "Delitti", "Popolazione", "Tasso_per_100k"]]
     result = result.sort_values(["Anno", "Reato"])
@@ -285,35 +388,9 @@ def generate_allarme_sociale(df: pd.DataFrame, pop: pd.DataFrame, project_root:
     log.info(f"  {out.name}: {len(result)} righe")
 
 
-def generate_allarme_regioni_json(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) -> None:
+def generate_allarme_regioni_json(dati: DatiDelitti, project_root: Path) -> None:
     """Genera reati_allarme_sociale_regioni.json."""
-    region_codes = set(NUTS2_NAMES.keys())
-    df_reg = df[df["REF_AREA"].isin(region_codes) & df["TYPE_CRIME"].isin(ALLARME_CODES)].copy()
-    df_reg["Reato"] = df_reg["TYPE_CRIME"].map(ALLARME_CODES)
-
-    # Aggrega ITD1 + ITD2 -> ITD12
-    mask_trentino = df_reg["REF_AREA"].isin(["ITD1", "ITD2"])
-    df_trentino = (
-        df_reg[mask_trentino]
-        .groupby(["Anno", "Reato"], as_index=False)["Delitti"]
-        .sum()
-    )
-    df_trentino["REF_AREA"] = "ITD12"
-    df_reg = pd.concat([df_reg[~mask_trentino], df_trentino], ignore_index=True)
-    df_reg = df_reg[["REF_AREA", "Anno", "Reato", "Delitti"]]
-
-    # Popolazione regionale (con ITD12 aggregato)
-    pop_reg = pop[pop["livello"] == "regione"][["REF_AREA", "Anno", "Territorio", "Popolazione"]].copy()
-    pop_trentino = pop_reg[pop_reg["REF_AREA"].isin(["ITD1", "ITD2"])]
-    pop_trentino_agg = pop_trentino.groupby("Anno", as_index=False)["Popolazione"].sum()
-    pop_trentino_agg["REF_AREA"] = "ITD12"
-    pop_trentino_agg["Territorio"] = "Trentino-Alto Adige"
-    pop_reg = pd.concat([
-        pop_reg[~pop_reg["REF_AREA"].isin(["ITD1", "ITD2"])],
-        pop_trentino_agg,
-    ], ignore_index=True)
-
-    result = df_reg.merge(pop_reg[["REF_AREA", "Anno", "Territorio", "Popolazione"]], on=["REF_AREA", "Anno"], how="left")
+    result = sezione_tassonomia(dati, "allarme", "regione").rename(columns={CATEGORIA_COL: "Reato"})
     result["Tasso_per_100k"] = ((result["Delitti"] / result["Popolazione"]) * 100_000).round(2)
     result = result.sort_values(["Reato", "Territorio", "Anno"])
     result = result[["REF_AREA", "Territorio", "Anno", "Reato", "Delitti", "Popolazione", "Tasso_per_100k"]]
@@ -328,20 +405,37 @@ def generate_allarme_regioni_json(df: pd.DataFrame, pop: pd.DataFrame, project_r
         log.warning(f"  ATTENZIONE: {missing} record senza popolazione!")
 
 
-def generate_allarme_province_json(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) -> None:
-    """Genera reati_allarme_sociale_province.json."""
-    pop_prov = pop[pop["livello"] == "provincia"][["REF_AREA", "Territorio", "Anno", "Popolazione"]].copy()
-    prov_codes = set(pop_prov["REF_AREA"].unique())
-
-    df_prov = df[df["REF_AREA"].isin(prov_codes) & df["TYPE_CRIME"].isin(ALLARME_CODES)].copy()
-    df_prov["Reato"] = df_prov["TYPE_CRIME"].map(ALLARME_CODES)
-    df_prov = df_prov[["REF_AREA", "Anno", "Reato", "Delitti"]]
+def write_shard_regioni(result: pd.DataFrame, out_dir: Path) -> None:
+    """Scrive uno shard JSON per regione con le righe delle sue province, piu' index.json.
+
+    Gli shard hanno lo stesso formato (e ordine di righe) del file unico, cosi'
+    il frontend scarica solo la regione che mostra. index.json elenca le
+    regioni: [{"REF_AREA": codice NUTS2, "Regione": nome, "file": "<codice>.json"}].
+    """
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+
+    codici = pd.Series(TERRITORI.regione(result["REF_AREA"]), index=result.index).fillna("ND")
+    index = []
+    for regione, part in result.groupby("Regione", sort=True):
+        codice = codici[part.index[0]]
+        records = part.to_dict(orient="records")
+        (out_dir / f"{codice}.json").write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+        index.append({"REF_AREA": codice, "Regione": regione, "file": f"{codice}.json"})
+    (out_dir / "index.json").write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+
+    sizes = [f.stat().st_size / 1024 for f in out_dir.iterdir() if f.name != "index.json"]
+    log.info(
+        f"  {out_dir.name}/: {len(index)} shard regionali "
+        f"(media {np.mean(sizes):.0f} KB, max {max(sizes):.0f} KB)"
+    )
 
-    # Aggiungi Regione
-    prov_regione = {code: nuts3_to_regione(code) for code in prov_codes}
-    pop_prov["Regione"] = pop_prov["REF_AREA"].map(prov_regione)
 
-    result = df_prov.merge(pop_prov, on=["REF_AREA", "Anno"], how="left")
+def generate_allarme_province_json(dati: DatiDelitti, project_root: Path) -> None:
+    """Genera reati_allarme_sociale_province.json."""
+    result = sezione_tassonomia(dati, "allarme", "provincia").rename(columns={CATEGORIA_COL: "Reato"})
+    result["Regione"] = TERRITORI.nome_regione(result["REF_AREA"], default="Sconosciuta")
     result["Tasso_per_100k"] = ((result["Delitti"] / result["Popolazione"]) * 100_000).round(2)
     result = result.sort_values(["Reato", "Regione", "Territorio", "Anno"])
     result = result[["REF_AREA", "Territorio", "Anno", "Reato", "Delitti", "Regione", "Popolazione", "Tasso_per_100k"]]
@@ -350,18 +444,17 @@ def generate_allarme_province_json(df: pd.DataFrame, pop: pd.DataFrame, project_
     records = result.to_dict(orient="records")
     out.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
     log.info(f"  {out.name}: {len(records)} record, {result['Territorio'].nunique()} province")
+    write_shard_regioni(result, out.parent / ALLARME_PROVINCE_SHARD_DIR)
 
     missing = result["Popolazione"].isna().sum()
     if missing > 0:
         log.warning(f"  ATTENZIONE: {missing} record senza popolazione!")
 
 
-def generate_percezione(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path) -> None:
+def generate_percezione(dati: DatiDelitti, project_root: Path) -> None:
     """Genera percezione_vs_dati.csv."""
     # Delitti Italia TOT
-    df_it = df[(df["REF_AREA"] == "IT") & (df["TYPE_CRIME"] == "TOT")].copy()
-    pop_it = pop[pop["livello"] == "italia"][["Anno", "Popolazione"]]
-    result = df_it.merge(pop_it, on="Anno", how="left")
+    result = sezione_cubo(dati.cubo, "italia", "TOT")
     result["Tasso_per_1000"] = result["Delitti"] / result["Popolazione"] * 1000
 
     # Percezione
@@ -379,28 +472,245 @@ def generate_percezione(df: pd.DataFrame, pop: pd.DataFrame, project_root: Path)
     log.info(f"  {out.name}: {len(result)} righe")
 
 
+class MatriceProvince(NamedTuple):
+    """Cubo denso province x reati x anni (NaN dove ISTAT non ha il dato)."""
+
+    province: np.ndarray      # (P,) codici NUTS3
+    territori: np.ndarray     # (P,) nomi provincia
+    reati: np.ndarray         # (C,) codici TYPE_CRIME
+    anni: np.ndarray          # (Y,)
+    delitti: np.ndarray       # (P, C, Y) float64
+    popolazione: np.ndarray   # (P, Y) float64
+
+    def tasso_per_100k(self) -> np.ndarray:
+        """Tasso per 100.000 abitanti, stessa forma di delitti."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.delitti / self.popolazione[:, None, :] * 100_000
+
+
+def build_matrice_province(cubo: pd.DataFrame) -> MatriceProvince:
+    """Riporta la sezione provinciale del cubo (tutti i reati) su array densi.
+
+    Province, reati e anni sono fattorizzati una volta (ordinati); i valori
+    sono scritti con un solo assegnamento per indici, senza pivot ne' cicli.
+    """
+    part = cubo.loc["provincia"]
+    p_idx, province = pd.factorize(part.index.get_level_values("REF_AREA"), sort=True)
+    c_idx, reati = pd.factorize(part.index.get_level_values("TYPE_CRIME"), sort=True)
+    y_idx, anni = pd.factorize(part.index.get_level_values("Anno"), sort=True)
+
+    delitti = np.full((len(province), len(reati), len(anni)), np.nan)
+    delitti[p_idx, c_idx, y_idx] = part["Delitti"].to_numpy(dtype=float)
+    popolazione = np.full((len(province), len(anni)), np.nan)
+    popolazione[p_idx, y_idx] = part["Popolazione"].to_numpy(dtype=float)
+
+    territori = np.empty(len(province), dtype=object)
+    territori[p_idx] = part["Territorio"].to_numpy(dtype=object)
+
+    return MatriceProvince(
+        province=np.asarray(province, dtype=object),
+        territori=territori,
+        reati=np.asarray(reati, dtype=object),
+        anni=np.asarray(anni, dtype=np.int64),
+        delitti=delitti,
+        popolazione=popolazione,
+    )
+
+
+def _json_array(values: np.ndarray, decimals: int | None = None) -> list:
+    """Array (anche 2D) -> liste JSON: NaN -> null, interi se decimals e' None."""
+    mask = np.isnan(values)
+    if decimals is None:
+        out = np.nan_to_num(values).astype(np.int64).astype(object)
+    else:
+        out = values.round(decimals).astype(object)
+    out[mask] = None
+    return out.tolist()
+
+
+def generate_province_reati_json(dati: DatiDelitti, project_root: Path) -> None:
+    """Genera delitti_province_reati/: matrice province x reati x anni, uno shard per provincia.
+
+    index.json elenca anni, reati (codice, etichetta) e province (codice, nome,
+    regione, file). Ogni shard <REF_AREA>.json e' colonnare: Popolazione per
+    anno e, per Delitti e Tasso_per_100k, una riga per reato (ordine di Reati)
+    con un valore per anno (ordine di Anni); null dove il dato manca.
+    """
+    matrice = build_matrice_province(dati.cubo)
+    tasso = matrice.tasso_per_100k()
+    regioni = TERRITORI.nome_regione(matrice.province, default="Sconosciuta")
+    anni = matrice.anni.tolist()
+    reati = matrice.reati.tolist()
+
+    out_dir = project_root / "public" / "data" / PROVINCE_REATI_DIR
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+
+    province = []
+    for i, code in enumerate(matrice.province):
+        shard = {
+            "REF_AREA": code,
+            "Territorio": matrice.territori[i],
+            "Regione": regioni[i],
+            "Anni": anni,
+            "Reati": reati,
+            "Popolazione": _json_array(matrice.popolazione[i]),
+            "Delitti": _json_array(matrice.delitti[i]),
+            "Tasso_per_100k": _json_array(tasso[i], decimals=2),
+        }
+        (out_dir / f"{code}.json").write_text(json.dumps(shard, ensure_ascii=False), encoding="utf-8")
+        province.append({
+            "REF_AREA": code, "Territorio": matrice.territori[i],
+            "Regione": regioni[i], "file": f"{code}.json",
+        })
+
+    index = {
+        "Anni": anni,
+        "Reati": [{"codice": c, "Reato": CRIME_LABELS.get(c, TOT_LABEL if c == "TOT" else c)} for c in reati],
+        "Province": province,
+    }
+    (out_dir / "index.json").write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+
+    size_kb = sum(f.stat().st_size for f in out_dir.iterdir()) / 1024
+    log.info(
+        f"  {PROVINCE_REATI_DIR}/: {len(province)} province x {len(reati)} reati x {len(anni)} anni "
+        f"({size_kb:.0f} KB, {size_kb / max(len(province), 1):.1f} KB per provincia)"
+    )
+    missing = np.isnan(matrice.popolazione).sum()
+    if missing > 0:
+        log.warning(f"  ATTENZIONE: {missing} provincia x anno senza popolazione!")
+
+
+def generate_tassonomie(dati: DatiDelitti, project_root: Path) -> None:
+    """Genera delitti_tassonomie.csv: le tassonomie aggiuntive (--tassonomie), a ogni livello."""
+    nomi = [n for n in dati.tassonomie.index.unique(TASSONOMIA_COL) if n not in TASSONOMIE]
+    if not nomi:
+        return
+
+    result = dati.tassonomie.loc[nomi].reset_index()
+    result["Tasso_per_100k"] = (result["Delitti"] / result["Popolazione"] * 100_000).round(2)
+    result = result[[
+        TASSONOMIA_COL, "livello", "REF_AREA", "Territorio", "Anno", CATEGORIA_COL,
+        "Delitti", "Popolazione", "Tasso_per_100k",
+    ]]
+    result = result.sort_values([TASSONOMIA_COL, "livello", "REF_AREA", "Anno", CATEGORIA_COL])
+
+    out = project_root / "data" / "processed" / "delitti_tassonomie.csv"
+    result.to_csv(out, index=False)
+    per_tassonomia = result.groupby(TASSONOMIA_COL)[CATEGORIA_COL].nunique().to_dict()
+    log.info(f"  {out.name}: {len(result)} righe, categorie per tassonomia: {per_tassonomia}")
+
+
+# Generatori degli output: indipendenti tra loro una volta costruito il cubo
+GENERATORS = (
+    generate_italia,
+    generate_regioni,
+    generate_province,
+    generate_categorie,
+    generate_allarme_sociale,
+    generate_percezione,
+    generate_allarme_regioni_json,
+    generate_allarme_province_json,
+    generate_province_reati_json,
+    generate_tassonomie,
+)
+
+# Dati condivisi con i worker di run_generators (in sola lettura)
+_DATI: DatiDelitti | None = None
+
+
+def _run_generator(func, project_root: Path) -> float:
+    """Esegue un generatore sui dati condivisi e ritorna il tempo impiegato (s)."""
+    start = time.perf_counter()
+    func(_DATI, project_root)
+    return time.perf_counter() - start
+
+
+def run_generators(dati: DatiDelitti, project_root: Path, jobs: int = 1) -> dict[str, float]:
+    """Esegue tutti i GENERATORS, in parallelo se jobs > 1.
+
+    I dati non vengono serializzati per ogni task: sono pubblicati in _DATI
+    prima di avviare il pool e i processi figli li ereditano con fork
+    (copy-on-write, i generatori non li modificano). Dove fork non esiste
+    (Windows, ...) si usano thread sugli stessi frame.
+
+    Returns:
+        {nome generatore: secondi}, nell'ordine di GENERATORS.
+    """
+    global _DATI
+    _DATI = dati
+    try:
+        if jobs > 1:
+            if "fork" in multiprocessing.get_all_start_methods():
+                executor = ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("fork"))
+            else:
+                executor = ThreadPoolExecutor(jobs)
+            with executor:
+                futures = [executor.submit(_run_generator, func, project_root) for func in GENERATORS]
+                seconds = [f.result() for f in futures]
+        else:
+            seconds = [_run_generator(func, project_root) for func in GENERATORS]
+    finally:
+        _DATI = None
+    return {func.__name__: s for func, s in zip(GENERATORS, seconds)}
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Genera CSV/JSON dei delitti da SDMX raw + popolazione")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignora la cache del CSV delittips filtrato e lo riparsa",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Generatori eseguiti in parallelo (default: 1, seriale)",
+    )
+    parser.add_argument(
+        "--tassonomie",
+        type=Path,
+        nargs="+",
+        metavar="JSON",
+        help="File JSON di tassonomie aggiuntive {nome: {codice: categoria}} -> delitti_tassonomie.csv",
+    )
+    args = parser.parse_args()
+
     project_root = Path(__file__).resolve().parent.parent
 
     log.info("Caricamento dati...")
-    df = load_delittips(project_root)
+    df = load_delittips_cached(project_root, use_cache=not args.no_cache)
     log.info(f"  DF_1 filtrato: {len(df)} righe, anni {df['Anno'].min()}-{df['Anno'].max()}")
 
     pop = load_popolazione(project_root)
     log.info(f"  Popolazione: {len(pop)} righe")
-
-    log.info("\nGenerazione CSV...")
-    generate_italia(df, pop, project_root)
-    generate_regioni(df, pop, project_root)
-    generate_province(df, pop, project_root)
-    generate_categorie(df, pop, project_root)
-    generate_allarme_sociale(df, pop, project_root)
-    generate_percezione(df, pop, project_root)
-
-    log.info("\nGenerazione JSON allarme sociale...")
-    generate_allarme_regioni_json(df, pop, project_root)
-    generate_allarme_province_json(df, pop, project_root)
-
+    pop = complete_popolazione(pop, years=df["Anno"].unique(), metodo=POP_METODO)
+    stimate = pop[FONTE_COL].value_counts().drop("osservata")
+    stimate = stimate[stimate > 0]
+    if len(stimate) > 0:
+        log.info(f"  Popolazione completata ({POP_METODO}): {stimate.to_dict()}")
+
+    tassonomie = dict(TASSONOMIE)
+    if args.tassonomie:
+        extra = carica_tassonomie(args.tassonomie)
+        doppie = sorted(set(extra) & set(tassonomie))
+        if doppie:
+            parser.error(f"tassonomie gia' predefinite: {doppie}")
+        tassonomie.update(extra)
+        log.info(f"  Tassonomie aggiuntive: {sorted(extra)}")
+
+    dati = build_dati(df, pop, tassonomie)
+    log.info(f"  Cubo (livello, REF_AREA, TYPE_CRIME, Anno): {len(dati.cubo)} righe")
+    log.info(f"  Aggregati per tassonomia: {len(dati.tassonomie)} righe ({len(tassonomie)} tassonomie)")
+
+    log.info(f"\nGenerazione CSV/JSON ({args.jobs} processi)...")
+    start = time.perf_counter()
+    tempi = run_generators(dati, project_root, jobs=args.jobs)
+    log.info(f"\nTempi per generatore (totale {time.perf_counter() - start:.2f}s):")
+    for name, seconds in tempi.items():
+        log.info(f"  {name:<32} {seconds:6.2f}s")
     log.info("\nCompletato.")
 
 
@@ -19,6 +19,9 @@ import pymannkendall as mk
 from scipy import stats
 from statsmodels.stats.multitest import multipletests
 
+from popolazione_io import read_popolazione
+from territori import TRENTINO_PARTS, aggrega_virtuali
+
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 log = logging.getLogger(__name__)
 
@@ -219,18 +222,12 @@ def load_all_data() -> dict[str, pd.DataFrame]:
     )
 
     # Popolazione regionale per media pesata nei confronti territoriali
-    pop_path = PROJECT_ROOT / "data" / "processed" / "popolazione_regioni_province.csv"
-    pop = pd.read_csv(pop_path)
+    pop = read_popolazione(PROJECT_ROOT / "data" / "processed")
     pop_reg = pop[pop["livello"] == "regione"][["REF_AREA", "Anno", "Popolazione"]].copy()
     # Unifica ITD1+ITD2 (Trentino-Alto Adige) per coerenza con autori_vittime_regioni
-    trento_bolzano = pop_reg[pop_reg["REF_AREA"].isin(["ITD1", "ITD2"])]
-    if len(trento_bolzano) > 0:
-        merged = trento_bolzano.groupby("Anno")["Popolazione"].sum().reset_index()
-        merged["REF_AREA"] = "ITD1+ITD2"
-        pop_reg = pd.concat([
-            pop_reg[~pop_reg["REF_AREA"].isin(["ITD1", "ITD2"])],
-            merged,
-        ], ignore_index=True)
+    pop_reg = aggrega_virtuali(
+        pop_reg, {"ITD1+ITD2": TRENTINO_PARTS}, by=["Anno"], agg={"Popolazione": "sum"},
+    )
     datasets["popolazione_regioni"] = pop_reg
 
     for name, df in datasets.items():
@@ -6,9 +6,30 @@ Input:
   - data/raw/popolazione/PopolazioneEta-SingolaArea-Province/*.csv (intercensuaria, 107 file)
   - data/raw/popolazione/popres1.csv (DCIS_POPRES1 via SDMX)
 
+  Per i file intercensuaria, se esiste l'archivio .zip omonimo i CSV vengono letti
+  direttamente dall'archivio (decompressione in streaming, nessun file temporaneo):
+  le copie estratte sono opzionali.
+
+  - data/raw/popolazione/POSAS_<anno>_it_Ripartizioni.csv (solo per --cubo)
+  - data/raw/popolazione/popres1_comuni.csv o .zip (DCIS_POPRES1 comunale, solo per --comuni)
+
 Output:
   - data/processed/popolazione_regioni_province.csv
     Colonne: REF_AREA,Territorio,Anno,Popolazione,livello
+  - data/processed/popolazione_regioni_province.arrow
+    Stesse colonne tipizzate (Arrow IPC), letto da popolazione_io.read_popolazione
+  - data/processed/popolazione_eta_sesso.parquet (opzionale, --cubo; richiede pyarrow)
+    Colonne: livello,REF_AREA,Anno,SEX,ETA,Popolazione
+    Cubo area x anno x sesso (1=M, 2=F) x classe di eta' (AGE_BANDS), tipi interi
+  - data/processed/popolazione_comuni/Anno=<anno>/*.parquet (opzionale, --comuni; richiede pyarrow)
+    Colonne: PRO_COM,NUTS3,Popolazione. Letto a blocchi e verificato contro i
+    totali provincia/regione/italia del CSV principale (vedi popolazione_comuni.py)
+
+Uso: python scripts/generate_popolazione.py [--workers N] [--cubo] [--comuni] [--no-cache]
+
+Cache: il risultato del parsing di ogni file sorgente e' salvato in data/cache/popolazione/
+con il fingerprint del file (manifest.json). Alle esecuzioni successive vengono riletti
+solo i file cambiati; l'unione finale e' sempre ricalcolata.
 
 Logica:
   - Intercensuaria per 2014-2018 (colonne anno nei CSV pivot)
@@ -17,40 +38,62 @@ Logica:
   - ITD1/ITD2 duplicati come regioni (stessi valori di ITD10/ITD20)
 """
 
+import argparse
+import hashlib
+import io
 import logging
-from pathlib import Path
-
+import zipfile
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+from pathlib import Path, PurePosixPath
+from typing import NamedTuple, TextIO
+
+import numpy as np
 import pandas as pd
 
+from popolazione_comuni import COMUNI_DIR, confronta_aggregati, ingest_popres1_comuni
+from popolazione_io import write_popolazione_sidecar
+from raw_cache import SourceCache, cached, sha256_file
+from territori import NUTS1_NAMES, NUTS2_NAMES, NUTS3_DISPLAY_NAMES, TERRITORI
+
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
 
 YEARS_INTERCENSUARIA = list(range(2002, 2019))  # 2002-2018
 
-# Mapping NUTS2 -> nome regione (come nel CSV attuale)
-NUTS2_NAMES = {
-    "ITC1": "Piemonte",
-    "ITC2": "Valle d'Aosta / Vallée d'Aoste",
-    "ITC3": "Liguria",
-    "ITC4": "Lombardia",
-    "ITD1": "Provincia Autonoma Bolzano / Bozen",
-    "ITD2": "Provincia Autonoma Trento",
-    "ITD3": "Veneto",
-    "ITD4": "Friuli-Venezia Giulia",
-    "ITD5": "Emilia-Romagna",
-    "ITE1": "Toscana",
-    "ITE2": "Umbria",
-    "ITE3": "Marche",
-    "ITE4": "Lazio",
-    "ITF1": "Abruzzo",
-    "ITF2": "Molise",
-    "ITF3": "Campania",
-    "ITF4": "Puglia",
-    "ITF5": "Basilicata",
-    "ITF6": "Calabria",
-    "ITG1": "Sicilia",
-    "ITG2": "Sardegna",
-}
+# Cache dei risultati di parsing per file sorgente (vedi raw_cache.py)
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "popolazione"
+
+# Moduli da cui dipendono i frame in cache (parsing, nomi e gerarchia NUTS):
+# il salt della cache e' l'hash combinato dei loro sorgenti (vedi cache_salt)
+CACHE_SALT_MODULES = (
+    "generate_popolazione.py",
+    "territori.py",
+    "raw_cache.py",
+    "popolazione_interpolazione.py",
+    "popolazione_io.py",
+    "popolazione_comuni.py",
+)
+
+# Cubo eta' x sesso: i file intercensuaria arrivano al 2019 (uguale a DCIS_POPRES1),
+# i file POSAS coprono gli anni successivi
+YEARS_CUBO_INTERCENSUARIA = list(range(2002, 2020))  # 2002-2019
+
+# Classi di eta' del cubo: (etichetta, eta' minima). Ogni classe arriva fino alla
+# minima della successiva - 1; l'ultima e' aperta. Y_UN14 + Y14-17 = minorenni.
+AGE_BANDS = [
+    ("Y_UN14", 0), ("Y14-17", 14), ("Y18-24", 18), ("Y25-34", 25),
+    ("Y35-44", 35), ("Y45-54", 45), ("Y55-64", 55), ("Y_GE65", 65),
+]
+
+# Codici sesso SDMX (come in DCCV_AUTVITTPS). Il totale (9) non e' salvato: e' 1 + 2
+SEX_CODES = {"Maschi": 1, "Femmine": 2}
+
+# Ripartizioni NUTS1: nome nei blocchi intercensuaria e codice nei file POSAS
+RIPARTIZIONI_NUTS1 = {nome: code for code, nome in NUTS1_NAMES.items()}
+POSAS_RIPARTIZIONE_TO_NUTS1 = {1: "ITC", 2: "ITD", 3: "ITE", 4: "ITF", 5: "ITG"}
 
 # Ordine regioni nel file intercensuaria (stesso ordine dei blocchi "Tutte le cittadinanze")
 REGIONI_ORDER = [
@@ -107,112 +150,167 @@ PROVINCE_FILE_TO_NUTS3 = {
     "Barletta-Andria-Trani": "IT110", "Sud_Sardegna": "IT111",
 }
 
-# Nomi territori per il CSV output (coerenti col CSV attuale)
-NUTS3_DISPLAY_NAMES = {
-    "ITC11": "Torino", "ITC12": "Vercelli", "ITC13": "Biella",
-    "ITC14": "Verbano-Cusio-Ossola", "ITC15": "Novara", "ITC16": "Cuneo",
-    "ITC17": "Asti", "ITC18": "Alessandria",
-    "ITC20": "Valle d'Aosta / Vallée d'Aoste",
-    "ITC41": "Varese", "ITC42": "Como", "ITC43": "Lecco", "ITC44": "Sondrio",
-    "ITC45": "Milano", "ITC46": "Bergamo", "ITC47": "Brescia",
-    "ITC48": "Pavia", "ITC49": "Lodi", "ITC4A": "Cremona", "ITC4B": "Mantova",
-    "ITC31": "Imperia", "ITC32": "Savona", "ITC33": "Genova", "ITC34": "La Spezia",
-    "ITD10": "Bolzano / Bozen", "ITD20": "Trento",
-    "ITD31": "Verona", "ITD32": "Vicenza", "ITD33": "Belluno",
-    "ITD34": "Treviso", "ITD35": "Venezia", "ITD36": "Padova", "ITD37": "Rovigo",
-    "ITD41": "Pordenone", "ITD42": "Udine", "ITD43": "Gorizia", "ITD44": "Trieste",
-    "ITD51": "Piacenza", "ITD52": "Parma", "ITD53": "Reggio nell'Emilia",
-    "ITD54": "Modena", "ITD55": "Bologna", "ITD56": "Ferrara",
-    "ITD57": "Ravenna", "ITD58": "Forlì-Cesena", "ITD59": "Rimini",
-    "ITE11": "Massa-Carrara", "ITE12": "Lucca", "ITE13": "Pistoia",
-    "ITE14": "Firenze", "ITE15": "Prato", "ITE16": "Livorno",
-    "ITE17": "Pisa", "ITE18": "Arezzo", "ITE19": "Siena", "ITE1A": "Grosseto",
-    "ITE21": "Perugia", "ITE22": "Terni",
-    "ITE31": "Pesaro e Urbino", "ITE32": "Ancona", "ITE33": "Macerata",
-    "ITE34": "Ascoli Piceno",
-    "ITE41": "Viterbo", "ITE42": "Rieti", "ITE43": "Roma",
-    "ITE44": "Latina", "ITE45": "Frosinone",
-    "ITF11": "L'Aquila", "ITF12": "Teramo", "ITF13": "Pescara", "ITF14": "Chieti",
-    "ITF21": "Isernia", "ITF22": "Campobasso",
-    "ITF31": "Caserta", "ITF32": "Benevento", "ITF33": "Napoli",
-    "ITF34": "Avellino", "ITF35": "Salerno",
-    "ITF41": "Foggia", "ITF42": "Bari", "ITF43": "Taranto",
-    "ITF44": "Brindisi", "ITF45": "Lecce",
-    "ITF51": "Potenza", "ITF52": "Matera",
-    "ITF61": "Cosenza", "ITF62": "Crotone", "ITF63": "Catanzaro",
-    "ITF64": "Vibo Valentia", "ITF65": "Reggio di Calabria",
-    "ITG11": "Trapani", "ITG12": "Palermo", "ITG13": "Messina",
-    "ITG14": "Agrigento", "ITG15": "Caltanissetta", "ITG16": "Enna",
-    "ITG17": "Catania", "ITG18": "Ragusa", "ITG19": "Siracusa",
-    "ITG25": "Sassari", "ITG26": "Nuoro", "ITG27": "Cagliari",
-    "ITG28": "Oristano",
-    "IT108": "Monza e della Brianza", "IT109": "Fermo",
-    "IT110": "Barletta-Andria-Trani", "IT111": "Sud Sardegna",
+# Mapping nome regione (blocchi intercensuaria) -> codice NUTS2
+# I blocchi sono nell'ordine del file, il match e' per nome
+REGIONE_NOME_TO_NUTS2 = {
+    "Piemonte": "ITC1",
+    "Valle D'Aosta": "ITC2", "Valle d'Aosta": "ITC2",
+    "Lombardia": "ITC4",
+    "Liguria": "ITC3",
+    "Trentino-Alto Adige": None,  # skip, usiamo Bolzano + Trento
+    "Bolzano": "ITD1", "Provincia Autonoma Bolzano": "ITD1",
+    "Trento": "ITD2", "Provincia Autonoma Trento": "ITD2",
+    "Veneto": "ITD3",
+    "Friuli-Venezia Giulia": "ITD4",
+    "Emilia-Romagna": "ITD5",
+    "Toscana": "ITE1",
+    "Umbria": "ITE2",
+    "Marche": "ITE3",
+    "Lazio": "ITE4",
+    "Abruzzo": "ITF1",
+    "Molise": "ITF2",
+    "Campania": "ITF3",
+    "Puglia": "ITF4",
+    "Basilicata": "ITF5",
+    "Calabria": "ITF6",
+    "Sicilia": "ITG1",
+    "Sardegna": "ITG2",
 }
 
 
-def parse_intercensuaria_blocks(filepath: Path, years: list[int]) -> list[dict]:
-    """Estrae la popolazione totale per anno dai blocchi intercensuaria.
+class ZipMember(NamedTuple):
+    """File CSV dentro un archivio .zip, letto in streaming senza estrazione."""
 
-    Ogni blocco inizia con "Tutte le cittadinanze - ..." e ha una riga "Totale"
-    con i valori per anno. Prende solo il primo "Totale" per blocco.
+    archive: Path
+    member: str
 
-    Returns:
-        Lista di dict con chiavi: nome_blocco, {anno: popolazione}
-    """
-    results = []
-    year_cols = [str(y) for y in years]
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.member).name
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+    @property
+    def stem(self) -> str:
+        return PurePosixPath(self.member).stem
 
-    header_indices = []  # indici colonna per gli anni richiesti
-    current_block_name = None
-    found_totale = False
 
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
+RawSource = Path | ZipMember
 
-        # Blocco "Tutte le cittadinanze"
-        if line.startswith('"Tutte le cittadinanze'):
-            current_block_name = line.strip('"')
-            found_totale = False
-            continue
 
-        # Header con anni
-        if line.startswith("Età/Anno;"):
-            cols = line.split(";")
-            header_indices = []
-            for yc in year_cols:
-                if yc in cols:
-                    header_indices.append(cols.index(yc))
-                else:
-                    header_indices.append(-1)
-            continue
+def resolve_raw_file(raw_dir: Path, stem: str) -> RawSource:
+    """Risolve un file raw: preferisce l'archivio <stem>.zip, fallback su <stem>.csv estratto."""
+    archive = raw_dir / f"{stem}.zip"
+    if archive.exists():
+        return ZipMember(archive, f"{stem}.csv")
+    return raw_dir / f"{stem}.csv"
+
 
-        # Prima riga "Totale" del blocco
-        if line.startswith("Totale;") and current_block_name and not found_totale:
-            found_totale = True
-            parts = line.split(";")
-            row = {"nome_blocco": current_block_name}
-            for yc, idx in zip(year_cols, header_indices):
-                if idx >= 0 and idx < len(parts):
-                    row[int(yc)] = int(parts[idx])
-            results.append(row)
+def list_raw_files(raw_dir: Path, stem: str) -> list[RawSource]:
+    """Elenca i CSV di una cartella raw, o dei membri di <stem>.zip se presente (ordinati per nome)."""
+    archive = raw_dir / f"{stem}.zip"
+    if archive.exists():
+        with zipfile.ZipFile(archive) as zf:
+            members = [m for m in zf.namelist() if m.endswith(".csv")]
+        return [ZipMember(archive, m) for m in sorted(members)]
+    return sorted((raw_dir / stem).glob("*.csv"))
 
-    return results
+
+@contextmanager
+def open_raw_text(source: RawSource) -> Iterator[TextIO]:
+    """Apre un file raw in lettura testo; i membri zip sono decompressi in streaming."""
+    if isinstance(source, ZipMember):
+        with zipfile.ZipFile(source.archive) as zf, zf.open(source.member) as raw:
+            yield io.TextIOWrapper(raw, encoding="utf-8")
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            yield f
+
+
+def cache_salt(scripts_dir: Path = Path(__file__).resolve().parent) -> str:
+    """Hash combinato dei sorgenti in CACHE_SALT_MODULES: modificarne uno invalida la cache."""
+    h = hashlib.sha256()
+    for name in CACHE_SALT_MODULES:
+        h.update(f"{name}:{sha256_file(scripts_dir / name)}\n".encode())
+    return h.hexdigest()
+
+
+def source_fingerprint(source: RawSource) -> str:
+    """Fingerprint del contenuto di un file raw.
+
+    Per i membri zip usa CRC32 + dimensione dalla directory dell'archivio,
+    senza decomprimere; per i file estratti l'hash SHA-256.
+    """
+    if isinstance(source, ZipMember):
+        with zipfile.ZipFile(source.archive) as zf:
+            info = zf.getinfo(source.member)
+        return f"crc32:{info.CRC:08x}:{info.file_size}"
+    return f"sha256:{sha256_file(source)}"
+
+
+def iter_intercensuaria_blocks(filepath: RawSource, years: list[int]) -> Iterator[dict]:
+    """Legge in streaming i blocchi intercensuaria, restituendo il totale per anno.
+
+    Ogni blocco inizia con "Tutte le cittadinanze - ..." e ha una riga "Totale"
+    con i valori per anno. Prende solo il primo "Totale" per blocco: le righe
+    successive (eta', maschi/femmine, cittadinanza) vengono saltate fino al
+    blocco seguente. L'header con gli anni e' identico in tutto il file, quindi
+    la mappa anno -> indice colonna viene calcolata una sola volta.
+
+    Essendo un generatore, il file viene letto solo fino all'ultimo blocco
+    richiesto dal chiamante (es. province: basta il primo).
+
+    Yields:
+        Dict con chiavi: nome_blocco, {anno: popolazione}
+    """
+    year_cols = [str(y) for y in years]
+    header_indices = None  # indici colonna per gli anni richiesti
+    current_block_name = None
+    found_totale = True  # nessun blocco aperto finche' non si incontra il primo
+
+    with open_raw_text(filepath) as f:
+        for line in f:
+            # Blocco "Tutte le cittadinanze"
+            if line.startswith('"Tutte le cittadinanze'):
+                current_block_name = line.strip().strip('"')
+                found_totale = False
+                continue
+
+            # Totale del blocco gia' estratto: salta fino al prossimo blocco
+            if found_totale:
+                continue
+
+            # Header con anni (solo il primo del file)
+            if header_indices is None and line.startswith("Età/Anno;"):
+                cols = line.strip().split(";")
+                header_indices = [cols.index(yc) if yc in cols else -1 for yc in year_cols]
+                continue
+
+            # Prima riga "Totale" del blocco
+            if line.startswith("Totale;") and header_indices is not None:
+                found_totale = True
+                parts = line.strip().split(";")
+                row = {"nome_blocco": current_block_name}
+                for yc, idx in zip(year_cols, header_indices):
+                    if 0 <= idx < len(parts):
+                        row[int(yc)] = int(parts[idx])
+                yield row
+
+
+def parse_intercensuaria_blocks(filepath: RawSource, years: list[int]) -> list[dict]:
+    """Estrae la popolazione totale per anno da tutti i blocchi intercensuaria.
+
+    Returns:
+        Lista di dict con chiavi: nome_blocco, {anno: popolazione}
+    """
+    return list(iter_intercensuaria_blocks(filepath, years))
 
 
 def load_intercensuaria_italia(raw_dir: Path, years: list[int]) -> list[dict]:
     """Carica popolazione Italia dall'intercensuaria."""
-    filepath = raw_dir / "PopolazioneEta-SingolaArea-Italia-Ripartizioni.csv"
-    blocks = parse_intercensuaria_blocks(filepath, years)
+    filepath = resolve_raw_file(raw_dir, "PopolazioneEta-SingolaArea-Italia-Ripartizioni")
 
-    # Il primo blocco e' "Tutte le cittadinanze - Italia"
+    # Il primo blocco e' "Tutte le cittadinanze - Italia": il break interrompe la lettura
     rows = []
-    for block in blocks:
+    for block in iter_intercensuaria_blocks(filepath, years):
         if "Italia" in block["nome_blocco"]:
             for year in years:
                 if year in block:
@@ -227,38 +325,19 @@ def load_intercensuaria_italia(raw_dir: Path, years: list[int]) -> list[dict]:
     return rows
 
 
+def regione_to_nuts2(regione_name: str) -> str | None:
+    """Cerca il codice NUTS2 di una regione intercensuaria (None se non mappata o da saltare)."""
+    for key, code in REGIONE_NOME_TO_NUTS2.items():
+        if key.lower() in regione_name.lower():
+            return code
+    return None
+
+
 def load_intercensuaria_regioni(raw_dir: Path, years: list[int]) -> list[dict]:
     """Carica popolazione regioni dall'intercensuaria."""
-    filepath = raw_dir / "PopolazioneEta-SingolaArea-Regioni.csv"
+    filepath = resolve_raw_file(raw_dir, "PopolazioneEta-SingolaArea-Regioni")
     blocks = parse_intercensuaria_blocks(filepath, years)
 
-    # Mapping nome blocco -> codice NUTS2
-    # I blocchi sono nell'ordine del file, devo matchare per nome
-    nome_to_nuts2 = {
-        "Piemonte": "ITC1",
-        "Valle D'Aosta": "ITC2", "Valle d'Aosta": "ITC2",
-        "Lombardia": "ITC4",
-        "Liguria": "ITC3",
-        "Trentino-Alto Adige": None,  # skip, usiamo Bolzano + Trento
-        "Bolzano": "ITD1", "Provincia Autonoma Bolzano": "ITD1",
-        "Trento": "ITD2", "Provincia Autonoma Trento": "ITD2",
-        "Veneto": "ITD3",
-        "Friuli-Venezia Giulia": "ITD4",
-        "Emilia-Romagna": "ITD5",
-        "Toscana": "ITE1",
-        "Umbria": "ITE2",
-        "Marche": "ITE3",
-        "Lazio": "ITE4",
-        "Abruzzo": "ITF1",
-        "Molise": "ITF2",
-        "Campania": "ITF3",
-        "Puglia": "ITF4",
-        "Basilicata": "ITF5",
-        "Calabria": "ITF6",
-        "Sicilia": "ITG1",
-        "Sardegna": "ITG2",
-    }
-
     rows = []
     for block in blocks:
         nome = block["nome_blocco"]
@@ -268,13 +347,7 @@ def load_intercensuaria_regioni(raw_dir: Path, years: list[int]) -> list[dict]:
         else:
             continue
 
-        # Cerca il codice NUTS2
-        nuts2 = None
-        for key, code in nome_to_nuts2.items():
-            if key.lower() in regione_name.lower():
-                nuts2 = code
-                break
-
+        nuts2 = regione_to_nuts2(regione_name)
         if nuts2 is None:
             log.warning(f"Regione non mappata: {regione_name}")
             continue
@@ -293,37 +366,82 @@ def load_intercensuaria_regioni(raw_dir: Path, years: list[int]) -> list[dict]:
     return rows
 
 
-def load_intercensuaria_province(raw_dir: Path, years: list[int]) -> list[dict]:
-    """Carica popolazione province dall'intercensuaria (107 file singoli)."""
-    prov_dir = raw_dir / "PopolazioneEta-SingolaArea-Province"
-    rows = []
+def parse_provincia_file(filepath: RawSource, years: list[int]) -> list[dict]:
+    """Estrae le righe popolazione di un singolo file provincia intercensuaria."""
+    # Estrai nome provincia dal filename
+    fname = filepath.stem.replace("PopolazioneEta-SingolaArea-Provincia_", "")
+    nuts3 = PROVINCE_FILE_TO_NUTS3.get(fname)
+    if nuts3 is None:
+        log.warning(f"Provincia non mappata: {fname}")
+        return []
+
+    # Primo blocco = tutte le cittadinanze: il resto del file non viene letto
+    block = next(iter_intercensuaria_blocks(filepath, years), None)
+    if block is None:
+        log.warning(f"Nessun blocco trovato in {filepath.name}")
+        return []
+
+    display_name = NUTS3_DISPLAY_NAMES.get(nuts3, fname.replace("_", " "))
+    return [
+        {
+            "REF_AREA": nuts3,
+            "Territorio": display_name,
+            "Anno": year,
+            "Popolazione": block[year],
+            "livello": "provincia",
+        }
+        for year in years
+        if year in block
+    ]
+
+
+def map_files(func, files: list[RawSource], years: list[int], workers: int = 1) -> list:
+    """Applica func(file, years) a ogni file, in parallelo se workers > 1.
+
+    executor.map restituisce i risultati nell'ordine di files, quindi il merge
+    a valle non dipende dal numero di processi.
+    """
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, files, repeat(years), chunksize=8))
+    return [func(filepath, years) for filepath in files]
 
-    for filepath in sorted(prov_dir.glob("*.csv")):
-        # Estrai nome provincia dal filename
-        fname = filepath.stem.replace("PopolazioneEta-SingolaArea-Provincia_", "")
-        nuts3 = PROVINCE_FILE_TO_NUTS3.get(fname)
-        if nuts3 is None:
-            log.warning(f"Provincia non mappata: {fname}")
-            continue
 
-        blocks = parse_intercensuaria_blocks(filepath, years)
-        if not blocks:
-            log.warning(f"Nessun blocco trovato in {filepath.name}")
-            continue
+def load_intercensuaria_province(
+    raw_dir: Path, years: list[int], workers: int = 1, cache: SourceCache | None = None,
+) -> list[dict]:
+    """Carica popolazione province dall'intercensuaria (107 file singoli).
 
-        display_name = NUTS3_DISPLAY_NAMES.get(nuts3, fname.replace("_", " "))
-        block = blocks[0]  # primo blocco = tutte le cittadinanze
-        for year in years:
-            if year in block:
-                rows.append({
-                    "REF_AREA": nuts3,
-                    "Territorio": display_name,
-                    "Anno": year,
-                    "Popolazione": block[year],
-                    "livello": "provincia",
-                })
+    I file sono letti dall'archivio PopolazioneEta-SingolaArea-Province.zip se
+    presente, altrimenti dalla cartella estratta.
 
-    return rows
+    Con workers > 1 i file vengono letti in parallelo da un pool di processi.
+    executor.map restituisce i risultati nell'ordine dei file (ordinati per nome),
+    quindi l'output e' identico a quello seriale.
+
+    Con una cache, vengono riletti solo i file il cui fingerprint e' cambiato.
+    """
+    files = list_raw_files(raw_dir, "PopolazioneEta-SingolaArea-Province")
+    span = f"{years[0]}-{years[-1]}"
+
+    per_file: list[list[dict] | None] = [None] * len(files)
+    keys, fingerprints = [], []
+    for i, filepath in enumerate(files):
+        keys.append(f"provincia:{filepath.stem}:{span}")
+        fingerprints.append(source_fingerprint(filepath) if cache is not None else "")
+        if cache is not None:
+            found, rows = cache.get(keys[i], fingerprints[i])
+            if found:
+                per_file[i] = rows
+
+    missing = [i for i, rows in enumerate(per_file) if rows is None]
+    parsed = map_files(parse_provincia_file, [files[i] for i in missing], years, workers)
+    for i, rows in zip(missing, parsed):
+        per_file[i] = rows
+        if cache is not None:
+            cache.put(keys[i], fingerprints[i], rows)
+
+    return [row for rows in per_file for row in rows]
 
 
 def load_popres1(raw_dir: Path) -> pd.DataFrame:
@@ -353,24 +471,264 @@ def classify_territory(code: str) -> tuple[str, str]:
     return None, None
 
 
+def classify_popres1(df_popres: pd.DataFrame) -> pd.DataFrame:
+    """Classifica e filtra i territori DCIS_POPRES1 in modo vettoriale.
+
+    Equivalente a classify_territory riga per riga: i codici vengono fattorizzati,
+    risolti su territori.TERRITORI solo per i valori unici (~140) e riespansi con
+    un take sui codici. Le righe con territorio da escludere (ripartizioni) sono rimosse.
+
+    Returns:
+        DataFrame con colonne REF_AREA, Territorio, Anno, Popolazione, livello.
+    """
+    codes, uniques = pd.factorize(df_popres["REF_AREA"])
+    livello = pd.Index(TERRITORI.livello(uniques))
+    territorio = pd.Index(TERRITORI.nome(uniques))
+
+    # Solo territori in tabella; ripartizioni escluse
+    keep_unique = territorio.notna() & (livello != "ripartizione")
+    keep = (codes >= 0) & keep_unique[codes]
+    codes = codes[keep]
+    return pd.DataFrame({
+        "REF_AREA": uniques.take(codes),
+        "Territorio": territorio.take(codes),
+        "Anno": df_popres["Anno"].to_numpy()[keep],
+        "Popolazione": df_popres["Popolazione"].to_numpy()[keep],
+        "livello": livello.take(codes),
+    })
+
+
+def age_band(eta: np.ndarray) -> pd.Categorical:
+    """Assegna la classe AGE_BANDS a un array di eta' singole (vettoriale)."""
+    labels = [label for label, _ in AGE_BANDS]
+    edges = np.array([start for _, start in AGE_BANDS])
+    return pd.Categorical.from_codes(
+        np.searchsorted(edges, eta, side="right") - 1,
+        categories=labels,
+        ordered=True,
+    )
+
+
+def parse_intercensuaria_eta(filepath: RawSource, years: list[int]) -> pd.DataFrame:
+    """Estrae la popolazione per eta' singola e sesso dai blocchi "Tutte le cittadinanze".
+
+    Ogni blocco ha tre sotto-tabelle (Totale, Maschi, Femmine) con una riga per
+    eta' (0..99, "100 e oltre"): si leggono solo Maschi e Femmine. I blocchi per
+    cittadinanza (italiana/straniera) seguono nel file e non vengono letti.
+
+    Returns:
+        DataFrame long con colonne nome_blocco, SEX, eta, Anno, Popolazione.
+    """
+    year_cols = [str(y) for y in years]
+    header_indices = None
+    current_block_name = None
+    current_sex = None
+    records = []  # (nome_blocco, sex, eta, valori per anno)
+
+    with open_raw_text(filepath) as f:
+        for line in f:
+            if line.startswith('"Tutte le cittadinanze'):
+                current_block_name = line.strip().strip('"')
+                current_sex = None
+                continue
+            # Primo blocco per cittadinanza: i totali sono gia' stati letti tutti
+            if line.startswith('"Cittadinanza'):
+                break
+            if current_block_name is None:
+                continue
+
+            if line.startswith("Età/Anno;"):
+                if header_indices is None:
+                    cols = line.strip().split(";")
+                    header_indices = [cols.index(yc) for yc in year_cols if yc in cols]
+                    year_cols = [yc for yc in year_cols if yc in cols]
+                continue
+            if line.startswith("Età;"):
+                current_sex = SEX_CODES.get(line.strip().split(";")[1])
+                continue
+            # Solo righe eta' (0..99, "100 e oltre"): salta Totale, titoli e righe vuote
+            if current_sex is None or not line[:1].isdigit():
+                continue
+
+            parts = line.strip().split(";")
+            eta = 100 if parts[0].startswith("100") else int(parts[0])
+            records.append((current_block_name, current_sex, eta, [int(parts[i]) for i in header_indices]))
+
+    if not records:
+        return pd.DataFrame(columns=["nome_blocco", "SEX", "eta", "Anno", "Popolazione"])
+
+    nomi, sex, eta, valori = zip(*records)
+    valori = np.array(valori, dtype=np.int64)  # righe x anni
+    n_years = len(year_cols)
+    return pd.DataFrame({
+        "nome_blocco": np.repeat(nomi, n_years),
+        "SEX": np.repeat(sex, n_years),
+        "eta": np.repeat(eta, n_years),
+        "Anno": np.tile([int(yc) for yc in year_cols], len(records)),
+        "Popolazione": valori.ravel(),
+    })
+
+
+def parse_provincia_eta_file(filepath: RawSource, years: list[int]) -> pd.DataFrame:
+    """Popolazione per eta' e sesso di un singolo file provincia, con REF_AREA NUTS3."""
+    fname = filepath.stem.replace("PopolazioneEta-SingolaArea-Provincia_", "")
+    nuts3 = PROVINCE_FILE_TO_NUTS3.get(fname)
+    if nuts3 is None:
+        return pd.DataFrame()
+    df = parse_intercensuaria_eta(filepath, years)
+    # Solo il primo blocco (tutte le cittadinanze della provincia)
+    df = df[df["nome_blocco"] == df["nome_blocco"].iloc[0]] if len(df) else df
+    return df.drop(columns="nome_blocco").assign(REF_AREA=nuts3, livello="provincia")
+
+
+def load_posas(raw_dir: Path) -> pd.DataFrame:
+    """Carica i file POSAS_<anno>_it_Ripartizioni (eta' singola x sesso, 2020+).
+
+    Ritorna DataFrame long con REF_AREA (NUTS1 + IT come somma), livello, SEX, eta,
+    Anno, Popolazione. La riga eta' 999 (totale) viene scartata.
+    """
+    stems = sorted({p.stem for p in raw_dir.glob("POSAS_*_it_Ripartizioni.*") if p.suffix in (".csv", ".zip")})
+    frames = []
+    for stem in stems:
+        anno = int(stem.split("_")[1])
+        with open_raw_text(resolve_raw_file(raw_dir, stem)) as f:
+            df = pd.read_csv(
+                f, sep=";", skiprows=1,
+                usecols=["Codice ripartizione", "Età", "Totale maschi", "Totale femmine"],
+            )
+        df = df[df["Età"] != 999].rename(columns={"Totale maschi": 1, "Totale femmine": 2})
+        df = df.melt(
+            id_vars=["Codice ripartizione", "Età"], value_vars=[1, 2],
+            var_name="SEX", value_name="Popolazione",
+        )
+        df["REF_AREA"] = df["Codice ripartizione"].map(POSAS_RIPARTIZIONE_TO_NUTS1)
+        df = df.rename(columns={"Età": "eta"}).drop(columns="Codice ripartizione")
+        df["Anno"] = anno
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=["REF_AREA", "livello", "SEX", "eta", "Anno", "Popolazione"])
+
+    df = pd.concat(frames, ignore_index=True).assign(livello="ripartizione")
+    df_it = df.groupby(["SEX", "eta", "Anno"], as_index=False)["Popolazione"].sum()
+    df_it = df_it.assign(REF_AREA="IT", livello="italia")
+    return pd.concat([df, df_it], ignore_index=True)
+
+
+def build_population_cube(raw_dir: Path, workers: int = 1) -> pd.DataFrame:
+    """Costruisce il cubo popolazione area x anno x sesso x classe di eta'.
+
+    Fonti: intercensuaria (Italia, ripartizioni, regioni, province; 2002-2019)
+    e POSAS (Italia, ripartizioni; 2020+). ITD1/ITD2 come regioni replicano le
+    province ITD10/ITD20, come nel CSV principale.
+
+    Returns:
+        DataFrame con REF_AREA e livello categorici, Anno int16, SEX int8,
+        ETA categorico ordinato (AGE_BANDS), Popolazione int32.
+    """
+    years = YEARS_CUBO_INTERCENSUARIA
+    frames = []
+
+    # Italia e ripartizioni
+    df = parse_intercensuaria_eta(resolve_raw_file(raw_dir, "PopolazioneEta-SingolaArea-Italia-Ripartizioni"), years)
+    nome = df["nome_blocco"].str.split(" - ").str[-1].str.replace("Ripartizione: ", "", regex=False)
+    df["REF_AREA"] = nome.map({"Italia": "IT", **RIPARTIZIONI_NUTS1})
+    df["livello"] = np.where(df["REF_AREA"] == "IT", "italia", "ripartizione")
+    frames.append(df.dropna(subset=["REF_AREA"]).drop(columns="nome_blocco"))
+
+    # Regioni (Trentino-Alto Adige saltato: Bolzano/Trento dalle province)
+    df = parse_intercensuaria_eta(resolve_raw_file(raw_dir, "PopolazioneEta-SingolaArea-Regioni"), years)
+    nuts2 = {n: regione_to_nuts2(n.split("Regione:")[-1].strip()) for n in df["nome_blocco"].unique()}
+    df["REF_AREA"] = df["nome_blocco"].map(nuts2)
+    frames.append(df.dropna(subset=["REF_AREA"]).drop(columns="nome_blocco").assign(livello="regione"))
+
+    # Province
+    files = list_raw_files(raw_dir, "PopolazioneEta-SingolaArea-Province")
+    df_prov = pd.concat(map_files(parse_provincia_eta_file, files, years, workers), ignore_index=True)
+    frames.append(df_prov)
+    trentino = {"ITD10": "ITD1", "ITD20": "ITD2"}
+    df_trentino = df_prov[df_prov["REF_AREA"].isin(trentino)]
+    frames.append(df_trentino.assign(REF_AREA=df_trentino["REF_AREA"].map(trentino), livello="regione"))
+
+    # POSAS (2020+)
+    frames.append(load_posas(raw_dir))
+
+    df = pd.concat(frames, ignore_index=True)
+    df["ETA"] = age_band(df["eta"].to_numpy())
+    cube = (
+        df.groupby(["livello", "REF_AREA", "Anno", "SEX", "ETA"], observed=True, as_index=False)["Popolazione"]
+        .sum()
+    )
+    return cube.astype({
+        "livello": "category",
+        "REF_AREA": "category",
+        "Anno": "int16",
+        "SEX": "int8",
+        "Popolazione": "int32",
+    })
+
+
 def main():
+    parser = argparse.ArgumentParser(
+        description="Genera CSV popolazione unificato (intercensuaria + DCIS_POPRES1)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processi per il parsing dei file provincia (default: 1, seriale)",
+    )
+    parser.add_argument(
+        "--cubo",
+        action="store_true",
+        help="Genera anche il cubo area x anno x sesso x classe di eta' (Parquet)",
+    )
+    parser.add_argument(
+        "--comuni",
+        action="store_true",
+        help="Importa anche la popolazione comunale (Parquet partizionato per anno)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignora la cache dei file gia' letti e rilegge tutte le sorgenti",
+    )
+    args = parser.parse_args()
+
     project_root = Path(__file__).resolve().parent.parent
     raw_dir = project_root / "data" / "raw" / "popolazione"
     out_dir = project_root / "data" / "processed"
     out_dir.mkdir(parents=True, exist_ok=True)
     out_file = out_dir / "popolazione_regioni_province.csv"
 
+    # Cache per sorgente: il salt copre questo script e i moduli che usa
+    # (CACHE_SALT_MODULES), ogni modifica a parsing o nomi territori la invalida
+    cache = None
+    if not args.no_cache:
+        cache = SourceCache(CACHE_DIR, salt=cache_salt())
+    span = f"{YEARS_INTERCENSUARIA[0]}-{YEARS_INTERCENSUARIA[-1]}"
+
     # 1. Intercensuaria (2014-2018)
     log.info("Caricamento intercensuaria Italia...")
-    rows_italia = load_intercensuaria_italia(raw_dir, YEARS_INTERCENSUARIA)
+    src = resolve_raw_file(raw_dir, "PopolazioneEta-SingolaArea-Italia-Ripartizioni")
+    rows_italia = cached(
+        cache, f"italia:{span}", source_fingerprint(src),
+        lambda: load_intercensuaria_italia(raw_dir, YEARS_INTERCENSUARIA),
+    )
     log.info(f"  Italia: {len(rows_italia)} righe")
 
     log.info("Caricamento intercensuaria regioni...")
-    rows_regioni = load_intercensuaria_regioni(raw_dir, YEARS_INTERCENSUARIA)
+    src = resolve_raw_file(raw_dir, "PopolazioneEta-SingolaArea-Regioni")
+    rows_regioni = cached(
+        cache, f"regioni:{span}", source_fingerprint(src),
+        lambda: load_intercensuaria_regioni(raw_dir, YEARS_INTERCENSUARIA),
+    )
     log.info(f"  Regioni: {len(rows_regioni)} righe")
 
     log.info("Caricamento intercensuaria province...")
-    rows_province = load_intercensuaria_province(raw_dir, YEARS_INTERCENSUARIA)
+    rows_province = load_intercensuaria_province(
+        raw_dir, YEARS_INTERCENSUARIA, workers=args.workers, cache=cache,
+    )
     log.info(f"  Province: {len(rows_province)} righe")
 
     # ITD1/ITD2 come regioni: stessi valori delle province ITD10/ITD20
@@ -397,26 +755,19 @@ def main():
 
     # 2. DCIS_POPRES1 (2019+)
     log.info("Caricamento DCIS_POPRES1...")
-    df_popres = load_popres1(raw_dir)
-    log.info(f"  POPRES1 raw: {len(df_popres)} righe")
-
     # Classifica e filtra territori
-    popres_rows = []
-    for _, row in df_popres.iterrows():
-        livello, nome = classify_territory(row["REF_AREA"])
-        if livello is not None:
-            popres_rows.append({
-                "REF_AREA": row["REF_AREA"],
-                "Territorio": nome,
-                "Anno": row["Anno"],
-                "Popolazione": row["Popolazione"],
-                "livello": livello,
-            })
-    df_popres_filtered = pd.DataFrame(popres_rows)
+    df_popres_filtered = cached(
+        cache, "popres1", source_fingerprint(raw_dir / "popres1.csv"),
+        lambda: classify_popres1(load_popres1(raw_dir)),
+    )
     # Solo 2019+ (priorita' su intercensuaria)
     df_popres_filtered = df_popres_filtered[df_popres_filtered["Anno"] >= 2019]
     log.info(f"  POPRES1 filtrato: {len(df_popres_filtered)} righe, anni {sorted(df_popres_filtered['Anno'].unique())}")
 
+    if cache is not None:
+        cache.save()
+        log.info(f"  Cache sorgenti: {cache.hits} lette da cache, {cache.misses} riparsate")
+
     # 3. Unione
     df_result = pd.concat([df_intercensuaria, df_popres_filtered], ignore_index=True)
     df_result = df_result.sort_values(["livello", "REF_AREA", "Anno"]).reset_index(drop=True)
@@ -427,14 +778,42 @@ def main():
         log.warning(f"ATTENZIONE: {dupes.sum()} righe duplicate (REF_AREA + Anno)")
         log.warning(df_result[dupes].to_string())
 
-    # 4. Output
+    # 4. Output (CSV + sidecar Arrow tipizzato per i consumer, vedi popolazione_io.py)
     df_result.to_csv(out_file, index=False)
     log.info(f"\nSalvato: {out_file}")
+    sidecar = write_popolazione_sidecar(df_result, out_dir)
+    if sidecar is not None:
+        log.info(f"Salvato: {sidecar}")
     log.info(f"Righe: {len(df_result)}")
     log.info(f"Territori: {df_result['REF_AREA'].nunique()}")
     log.info(f"Anni: {sorted(df_result['Anno'].unique())}")
     log.info(f"Livelli: {dict(df_result['livello'].value_counts())}")
 
+    # 5. Cubo eta' x sesso (opzionale)
+    if args.cubo:
+        log.info("\nCostruzione cubo eta' x sesso...")
+        cube = build_population_cube(raw_dir, workers=args.workers)
+        cube_file = out_dir / "popolazione_eta_sesso.parquet"
+        cube.to_parquet(cube_file, index=False)
+        log.info(f"Salvato: {cube_file}")
+        log.info(f"Righe: {len(cube)}, anni {cube['Anno'].min()}-{cube['Anno'].max()}, "
+                 f"territori: {cube['REF_AREA'].nunique()}")
+
+    if args.comuni:
+        log.info("\nImportazione popolazione comunale...")
+        src = resolve_raw_file(raw_dir, "popres1_comuni")
+        if isinstance(src, Path) and not src.exists():
+            log.warning(f"  {src.name} non trovato: popolazione comunale saltata")
+        else:
+            with open_raw_text(src) as f:
+                province = ingest_popres1_comuni(f, out_dir / COMUNI_DIR)
+            check = confronta_aggregati(province, df_result)
+            diff = check[check["Differenza"] != 0]
+            log.info(f"  Verifica aggregati comuni: {len(check)} territori x anno confrontati, "
+                     f"{len(diff)} con differenze")
+            if len(diff) > 0:
+                log.warning(diff.to_string())
+
     return df_result
 
 
@@ -0,0 +1,146 @@
+"""Popolazione a livello comunale (DCIS_POPRES1, ~7.900 comuni).
+
+L'estratto comunale di DCIS_POPRES1 ha ~100 volte le righe per anno del file
+regioni/province, quindi non viene caricato in memoria in un colpo solo:
+  - ingest_popres1_comuni() lo legge a blocchi (pd.read_csv chunksize) con
+    sole colonne e tipi necessari, e scrive ogni blocco in un dataset Parquet
+    partizionato per anno (layout hive: <out_dir>/Anno=2024/part-00000.parquet)
+  - durante la lettura accumula la somma per provincia (NUTS3 x anno), che resta
+    piccola (~107 x anni) qualunque sia la dimensione del file
+  - confronta_aggregati() riporta le somme comunali ai livelli provincia, regione
+    e italia e le confronta con popolazione_regioni_province, come controllo di
+    coerenza
+
+Colonne del dataset: PRO_COM (codice ISTAT comune, 6 cifre), NUTS3, Popolazione,
+piu' Anno come chiave di partizione. Richiede pyarrow.
+
+Il file principale popolazione_regioni_province.csv non viene toccato.
+"""
+
+import logging
+import shutil
+from pathlib import Path
+from typing import TextIO
+
+import numpy as np
+import pandas as pd
+
+from territori import PROVINCE_ISTAT_TO_NUTS3, TERRITORI
+
+log = logging.getLogger(__name__)
+
+COMUNI_DIR = "popolazione_comuni"
+CHUNK_ROWS = 500_000
+
+# Colonne SDMX lette dall'estratto; SEX e AGE solo se presenti (si tengono i totali)
+COMUNI_USECOLS = {"REF_AREA", "SEX", "AGE", "TIME_PERIOD", "OBS_VALUE"}
+COMUNI_DTYPES = {"REF_AREA": str, "AGE": str, "TIME_PERIOD": "int16", "OBS_VALUE": "int32"}
+
+
+def _comuni_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Filtra un blocco SDMX sui comuni (totale sesso/eta') e lo porta al layout del dataset."""
+    mask = chunk["REF_AREA"].str.fullmatch(r"\d{6}").fillna(False)
+    if "SEX" in chunk:
+        mask &= chunk["SEX"] == 9
+    if "AGE" in chunk:
+        mask &= chunk["AGE"] == "TOTAL"
+    chunk = chunk[mask]
+
+    pro_com = chunk["REF_AREA"]
+    return pd.DataFrame({
+        "PRO_COM": pro_com.to_numpy(),
+        "NUTS3": pro_com.str[:3].map(PROVINCE_ISTAT_TO_NUTS3).to_numpy(),
+        "Anno": chunk["TIME_PERIOD"].to_numpy(),
+        "Popolazione": chunk["OBS_VALUE"].to_numpy(),
+    })
+
+
+def ingest_popres1_comuni(
+    source: Path | TextIO, out_dir: Path, chunk_rows: int = CHUNK_ROWS,
+) -> pd.DataFrame:
+    """Legge l'estratto comunale a blocchi e lo scrive come Parquet partizionato per anno.
+
+    Args:
+        source: CSV SDMX (separatore ";") o stream di testo gia' aperto.
+        out_dir: cartella del dataset (ricreata da zero).
+        chunk_rows: righe per blocco di lettura.
+
+    Returns:
+        Somma per provincia: DataFrame con REF_AREA (NUTS3), Anno, Popolazione.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+
+    parziali = []
+    n_comuni = n_non_mappati = 0
+    reader = pd.read_csv(
+        source, sep=";", usecols=lambda c: c in COMUNI_USECOLS,
+        dtype=COMUNI_DTYPES, chunksize=chunk_rows,
+    )
+    for i, chunk in enumerate(reader):
+        df = _comuni_chunk(chunk)
+        n_comuni += len(df)
+        non_mappati = df["NUTS3"].isna()
+        if non_mappati.any():
+            n_non_mappati += int(non_mappati.sum())
+            df = df[~non_mappati]
+
+        for anno, part in df.groupby("Anno", sort=False):
+            path = out_dir / f"Anno={anno}" / f"part-{i:05d}.parquet"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(part.drop(columns="Anno"), preserve_index=False)
+            pq.write_table(table, path)
+
+        parziali.append(df.groupby(["NUTS3", "Anno"])["Popolazione"].sum())
+
+    if n_non_mappati:
+        log.warning(f"  {n_non_mappati} righe comunali con provincia ISTAT non mappata (scartate)")
+    log.info(f"  Comuni: {n_comuni} righe in {len(parziali)} blocchi -> {out_dir}")
+
+    if not parziali:
+        return pd.DataFrame(columns=["REF_AREA", "Anno", "Popolazione"])
+    province = pd.concat(parziali).groupby(level=["NUTS3", "Anno"]).sum()
+    return province.rename_axis(["REF_AREA", "Anno"]).reset_index()
+
+
+def read_popolazione_comuni(processed_dir: Path, anni: list[int] | None = None) -> pd.DataFrame:
+    """Legge il dataset comunale, solo le partizioni degli anni richiesti (default: tutti)."""
+    import pyarrow.parquet as pq
+
+    filters = [("Anno", "in", list(anni))] if anni is not None else None
+    table = pq.read_table(processed_dir / COMUNI_DIR, filters=filters, partitioning="hive")
+    df = table.to_pandas()
+    df["Anno"] = df["Anno"].astype("int16")
+    return df
+
+
+def confronta_aggregati(province: pd.DataFrame, pop: pd.DataFrame) -> pd.DataFrame:
+    """Confronta le somme comunali con popolazione_regioni_province.
+
+    Args:
+        province: somma comunale per provincia (output di ingest_popres1_comuni).
+        pop: popolazione_regioni_province (REF_AREA, Anno, Popolazione, livello).
+
+    Returns:
+        Una riga per territorio x anno presente in entrambi, con colonne
+        livello, REF_AREA, Anno, Popolazione, Popolazione_comuni, Differenza.
+    """
+    regioni = (
+        province.assign(REF_AREA=TERRITORI.regione(province["REF_AREA"]))
+        .groupby(["REF_AREA", "Anno"], as_index=False)["Popolazione"].sum()
+    )
+    italia = province.groupby("Anno", as_index=False)["Popolazione"].sum().assign(REF_AREA="IT")
+    aggregati = pd.concat([province, regioni, italia], ignore_index=True)
+    aggregati = aggregati.rename(columns={"Popolazione": "Popolazione_comuni"})
+    aggregati["REF_AREA"] = aggregati["REF_AREA"].astype(str)
+    aggregati["Anno"] = aggregati["Anno"].astype(int)
+
+    riferimento = pop[["livello", "REF_AREA", "Anno", "Popolazione"]].astype(
+        {"livello": str, "REF_AREA": str, "Anno": int}
+    )
+    result = riferimento.merge(aggregati, on=["REF_AREA", "Anno"], how="inner")
+    result["Differenza"] = result["Popolazione_comuni"].astype(np.int64) - result["Popolazione"].astype(np.int64)
+    return result.sort_values(["livello", "REF_AREA", "Anno"]).reset_index(drop=True)
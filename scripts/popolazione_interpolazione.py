@@ -0,0 +1,156 @@
+"""Completamento della popolazione per gli anni mancanti (interpolazione/estrapolazione).
+
+Le serie popolazione possono avere buchi: anni senza dato tra intercensuaria e
+DCIS_POPRES1, oppure l'anno piu' recente dei delitti non ancora coperto da
+POPRES1. complete_popolazione() riempie questi buchi in un'unica passata
+vettoriale su tutti i territori (matrice territori x anni), cosi' i merge dei
+generatori non lasciano Popolazione a NaN.
+
+Metodi:
+  - "lineare": interpolazione lineare tra l'anno osservato precedente e successivo
+  - "geometrica": interpolazione lineare sui logaritmi (tasso di crescita costante)
+
+Oltre l'ultimo anno osservato si estrapola (al massimo max_estrapolazione anni)
+con lo stesso metodo, usando la variazione tra gli ultimi due anni osservati.
+Gli anni prima del primo dato osservato restano scoperti.
+
+Ogni riga porta la colonna FONTE_COL con la provenienza del valore:
+"osservata", "interpolata" o "estrapolata" (categorica ordinata).
+"""
+
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+FONTE_COL = "Fonte_popolazione"
+METODI = ("lineare", "geometrica")
+# Ordinate dalla piu' affidabile: max() su un gruppo da' la fonte piu' debole
+FONTI = ("osservata", "interpolata", "estrapolata")
+
+
+def _previous_observed(observed: np.ndarray) -> np.ndarray:
+    """Per ogni cella, indice della colonna osservata precedente o uguale (-1 se nessuna)."""
+    n_years = observed.shape[1]
+    idx = np.where(observed, np.arange(n_years), -1)
+    return np.maximum.accumulate(idx, axis=1)
+
+
+def _next_observed(observed: np.ndarray) -> np.ndarray:
+    """Per ogni cella, indice della colonna osservata successiva o uguale (n_years se nessuna)."""
+    n_years = observed.shape[1]
+    idx = np.where(observed, np.arange(n_years), n_years)
+    return np.minimum.accumulate(idx[:, ::-1], axis=1)[:, ::-1]
+
+
+def fill_matrix(
+    values: np.ndarray,
+    years: np.ndarray,
+    metodo: str = "lineare",
+    max_estrapolazione: int = 1,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Riempie i NaN di una matrice territori x anni.
+
+    Returns:
+        (valori riempiti, codici fonte) dove il codice e' 0 = osservata,
+        1 = interpolata, 2 = estrapolata, -1 = non coperta (resta NaN).
+    """
+    if metodo not in METODI:
+        raise ValueError(f"Metodo di interpolazione non valido: {metodo} (ammessi: {METODI})")
+
+    values = np.asarray(values, dtype=float)
+    years = np.asarray(years, dtype=float)
+    observed = ~np.isnan(values)
+    work = np.log(values) if metodo == "geometrica" else values.copy()
+
+    rows = np.arange(values.shape[0])[:, None]
+    n_years = values.shape[1]
+    prev_idx = _previous_observed(observed)
+    next_idx = _next_observed(observed)
+    has_prev = prev_idx >= 0
+    has_next = next_idx < n_years
+
+    prev_c = np.clip(prev_idx, 0, n_years - 1)
+    next_c = np.clip(next_idx, 0, n_years - 1)
+    v_prev = work[rows, prev_c]
+    v_next = work[rows, next_c]
+    y_prev = years[prev_c]
+    y_next = years[next_c]
+
+    fonte = np.where(observed, 0, -1)
+    filled = work.copy()
+
+    # Interpolazione tra due anni osservati
+    interp = ~observed & has_prev & has_next
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = (years[None, :] - y_prev) / (y_next - y_prev)
+    filled[interp] = (v_prev + weight * (v_next - v_prev))[interp]
+    fonte[interp] = 1
+
+    # Estrapolazione oltre l'ultimo anno osservato, con il trend degli ultimi due osservati
+    extra = ~observed & has_prev & ~has_next & (years[None, :] - y_prev <= max_estrapolazione)
+    if extra.any():
+        prev2_idx = prev_idx[rows, np.clip(prev_c - 1, 0, n_years - 1)]
+        prev2_idx = np.where(prev_c >= 1, prev2_idx, -1)
+        has_prev2 = prev2_idx >= 0
+        prev2_c = np.clip(prev2_idx, 0, n_years - 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slope = np.where(
+                has_prev2,
+                (v_prev - work[rows, prev2_c]) / (y_prev - years[prev2_c]),
+                0.0,  # un solo anno osservato: valore costante
+            )
+        filled[extra] = (v_prev + slope * (years[None, :] - y_prev))[extra]
+        fonte[extra] = 2
+
+    if metodo == "geometrica":
+        filled = np.exp(filled)
+    filled[fonte < 0] = np.nan
+    return filled, fonte
+
+
+def complete_popolazione(
+    pop: pd.DataFrame,
+    years: Iterable[int] | None = None,
+    metodo: str = "lineare",
+    max_estrapolazione: int = 1,
+) -> pd.DataFrame:
+    """Completa popolazione_regioni_province su tutti gli anni richiesti.
+
+    Args:
+        pop: DataFrame con REF_AREA, Territorio, Anno, Popolazione, livello.
+        years: anni da coprire (default: anni presenti in pop). Gli anni gia'
+            presenti in pop sono sempre inclusi.
+        metodo: "lineare" o "geometrica".
+        max_estrapolazione: anni massimi di estrapolazione dopo l'ultimo osservato.
+
+    Returns:
+        DataFrame con le stesse colonne piu' FONTE_COL, ordinato per
+        (livello, REF_AREA, Anno). Le celle non coperte vengono omesse.
+    """
+    all_years = sorted(set(pop["Anno"].astype(int)) | set(int(y) for y in (years if years is not None else [])))
+
+    wide = pop.pivot_table(
+        index="REF_AREA", columns="Anno", values="Popolazione", aggfunc="first", observed=True,
+    ).reindex(columns=all_years)
+    filled, fonte = fill_matrix(wide.to_numpy(), np.array(all_years), metodo, max_estrapolazione)
+
+    attrs = pop.drop_duplicates("REF_AREA", keep="last").set_index("REF_AREA")[["Territorio", "livello"]]
+    attrs = attrs.reindex(wide.index)
+
+    n_areas, n_years = filled.shape
+    result = pd.DataFrame({
+        "REF_AREA": np.repeat(wide.index.to_numpy(), n_years),
+        "Territorio": np.repeat(attrs["Territorio"].to_numpy(), n_years),
+        "Anno": np.tile(all_years, n_areas),
+        "Popolazione": filled.ravel(),
+        "livello": np.repeat(attrs["livello"].to_numpy(), n_years),
+        FONTE_COL: pd.Categorical.from_codes(
+            fonte.ravel() + 1, categories=["non_coperta", *FONTI], ordered=True,
+        ),
+    })
+    result = result[result[FONTE_COL] != "non_coperta"]
+    result[FONTE_COL] = result[FONTE_COL].cat.remove_categories("non_coperta")
+    result["Popolazione"] = result["Popolazione"].round().astype(pop["Popolazione"].dtype)
+    result = result.astype({col: pop[col].dtype for col in ["REF_AREA", "Territorio", "Anno", "livello"]})
+    return result.sort_values(["livello", "REF_AREA", "Anno"]).reset_index(drop=True)
@@ -0,0 +1,81 @@
+"""Lettura/scrittura tipizzata di popolazione_regioni_province.
+
+generate_popolazione.py scrive, accanto al CSV, un sidecar Arrow IPC
+(popolazione_regioni_province.arrow) con i tipi gia' fissati:
+  - REF_AREA, Territorio, livello: categorici (dictionary Arrow)
+  - Anno: int16
+  - Popolazione: int32
+
+read_popolazione() apre il sidecar in memory-map, cosi' i consumer
+(generate_delittips, generate_autori_vittime, generate_insights) non
+riparsano il CSV ne' reinferiscono i tipi. Il sidecar porta nei metadati
+l'hash SHA-256 del CSV da cui e' stato generato: se il CSV e' cambiato
+(o pyarrow non e' installato) si ricade sulla lettura del CSV con gli
+stessi tipi.
+"""
+
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from raw_cache import sha256_file
+
+log = logging.getLogger(__name__)
+
+POPOLAZIONE_CSV = "popolazione_regioni_province.csv"
+POPOLAZIONE_ARROW = "popolazione_regioni_province.arrow"
+
+POPOLAZIONE_DTYPES = {
+    "REF_AREA": "category",
+    "Territorio": "category",
+    "Anno": "int16",
+    "Popolazione": "int32",
+    "livello": "category",
+}
+
+_SOURCE_HASH_KEY = b"source_sha256"
+
+
+def write_popolazione_sidecar(df: pd.DataFrame, processed_dir: Path) -> Path | None:
+    """Scrive il sidecar Arrow tipizzato per il CSV popolazione gia' salvato in processed_dir.
+
+    Ritorna None (senza errore) se pyarrow non e' installato: i consumer useranno il CSV.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        log.warning("  pyarrow non installato: sidecar Arrow popolazione non generato")
+        return None
+
+    csv_path = processed_dir / POPOLAZIONE_CSV
+    out = processed_dir / POPOLAZIONE_ARROW
+    table = pa.Table.from_pandas(df.astype(POPOLAZIONE_DTYPES), preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _SOURCE_HASH_KEY: sha256_file(csv_path).encode("ascii"),
+    })
+    # Non compresso: requisito per la lettura in memory-map senza copie di decompressione
+    with pa.OSFile(str(out), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return out
+
+
+def read_popolazione(processed_dir: Path) -> pd.DataFrame:
+    """Carica la popolazione tipizzata (sidecar Arrow in memory-map, fallback CSV)."""
+    csv_path = processed_dir / POPOLAZIONE_CSV
+    arrow_path = processed_dir / POPOLAZIONE_ARROW
+
+    if arrow_path.exists():
+        try:
+            import pyarrow as pa
+        except ImportError:
+            log.info("  pyarrow non installato: lettura popolazione da CSV")
+        else:
+            with pa.memory_map(str(arrow_path), "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+                if (table.schema.metadata or {}).get(_SOURCE_HASH_KEY) == sha256_file(csv_path).encode("ascii"):
+                    return table.to_pandas(split_blocks=True)
+            log.warning(f"  {arrow_path.name} non allineato a {csv_path.name}: lettura da CSV")
+
+    return pd.read_csv(csv_path, dtype=POPOLAZIONE_DTYPES)
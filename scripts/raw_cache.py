@@ -0,0 +1,127 @@
+"""Cache su disco dei risultati di parsing dei file raw, indicizzata per fingerprint.
+
+Ogni voce e' identificata da una chiave (es. "provincia:Bari") e valida finche'
+il fingerprint dei file sorgente non cambia. Il manifest JSON elenca chiave ->
+fingerprint; i risultati sono salvati come pickle, un file per voce, cosi' un
+aggiornamento riscrive solo le voci cambiate.
+
+Il "salt" (tipicamente l'hash del sorgente dello script che fa il parsing)
+invalida l'intera cache quando cambia il codice di parsing.
+
+cached_frame() e' la variante per un singolo DataFrame: lo salva in formato
+colonnare (Arrow IPC, non compresso) con il fingerprint nei metadati dello
+schema, e lo rilegge in memory-map. Senza pyarrow ricalcola sempre.
+"""
+
+import hashlib
+import json
+import logging
+import pickle
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+_FINGERPRINT_KEY = b"fingerprint"
+
+
+def sha256_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 del contenuto di un file, letto a blocchi."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class SourceCache:
+    """Cache chiave -> (fingerprint, risultato) persistita in una cartella."""
+
+    def __init__(self, cache_dir: Path, salt: str = ""):
+        self.cache_dir = cache_dir
+        self.salt = salt
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, str] = {}
+
+        manifest_path = cache_dir / MANIFEST_NAME
+        if manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("salt") == salt:
+                self._entries = manifest.get("entries", {})
+            else:
+                log.info("  Cache %s invalidata (codice cambiato)", cache_dir.name)
+
+    def _result_path(self, key: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.pkl"
+
+    def get(self, key: str, fingerprint: str) -> tuple[bool, Any]:
+        """Ritorna (True, risultato) se la voce e' valida per il fingerprint, altrimenti (False, None)."""
+        path = self._result_path(key)
+        if self._entries.get(key) == fingerprint and path.exists():
+            with open(path, "rb") as f:
+                self.hits += 1
+                return True, pickle.load(f)
+        self.misses += 1
+        return False, None
+
+    def put(self, key: str, fingerprint: str, value: Any) -> None:
+        """Salva il risultato e aggiorna il fingerprint della voce."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._result_path(key), "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._entries[key] = fingerprint
+
+    def save(self) -> None:
+        """Scrive il manifest (solo se la cache e' stata usata)."""
+        if not self._entries:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {"salt": self.salt, "entries": dict(sorted(self._entries.items()))}
+        tmp = self.cache_dir / f"{MANIFEST_NAME}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.cache_dir / MANIFEST_NAME)
+
+
+def cached(cache: SourceCache | None, key: str, fingerprint: str, compute: Callable[[], Any]) -> Any:
+    """Ritorna il risultato in cache per (key, fingerprint), altrimenti lo calcola e lo salva."""
+    if cache is None:
+        return compute()
+    found, value = cache.get(key, fingerprint)
+    if found:
+        return value
+    value = compute()
+    cache.put(key, fingerprint, value)
+    return value
+
+
+def cached_frame(path: Path, fingerprint: str, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """Ritorna il DataFrame salvato in path se il fingerprint coincide, altrimenti lo calcola e lo salva."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return compute()
+
+    if path.exists():
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            if (table.schema.metadata or {}).get(_FINGERPRINT_KEY) == fingerprint.encode("utf-8"):
+                log.info("  %s letto dalla cache", path.name)
+                return table.to_pandas()
+
+    df = compute()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _FINGERPRINT_KEY: fingerprint.encode("utf-8"),
+    })
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    tmp.replace(path)
+    return df
@@ -0,0 +1,120 @@
+"""Tassonomie dei reati: raggruppamenti TYPE_CRIME -> categoria.
+
+Una tassonomia e' un dict {codice reato: categoria}; i codici non mappati non
+contribuiscono a nessuna categoria (es. i figli di Furti/Rapine, gia'
+conteggiati nel codice padre). Piu' tassonomie vengono impilate in un'unica
+matrice sparsa reati x categorie, una colonna per coppia (tassonomia,
+categoria): aggrega_tassonomie() calcola tutte le categorie di tutte le
+tassonomie con un solo prodotto matrice sull'intero frame, senza .map e
+groupby per ogni tassonomia.
+
+Tassonomie aggiuntive (es. sezioni ICCS, vedi data/tassonomie/) si caricano da
+file JSON con carica_tassonomie(): {"nome": {"CODICE": "Categoria", ...}, ...}.
+"""
+
+import json
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+TASSONOMIA_COL = "Tassonomia"
+CATEGORIA_COL = "Categoria"
+
+
+class MatriceTassonomie(NamedTuple):
+    """Matrice 0/1 reati x (tassonomia, categoria)."""
+
+    reati: pd.Index
+    colonne: pd.MultiIndex
+    matrice: sparse.csr_matrix
+
+
+def build_matrice(tassonomie: dict[str, dict[str, str]], reati) -> MatriceTassonomie:
+    """Costruisce la matrice sparsa per i codici reato dati (righe) e tutte le tassonomie (colonne).
+
+    Le colonne seguono l'ordine delle tassonomie e, dentro ciascuna, l'ordine
+    di prima comparsa delle categorie nel mapping.
+    """
+    reati = pd.Index(reati)
+    colonne: dict[tuple[str, str], int] = {}
+    righe, cols = [], []
+    for nome, mapping in tassonomie.items():
+        pos = reati.get_indexer(list(mapping))
+        for riga, categoria in zip(pos, mapping.values()):
+            col = colonne.setdefault((nome, categoria), len(colonne))
+            if riga >= 0:
+                righe.append(riga)
+                cols.append(col)
+
+    matrice = sparse.csr_matrix(
+        (np.ones(len(righe), dtype=np.int64), (righe, cols)),
+        shape=(len(reati), len(colonne)),
+    )
+    index = pd.MultiIndex.from_tuples(list(colonne), names=[TASSONOMIA_COL, CATEGORIA_COL])
+    return MatriceTassonomie(reati, index, matrice)
+
+
+def aggrega_tassonomie(
+    df: pd.DataFrame,
+    tassonomie: dict[str, dict[str, str]],
+    keys: list[str],
+    value_col: str,
+    code_col: str = "TYPE_CRIME",
+    attrs: list[str] | None = None,
+) -> pd.DataFrame:
+    """Somma value_col per ogni categoria di ogni tassonomia, per ogni combinazione di keys.
+
+    df e' in formato lungo (una riga per keys x code_col). Le righe diventano
+    una matrice sparsa chiavi x reati, moltiplicata una volta per la matrice
+    delle tassonomie; una categoria compare solo dove almeno uno dei suoi
+    reati e' presente (come con un groupby sulle righe mappate).
+
+    Args:
+        attrs: colonne costanti per chiave da riportare nel risultato
+            (es. Territorio, Popolazione), prese dalla prima riga di ogni chiave.
+
+    Returns:
+        Una riga per (chiave, tassonomia, categoria) con colonne keys, attrs,
+        Tassonomia, Categoria e value_col (int64).
+    """
+    attrs = attrs or []
+    row_idx = df.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+    righe = df.drop_duplicates(keys)[[*keys, *attrs]].reset_index(drop=True)
+    col_idx, reati = pd.factorize(df[code_col])
+    tax = build_matrice(tassonomie, reati)
+
+    shape = (len(righe), len(reati))
+    valori = sparse.csr_matrix((df[value_col].to_numpy(dtype=np.int64), (row_idx, col_idx)), shape=shape)
+    presenza = sparse.csr_matrix((np.ones(len(df), dtype=np.int64), (row_idx, col_idx)), shape=shape)
+
+    # Un solo prodotto per tutte le tassonomie; le celle con reati presenti
+    # sono i non-zeri di presenza @ matrice
+    conteggi = (presenza @ tax.matrice).tocoo()
+    somme = (valori @ tax.matrice).tocsr()[conteggi.row, conteggi.col]
+
+    result = righe.iloc[conteggi.row].reset_index(drop=True)
+    colonne = tax.colonne[conteggi.col]
+    result[TASSONOMIA_COL] = colonne.get_level_values(TASSONOMIA_COL)
+    result[CATEGORIA_COL] = colonne.get_level_values(CATEGORIA_COL)
+    result[value_col] = np.asarray(somme, dtype=np.int64).ravel()
+    return result
+
+
+def codici_non_mappati(tassonomia: dict[str, str], reati) -> list[str]:
+    """Codici reato (nell'ordine dato) che la tassonomia non assegna a nessuna categoria."""
+    return [code for code in reati if code not in tassonomia]
+
+
+def carica_tassonomie(paths: list[Path]) -> dict[str, dict[str, str]]:
+    """Carica tassonomie da file JSON {nome: {codice: categoria}}; un nome ripetuto e' un errore."""
+    tassonomie: dict[str, dict[str, str]] = {}
+    for path in paths:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        for nome, mapping in data.items():
+            if nome in tassonomie:
+                raise ValueError(f"Tassonomia '{nome}' definita piu' volte ({path})")
+            tassonomie[nome] = {str(code): str(cat) for code, cat in mapping.items()}
+    return tassonomie
@@ -0,0 +1,287 @@
+"""Indice dei territori NUTS condiviso dai generatori.
+
+Unica fonte per codici, nomi e gerarchia dei territori italiani:
+  - IT (italia) -> ripartizioni NUTS1 -> regioni NUTS2 -> province NUTS3
+  - province con codice ISTAT fuori dalla codifica NUTS3 (IT108-IT111),
+    agganciate alla regione di appartenenza in PROVINCE_SPECIALI
+
+TERRITORI e' costruito una volta all'import: per ogni codice tiene livello,
+codice padre e nome in array allineati. Le lookup lavorano su un'intera colonna
+REF_AREA: i codici vengono fattorizzati, risolti una volta per valore unico e
+riespansi con un take, senza .apply riga per riga. Su una colonna categorica
+la fattorizzazione e' gia' fatta: si risolvono le sole categorie e si
+riespande con i codici interi della colonna.
+
+Codici non in tabella (es. vecchie province sarde nei dataset ISTAT) sono
+risolti con la regola strutturale storica dei generatori: 5+ caratteri "IT..."
+= provincia, regione = primi 4 caratteri. Per questi nome() resta None.
+
+aggrega_virtuali() applica le regioni "virtuali" (somme di codici, es.
+Trentino-Alto Adige = ITD1 + ITD2) a un frame qualsiasi, su tutte le misure.
+"""
+
+import numpy as np
+import pandas as pd
+
+LIVELLI = ("italia", "ripartizione", "regione", "provincia")
+
+# Ripartizioni NUTS1 -> nome
+NUTS1_NAMES = {
+    "ITC": "Nord-ovest", "ITD": "Nord-est", "ITE": "Centro", "ITF": "Sud", "ITG": "Isole",
+}
+
+# NUTS2 -> nome regione (come in popolazione_regioni_province.csv)
+NUTS2_NAMES = {
+    "ITC1": "Piemonte",
+    "ITC2": "Valle d'Aosta / Vallée d'Aoste",
+    "ITC3": "Liguria",
+    "ITC4": "Lombardia",
+    "ITD1": "Provincia Autonoma Bolzano / Bozen",
+    "ITD2": "Provincia Autonoma Trento",
+    "ITD3": "Veneto",
+    "ITD4": "Friuli-Venezia Giulia",
+    "ITD5": "Emilia-Romagna",
+    "ITE1": "Toscana",
+    "ITE2": "Umbria",
+    "ITE3": "Marche",
+    "ITE4": "Lazio",
+    "ITF1": "Abruzzo",
+    "ITF2": "Molise",
+    "ITF3": "Campania",
+    "ITF4": "Puglia",
+    "ITF5": "Basilicata",
+    "ITF6": "Calabria",
+    "ITG1": "Sicilia",
+    "ITG2": "Sardegna",
+}
+
+# Nomi brevi (senza dicitura bilingue), usati nei JSON autori/vittime
+NUTS2_SHORT_NAMES = {
+    **NUTS2_NAMES,
+    "ITC2": "Valle d'Aosta",
+    "ITD1": "Provincia Autonoma Bolzano",
+}
+
+# NUTS3 -> nome provincia (come in popolazione_regioni_province.csv)
+NUTS3_DISPLAY_NAMES = {
+    "ITC11": "Torino", "ITC12": "Vercelli", "ITC13": "Biella",
+    "ITC14": "Verbano-Cusio-Ossola", "ITC15": "Novara", "ITC16": "Cuneo",
+    "ITC17": "Asti", "ITC18": "Alessandria",
+    "ITC20": "Valle d'Aosta / Vallée d'Aoste",
+    "ITC41": "Varese", "ITC42": "Como", "ITC43": "Lecco", "ITC44": "Sondrio",
+    "ITC45": "Milano", "ITC46": "Bergamo", "ITC47": "Brescia",
+    "ITC48": "Pavia", "ITC49": "Lodi", "ITC4A": "Cremona", "ITC4B": "Mantova",
+    "ITC31": "Imperia", "ITC32": "Savona", "ITC33": "Genova", "ITC34": "La Spezia",
+    "ITD10": "Bolzano / Bozen", "ITD20": "Trento",
+    "ITD31": "Verona", "ITD32": "Vicenza", "ITD33": "Belluno",
+    "ITD34": "Treviso", "ITD35": "Venezia", "ITD36": "Padova", "ITD37": "Rovigo",
+    "ITD41": "Pordenone", "ITD42": "Udine", "ITD43": "Gorizia", "ITD44": "Trieste",
+    "ITD51": "Piacenza", "ITD52": "Parma", "ITD53": "Reggio nell'Emilia",
+    "ITD54": "Modena", "ITD55": "Bologna", "ITD56": "Ferrara",
+    "ITD57": "Ravenna", "ITD58": "Forlì-Cesena", "ITD59": "Rimini",
+    "ITE11": "Massa-Carrara", "ITE12": "Lucca", "ITE13": "Pistoia",
+    "ITE14": "Firenze", "ITE15": "Prato", "ITE16": "Livorno",
+    "ITE17": "Pisa", "ITE18": "Arezzo", "ITE19": "Siena", "ITE1A": "Grosseto",
+    "ITE21": "Perugia", "ITE22": "Terni",
+    "ITE31": "Pesaro e Urbino", "ITE32": "Ancona", "ITE33": "Macerata",
+    "ITE34": "Ascoli Piceno",
+    "ITE41": "Viterbo", "ITE42": "Rieti", "ITE43": "Roma",
+    "ITE44": "Latina", "ITE45": "Frosinone",
+    "ITF11": "L'Aquila", "ITF12": "Teramo", "ITF13": "Pescara", "ITF14": "Chieti",
+    "ITF21": "Isernia", "ITF22": "Campobasso",
+    "ITF31": "Caserta", "ITF32": "Benevento", "ITF33": "Napoli",
+    "ITF34": "Avellino", "ITF35": "Salerno",
+    "ITF41": "Foggia", "ITF42": "Bari", "ITF43": "Taranto",
+    "ITF44": "Brindisi", "ITF45": "Lecce",
+    "ITF51": "Potenza", "ITF52": "Matera",
+    "ITF61": "Cosenza", "ITF62": "Crotone", "ITF63": "Catanzaro",
+    "ITF64": "Vibo Valentia", "ITF65": "Reggio di Calabria",
+    "ITG11": "Trapani", "ITG12": "Palermo", "ITG13": "Messina",
+    "ITG14": "Agrigento", "ITG15": "Caltanissetta", "ITG16": "Enna",
+    "ITG17": "Catania", "ITG18": "Ragusa", "ITG19": "Siracusa",
+    "ITG25": "Sassari", "ITG26": "Nuoro", "ITG27": "Cagliari",
+    "ITG28": "Oristano",
+    "IT108": "Monza e della Brianza", "IT109": "Fermo",
+    "IT110": "Barletta-Andria-Trani", "IT111": "Sud Sardegna",
+}
+
+# Province con codice ISTAT fuori dalla codifica NUTS3 -> regione NUTS2
+# 108=MB, 109=FM, 110=BT (create 2009), 111=SU (2016)
+PROVINCE_SPECIALI = {
+    "IT108": "ITC4",  # Monza e della Brianza
+    "IT109": "ITE3",  # Fermo
+    "IT110": "ITF4",  # Barletta-Andria-Trani
+    "IT111": "ITG2",  # Sud Sardegna
+}
+
+# Codice ISTAT provincia (prime 3 cifre del codice comune PRO_COM) -> NUTS3
+# Assetto 2017+: 104-107 (vecchie province sarde) non sono piu' in uso
+PROVINCE_ISTAT_TO_NUTS3 = {
+    "001": "ITC11", "002": "ITC12", "003": "ITC15", "004": "ITC16", "005": "ITC17",
+    "006": "ITC18", "007": "ITC20", "008": "ITC31", "009": "ITC32", "010": "ITC33",
+    "011": "ITC34", "012": "ITC41", "013": "ITC42", "014": "ITC44", "015": "ITC45",
+    "016": "ITC46", "017": "ITC47", "018": "ITC48", "019": "ITC4A", "020": "ITC4B",
+    "021": "ITD10", "022": "ITD20", "023": "ITD31", "024": "ITD32", "025": "ITD33",
+    "026": "ITD34", "027": "ITD35", "028": "ITD36", "029": "ITD37", "030": "ITD42",
+    "031": "ITD43", "032": "ITD44", "033": "ITD51", "034": "ITD52", "035": "ITD53",
+    "036": "ITD54", "037": "ITD55", "038": "ITD56", "039": "ITD57", "040": "ITD58",
+    "041": "ITE31", "042": "ITE32", "043": "ITE33", "044": "ITE34", "045": "ITE11",
+    "046": "ITE12", "047": "ITE13", "048": "ITE14", "049": "ITE16", "050": "ITE17",
+    "051": "ITE18", "052": "ITE19", "053": "ITE1A", "054": "ITE21", "055": "ITE22",
+    "056": "ITE41", "057": "ITE42", "058": "ITE43", "059": "ITE44", "060": "ITE45",
+    "061": "ITF31", "062": "ITF32", "063": "ITF33", "064": "ITF34", "065": "ITF35",
+    "066": "ITF11", "067": "ITF12", "068": "ITF13", "069": "ITF14", "070": "ITF22",
+    "071": "ITF41", "072": "ITF42", "073": "ITF43", "074": "ITF44", "075": "ITF45",
+    "076": "ITF51", "077": "ITF52", "078": "ITF61", "079": "ITF63", "080": "ITF65",
+    "081": "ITG11", "082": "ITG12", "083": "ITG13", "084": "ITG14", "085": "ITG15",
+    "086": "ITG16", "087": "ITG17", "088": "ITG18", "089": "ITG19", "090": "ITG25",
+    "091": "ITG26", "092": "ITG27", "093": "ITD41", "094": "ITF21", "095": "ITG28",
+    "096": "ITC13", "097": "ITC43", "098": "ITC49", "099": "ITD59", "100": "ITE15",
+    "101": "ITF62", "102": "ITF64", "103": "ITC14",
+    "108": "IT108", "109": "IT109", "110": "IT110", "111": "IT111",
+}
+
+# Regioni "virtuali" = somma di codici NUTS2. Trentino-Alto Adige non ha codice
+# NUTS2 proprio (Bolzano ITD1 e Trento ITD2): nei dataset delitti e' ITD12
+TRENTINO_PARTS = ("ITD1", "ITD2")
+REGIONI_VIRTUALI = {"ITD12": TRENTINO_PARTS}
+REGIONI_VIRTUALI_NOMI = {"ITD12": "Trentino-Alto Adige"}
+
+
+def aggrega_virtuali(
+    df: pd.DataFrame,
+    definizioni: dict[str, tuple[str, ...]],
+    by: list[str],
+    agg: dict[str, str],
+    code_col: str = "REF_AREA",
+    nomi: dict[str, str] | None = None,
+    nome_col: str = "Territorio",
+) -> pd.DataFrame:
+    """Sostituisce i codici componenti con i territori virtuali che li sommano.
+
+    Tutte le definizioni e tutte le misure sono aggregate con una sola groupby
+    sulle righe dei componenti; le righe degli altri codici restano invariate.
+
+    Args:
+        df: frame con colonna code_col.
+        definizioni: {codice virtuale: codici componenti}, es. REGIONI_VIRTUALI.
+        by: chiavi che restano distinte oltre al codice (es. ["Anno"]).
+        agg: {misura: funzione di aggregazione}, es. {"Popolazione": "sum"}.
+        nomi: {codice virtuale: nome}, scritto in nome_col delle righe virtuali.
+
+    Returns:
+        Righe non componenti seguite dalle righe virtuali (colonne by, code_col,
+        misure ed eventualmente nome_col; le altre colonne restano vuote).
+    """
+    componenti = {code: virtuale for virtuale, codes in definizioni.items() for code in codes}
+    mask = df[code_col].isin(list(componenti))
+    virtuali = (
+        df.loc[mask, [*by, *agg]]
+        .assign(**{code_col: df.loc[mask, code_col].map(componenti).to_numpy(dtype=object)})
+        .groupby([code_col, *by], as_index=False, dropna=False, observed=True)
+        .agg(agg)
+    )
+    if nomi is not None:
+        virtuali[nome_col] = virtuali[code_col].map(nomi)
+    return pd.concat([df[~mask], virtuali], ignore_index=True)
+
+
+class TerritoryIndex:
+    """Codice -> (livello, padre, nome) in array allineati, con lookup vettoriali."""
+
+    def __init__(self, entries: dict[str, tuple[str, str | None, str]]):
+        self.codes = pd.Index(list(entries), dtype=object)
+        self.level = np.array([e[0] for e in entries.values()], dtype=object)
+        self.parent = np.array([e[1] for e in entries.values()], dtype=object)
+        self.name = np.array([e[2] for e in entries.values()], dtype=object)
+
+    @classmethod
+    def build(cls) -> "TerritoryIndex":
+        """Costruisce l'indice dalle tabelle del modulo."""
+        entries: dict[str, tuple[str, str | None, str]] = {"IT": ("italia", None, "Italia")}
+        for code, nome in NUTS1_NAMES.items():
+            entries[code] = ("ripartizione", "IT", nome)
+        for code, nome in NUTS2_NAMES.items():
+            entries[code] = ("regione", code[:3], nome)
+        for code, nome in NUTS3_DISPLAY_NAMES.items():
+            entries[code] = ("provincia", PROVINCE_SPECIALI.get(code, code[:4]), nome)
+        return cls(entries)
+
+    def _resolve(self, ref_area) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Risolve ref_area per valori unici.
+
+        Returns:
+            (codici fattorizzati, {"code", "level", "parent", "name"}) dove ogni
+            array ha un elemento per valore unico piu' uno finale vuoto, su cui
+            cadono i NaN (codice -1): array[codici] riespande alla lunghezza di ref_area.
+        """
+        values = ref_area.array if isinstance(ref_area, (pd.Series, pd.Index)) else ref_area
+        if isinstance(values, pd.Categorical):
+            # Colonna categorica: i codici interi ci sono gia', si risolvono solo le categorie
+            codes = np.asarray(values.codes)
+            uniques = values.categories.to_numpy(dtype=object)
+        else:
+            codes, uniques = pd.factorize(pd.Series(ref_area).to_numpy(dtype=object))
+        pos = self.codes.get_indexer(uniques)
+        found = pos >= 0
+
+        n = len(uniques)
+        cols = {key: np.full(n + 1, None, dtype=object) for key in ("code", "level", "parent", "name")}
+        cols["code"][:n] = uniques
+        cols["level"][:n][found] = self.level[pos[found]]
+        cols["parent"][:n][found] = self.parent[pos[found]]
+        cols["name"][:n][found] = self.name[pos[found]]
+
+        # Regola strutturale per i codici non in tabella (solo i valori unici)
+        for i in np.flatnonzero(~found):
+            code = str(uniques[i])
+            if len(code) >= 5 and code.startswith("IT"):
+                cols["level"][i], cols["parent"][i] = "provincia", code[:4]
+        return codes, cols
+
+    def livello(self, ref_area) -> np.ndarray:
+        """Livello (italia/ripartizione/regione/provincia) per codice, None se sconosciuto."""
+        codes, cols = self._resolve(ref_area)
+        return cols["level"][codes]
+
+    def nome(self, ref_area) -> np.ndarray:
+        """Nome del territorio per codice, None se non in tabella."""
+        codes, cols = self._resolve(ref_area)
+        return cols["name"][codes]
+
+    @staticmethod
+    def _region_codes(cols: dict[str, np.ndarray]) -> np.ndarray:
+        return np.where(
+            cols["level"] == "regione", cols["code"],
+            np.where(cols["level"] == "provincia", cols["parent"], None),
+        )
+
+    def regione(self, ref_area) -> np.ndarray:
+        """Codice NUTS2 della regione: se stesso per le regioni, il padre per le province."""
+        codes, cols = self._resolve(ref_area)
+        return self._region_codes(cols)[codes]
+
+    def nome_regione(
+        self, ref_area, names: dict[str, str] = NUTS2_NAMES, default: str | None = None,
+    ) -> np.ndarray:
+        """Nome della regione di appartenenza (vedi regione()).
+
+        Se la regione non e' in names ritorna default, o il codice regione se default e' None.
+        """
+        codes, cols = self._resolve(ref_area)
+        region_names = np.array([
+            names.get(r, r if default is None else default) if r is not None else default
+            for r in self._region_codes(cols)
+        ], dtype=object)
+        return region_names[codes]
+
+    def is_nuts2(self, ref_area) -> np.ndarray:
+        """True per i codici regione NUTS2."""
+        return self.livello(ref_area) == "regione"
+
+    def is_nuts3(self, ref_area) -> np.ndarray:
+        """True per le province (NUTS3 o codice speciale)."""
+        return self.livello(ref_area) == "provincia"
+
+
+TERRITORI = TerritoryIndex.build()
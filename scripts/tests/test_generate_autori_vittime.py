@@ -0,0 +1,302 @@
+"""
+Test per le metriche autori/vittime (generate_autori_vittime.py).
+
+Esecuzione: python -m pytest scripts/tests/test_generate_autori_vittime.py -v
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_autori_vittime import (
+    REGIONI_COLONNARE,
+    _unify_stalk_cp612bis,
+    colonnare,
+    compute_metrics,
+    metrics_records,
+    process_all,
+    read_autvittps,
+)
+
+KEYS = ["REF_AREA", "TYPE_CRIME", "TIME_PERIOD"]
+
+
+def _extract_metrics(df: pd.DataFrame) -> dict:
+    """Riferimento scalare di compute_metrics: metriche di un singolo gruppo.
+
+    E' l'implementazione per sottoinsieme che compute_metrics ha sostituito,
+    tenuta qui solo come oracolo per i test di equivalenza (strutture ISTAT
+    2022+ e 2007-2021: vedi la docstring di compute_metrics).
+    """
+    sex9 = df[df["SEX"] == "9"]
+
+    # Totale: preferisci CITIZENSHIP=TOTAL, fallback su FRG+ITL
+    totale_direct = sex9[
+        (sex9["AGE"] == "TOTAL") & (sex9["CITIZENSHIP"] == "TOTAL")
+    ]["OBS_VALUE"].sum()
+
+    if totale_direct > 0:
+        totale = totale_direct
+    else:
+        # Fallback: somma italiani + stranieri
+        italiani = sex9[
+            (sex9["AGE"] == "TOTAL") & (sex9["CITIZENSHIP"] == "ITL")
+        ]["OBS_VALUE"].sum()
+        stranieri_val = sex9[
+            (sex9["AGE"] == "TOTAL") & (sex9["CITIZENSHIP"] == "FRG")
+        ]["OBS_VALUE"].sum()
+        totale = italiani + stranieri_val
+
+    stranieri = sex9[
+        (sex9["AGE"] == "TOTAL") & (sex9["CITIZENSHIP"] == "FRG")
+    ]["OBS_VALUE"].sum()
+
+    # Minori: potrebbe non esistere per tutti gli anni/reati
+    minori_direct = sex9[
+        (sex9["AGE"] == "Y_UN17") & (sex9["CITIZENSHIP"] == "TOTAL")
+    ]["OBS_VALUE"].sum()
+
+    if minori_direct > 0:
+        minori = minori_direct
+    else:
+        # Fallback: somma minori FRG + ITL
+        minori_frg = sex9[
+            (sex9["AGE"] == "Y_UN17") & (sex9["CITIZENSHIP"] == "FRG")
+        ]["OBS_VALUE"].sum()
+        minori_itl = sex9[
+            (sex9["AGE"] == "Y_UN17") & (sex9["CITIZENSHIP"] == "ITL")
+        ]["OBS_VALUE"].sum()
+        minori = minori_frg + minori_itl  # 0 se nessuna delle due esiste
+
+    # Maschi (SEX=1) e femmine (SEX=2): hanno CITIZENSHIP=TOTAL anche pre-2022
+    maschi = df[
+        (df["SEX"] == "1") & (df["AGE"] == "TOTAL") & (df["CITIZENSHIP"] == "TOTAL")
+    ]["OBS_VALUE"].sum()
+    femmine = df[
+        (df["SEX"] == "2") & (df["AGE"] == "TOTAL") & (df["CITIZENSHIP"] == "TOTAL")
+    ]["OBS_VALUE"].sum()
+
+    result = {
+        "totale": int(totale),
+        "stranieri": int(stranieri),
+        "minori": int(minori),
+        "maschi": int(maschi),
+        "femmine": int(femmine),
+        "pct_stranieri": round(stranieri / totale * 100, 1) if totale > 0 else 0,
+        "pct_maschi": round(maschi / totale * 100, 1) if totale > 0 and maschi > 0 else None,
+        "pct_femmine": round(femmine / totale * 100, 1) if totale > 0 and femmine > 0 else None,
+    }
+    # pct_minori solo se il dato minori e' disponibile
+    if minori > 0:
+        result["pct_minori"] = round(minori / totale * 100, 1) if totale > 0 else 0
+    else:
+        result["pct_minori"] = None
+
+    return result
+
+
+def _rows(ref_area: str, crime: str, anno: int, celle: dict) -> list[dict]:
+    """celle: {(SEX, AGE, CITIZENSHIP): OBS_VALUE}."""
+    return [
+        {"REF_AREA": ref_area, "TYPE_CRIME": crime, "TIME_PERIOD": anno,
+         "SEX": sex, "AGE": age, "CITIZENSHIP": cit, "OBS_VALUE": float(val)}
+        for (sex, age, cit), val in celle.items()
+    ]
+
+
+def _df() -> pd.DataFrame:
+    rows = [
+        # 2022+: matrice completa
+        *_rows("IT", "TOT", 2022, {
+            ("9", "TOTAL", "TOTAL"): 818832, ("9", "TOTAL", "FRG"): 270567,
+            ("9", "TOTAL", "ITL"): 548265, ("9", "Y_UN17", "TOTAL"): 30000,
+            ("1", "TOTAL", "TOTAL"): 700000, ("2", "TOTAL", "TOTAL"): 118832,
+            ("9", "Y14-17", "TOTAL"): 12345,     # cella non usata
+        }),
+        # pre-2022: niente CITIZENSHIP=TOTAL, minori solo per cittadinanza
+        *_rows("IT", "TOT", 2015, {
+            ("9", "TOTAL", "FRG"): 300, ("9", "TOTAL", "ITL"): 700,
+            ("9", "Y_UN17", "FRG"): 20, ("9", "Y_UN17", "ITL"): 13,
+            ("1", "TOTAL", "TOTAL"): 900,
+        }),
+        # minori assenti, femmine assenti
+        *_rows("ITC1", "THEFT", 2015, {("9", "TOTAL", "TOTAL"): 7, ("1", "TOTAL", "TOTAL"): 7}),
+        # solo minori: totale 0
+        *_rows("ITC1", "RAPE", 2023, {("9", "Y_UN17", "TOTAL"): 3}),
+        # righe duplicate per la stessa cella vengono sommate
+        *_rows("ITC11", "THEFT", 2023, {("9", "TOTAL", "TOTAL"): 5, ("2", "TOTAL", "TOTAL"): 2}),
+        *_rows("ITC11", "THEFT", 2023, {("9", "TOTAL", "TOTAL"): 6}),
+    ]
+    return pd.DataFrame(rows)
+
+
+def _records(df: pd.DataFrame) -> dict[tuple, dict]:
+    metrics = compute_metrics(df, KEYS)
+    return dict(zip(map(tuple, metrics[KEYS].to_numpy().tolist()), metrics_records(metrics)))
+
+
+# ============================================================
+# compute_metrics
+# ============================================================
+
+class TestComputeMetrics:
+    def test_equivalente_al_riferimento_scalare(self):
+        df = _df()
+        got = _records(df)
+        expected = {key: _extract_metrics(group) for key, group in df.groupby(KEYS)}
+        assert got == expected
+
+    def test_fallback_cittadinanza(self):
+        metrics = compute_metrics(_df(), KEYS).set_index(KEYS)
+        row = metrics.loc[("IT", "TOT", 2015)]
+        assert row["totale"] == 1000
+        assert row["minori"] == 33
+        assert row["pct_minori"] == 3.3
+        assert np.isnan(row["pct_femmine"])
+
+    def test_pct_none_e_zero(self):
+        records = _records(_df())
+        assert records[("ITC1", "THEFT", 2015)]["pct_minori"] is None
+        assert records[("ITC1", "RAPE", 2023)]["totale"] == 0
+        assert records[("ITC1", "RAPE", 2023)]["pct_minori"] == 0
+        assert isinstance(records[("ITC11", "THEFT", 2023)]["totale"], int)
+
+    def test_ordinato_per_chiavi(self):
+        metrics = compute_metrics(_df(), ["TIME_PERIOD", "REF_AREA"])
+        assert list(metrics["TIME_PERIOD"]) == [2015, 2015, 2022, 2023, 2023]
+
+    def test_somme_oltre_2_24_esatte(self):
+        # Celle float32 esatte, ma la loro somma supera 2^24: va fatta in float64
+        celle = [{"REF_AREA": "IT", "SEX": "9", "AGE": "TOTAL", "CITIZENSHIP": "TOTAL", "OBS_VALUE": v}
+                 for v in (16_777_215.0, 2.0)]
+        df = pd.DataFrame(celle).astype({"OBS_VALUE": np.float32})
+        assert metrics_records(compute_metrics(df, ["REF_AREA"]))[0]["totale"] == 16_777_217
+
+    def test_frame_vuoto(self):
+        metrics = compute_metrics(_df().iloc[:0], KEYS)
+        assert metrics.empty
+        assert metrics_records(metrics) == []
+
+
+# ============================================================
+# read_autvittps
+# ============================================================
+
+HEADER = "DATAFLOW;REF_AREA;DATA_TYPE;TYPE_CRIME;SEX;AGE;CITIZENSHIP;TIME_PERIOD;OBS_VALUE;OBS_STATUS"
+
+
+def _write_csv(path: Path, rows: list[tuple[str, str, str, int, float]]) -> Path:
+    """rows: (REF_AREA, TYPE_CRIME, CITIZENSHIP, TIME_PERIOD, OBS_VALUE)."""
+    lines = [HEADER] + [
+        f"IT1:73_7;{ref};OFFEND;{crime};9;TOTAL;{cit};{anno};{val};"
+        for ref, crime, cit, anno, val in rows
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+class TestReadAutvittps:
+    def _read(self, tmp_path):
+        path = _write_csv(tmp_path / "autvittps_7.csv", [
+            ("IT", "THEFT", "TOTAL", 2022, 10.0),
+            ("ITC1", "XYZ", "TOTAL", 2022, 5.0),     # non richiesto: scartato
+            ("ITC1", "STALK", "FRG", 2021, 3.0),
+            ("IT", "CP612BIS", "TOTAL", 2022, 8.0),
+            ("IT", "STALK", "TOTAL", 2022, 8.0),      # overlap con CP612BIS
+            ("ITC11", "ARSON", "ITL", 2023, 2.0),
+        ])
+        return read_autvittps(path, {"THEFT", "STALK", "CP612BIS", "ARSON"}, chunk_rows=2)
+
+    def test_tipi_e_filtro(self, tmp_path):
+        df = self._read(tmp_path)
+        assert len(df) == 5
+        assert df["TYPE_CRIME"].dtype == "category"
+        assert df["TIME_PERIOD"].dtype == "int16"
+        assert df["OBS_VALUE"].dtype == "float32"
+        assert list(df["TYPE_CRIME"].cat.categories) == ["ARSON", "CP612BIS", "STALK", "THEFT"]
+        assert list(df["REF_AREA"].cat.categories) == ["IT", "ITC1", "ITC11"]
+
+    def test_unificazione_stalk(self, tmp_path):
+        df = _unify_stalk_cp612bis(self._read(tmp_path))
+        assert list(df["TYPE_CRIME"].cat.categories) == ["ARSON", "CP612BIS", "THEFT"]
+        cp = df[df["TYPE_CRIME"] == "CP612BIS"]
+        assert sorted(zip(cp["REF_AREA"], cp["TIME_PERIOD"])) == [("IT", 2022), ("ITC1", 2021)]
+        assert len(df) == 4
+
+
+# ============================================================
+# process_all
+# ============================================================
+
+class TestProcessAll:
+    def _project(self, tmp_path):
+        raw_dir = tmp_path / "data" / "raw" / "autvittps"
+        raw_dir.mkdir(parents=True)
+        for name, scala in (("autvittps_7.csv", 1), ("autvittps_8.csv", 10)):
+            _write_csv(raw_dir / name, [
+                ("IT", "THEFT", "TOTAL", 2021, 100.0 * scala),
+                ("IT", "THEFT", "TOTAL", 2022, 120.0 * scala),
+                ("IT", "TOT", "TOTAL", 2022, 500.0 * scala),
+                ("ITC1", "THEFT", "TOTAL", 2022, 30.0 * scala),
+                ("ITC11", "THEFT", "TOTAL", 2022, 20.0 * scala),
+            ])
+        return tmp_path
+
+    def test_parallelo_uguale_a_seriale(self, tmp_path):
+        project = self._project(tmp_path)
+        popolazione = pd.DataFrame({"REF_AREA": ["ITC1"], "Anno": [2022], "Popolazione": [4_000_000]})
+        seriale = process_all(project, {}, popolazione, jobs=1)
+        parallelo = process_all(project, {}, popolazione, jobs=2)
+        assert parallelo == seriale
+
+    def test_ordine_offend_victim(self, tmp_path):
+        popolazione = pd.DataFrame({"REF_AREA": ["ITC1"], "Anno": [2022], "Popolazione": [4_000_000]})
+        records = process_all(self._project(tmp_path), {}, popolazione, jobs=2)
+        assert [r["data_type"] for r in records["trend"]] == ["OFFEND"] * 3 + ["VICTIM"] * 3
+        assert [r["totale"] for r in records["province"]] == [20, 200]
+        assert [(r["anno"], r["tasso"]) for r in records["regioni"]] == [(2022, 0.8), (2022, 7.5)]
+
+
+# ============================================================
+# colonnare
+# ============================================================
+
+def _decodifica(json_col: dict) -> list[dict]:
+    """Come decodeColonnare in src/lib/colonnare.ts."""
+    colonne = {
+        name: col if isinstance(col, list) else [col["valori"][c] for c in col["codici"]]
+        for name, col in json_col["colonne"].items()
+    }
+    return [{name: values[i] for name, values in colonne.items()} for i in range(json_col["n"])]
+
+
+class TestColonnare:
+    RECORDS = [
+        {"data_type": "OFFEND", "regione": "Piemonte", "anno": 2022, "tasso": 12.5, "pct_minori": None},
+        {"data_type": "OFFEND", "regione": "Liguria", "anno": 2022, "tasso": None, "pct_minori": 3.1},
+        {"data_type": "VICTIM", "regione": "Piemonte", "anno": 2023, "tasso": 7.0, "pct_minori": None},
+    ]
+
+    def test_round_trip(self):
+        assert _decodifica(colonnare(self.RECORDS)) == self.RECORDS
+
+    def test_stringhe_a_dizionario(self):
+        colonne = colonnare(self.RECORDS)["colonne"]
+        assert colonne["regione"] == {"valori": ["Piemonte", "Liguria"], "codici": [0, 1, 0]}
+        assert colonne["anno"] == [2022, 2022, 2023]
+
+    def test_vuoto(self):
+        assert colonnare([]) == {"n": 0, "colonne": {}}
+
+    def test_file_pubblicati_allineati(self):
+        """Il JSON colonnare letto dai grafici decodifica esattamente il JSON a record."""
+        data_dir = Path(__file__).resolve().parents[2] / "public" / "data"
+        records = json.loads((data_dir / "autori_vittime_regioni.json").read_text(encoding="utf-8"))
+        compatto = json.loads((data_dir / REGIONI_COLONNARE).read_text(encoding="utf-8"))
+        assert _decodifica(compatto) == records
+
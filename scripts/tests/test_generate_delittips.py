@@ -0,0 +1,215 @@
+"""
+Test per il cubo condiviso degli output delitti (generate_delittips.py).
+
+Esecuzione: python -m pytest scripts/tests/test_generate_delittips.py -v
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generate_delittips
+from generate_delittips import (
+    FONTE_COL,
+    PROVINCE_REATI_DIR,
+    build_cubo,
+    build_dati,
+    build_matrice_province,
+    generate_province_reati_json,
+    load_delittips,
+    run_generators,
+    sezione_cubo,
+    sezione_tassonomia,
+    write_shard_regioni,
+)
+
+
+def _df() -> pd.DataFrame:
+    rows = [
+        ("IT", "TOT", 2023, 1000), ("IT", "RAPE", 2023, 10),
+        ("ITC1", "TOT", 2023, 300),
+        ("ITD1", "TOT", 2023, 40), ("ITD2", "TOT", 2023, 60), ("ITD1", "RAPE", 2023, 1),
+        ("ITC11", "TOT", 2023, 200),
+        ("ITC", "TOT", 2023, 500),     # ripartizione: non usata dagli output
+        ("ITZZZ", "TOT", 2023, 5),     # provincia senza popolazione: scartata
+    ]
+    return pd.DataFrame(rows, columns=["REF_AREA", "TYPE_CRIME", "Anno", "Delitti"])
+
+
+def _pop() -> pd.DataFrame:
+    rows = [
+        ("IT", "Italia", 59_000, "italia"),
+        ("ITC1", "Piemonte", 4_250, "regione"),
+        ("ITD1", "Bolzano", 530, "regione"),
+        ("ITD2", "Trento", 540, "regione"),
+        ("ITC11", "Torino", 2_200, "provincia"),
+    ]
+    pop = pd.DataFrame(rows, columns=["REF_AREA", "Territorio", "Popolazione", "livello"])
+    pop["Anno"] = 2023
+    pop[FONTE_COL] = pd.Categorical(
+        ["osservata", "osservata", "osservata", "interpolata", "osservata"],
+        categories=["osservata", "interpolata", "estrapolata"], ordered=True,
+    )
+    return pop
+
+
+class TestBuildCubo:
+    def test_livelli(self):
+        cubo = build_cubo(_df(), _pop())
+        assert list(cubo.index.names) == ["livello", "REF_AREA", "TYPE_CRIME", "Anno"]
+        assert set(cubo.index.get_level_values("livello")) == {"italia", "regione", "provincia"}
+        assert "ITC" not in cubo.index.get_level_values("REF_AREA")
+        assert "ITZZZ" not in cubo.index.get_level_values("REF_AREA")
+
+    def test_trentino_aggregato(self):
+        cubo = build_cubo(_df(), _pop())
+        row = cubo.loc[("regione", "ITD12", "TOT", 2023)]
+        assert row["Delitti"] == 100
+        assert row["Popolazione"] == 1_070
+        assert row["Territorio"] == "Trentino-Alto Adige"
+        assert row[FONTE_COL] == "interpolata"
+        regioni = set(cubo.loc["regione"].index.get_level_values("REF_AREA"))
+        assert regioni == {"ITC1", "ITD12"}
+
+    def test_popolazione_unita(self):
+        cubo = build_cubo(_df(), _pop())
+        assert cubo.loc[("provincia", "ITC11", "TOT", 2023), "Popolazione"] == 2_200
+        assert (cubo.loc["italia", "Popolazione"] == 59_000).all()
+
+
+class TestSezioneCubo:
+    def test_filtro_crimini(self):
+        cubo = build_cubo(_df(), _pop())
+        assert list(sezione_cubo(cubo, "italia", "TOT")["Delitti"]) == [1000]
+        assert sorted(sezione_cubo(cubo, "italia")["TYPE_CRIME"]) == ["RAPE", "TOT"]
+        part = sezione_cubo(cubo, "regione", {"RAPE": "Violenze sessuali"})
+        assert list(part[["REF_AREA", "Delitti"]].itertuples(index=False, name=None)) == [("ITD12", 1)]
+
+
+def _df_province() -> pd.DataFrame:
+    rows = [
+        ("ITC11", "TOT", 2023, 200), ("ITC11", "TOT", 2024, 210), ("ITC11", "RAPE", 2024, 3),
+        ("ITC12", "TOT", 2024, 50),
+    ]
+    return pd.DataFrame(rows, columns=["REF_AREA", "TYPE_CRIME", "Anno", "Delitti"])
+
+
+def _pop_province() -> pd.DataFrame:
+    rows = [
+        ("ITC11", "Torino", 2023, 2_000_000), ("ITC11", "Torino", 2024, 2_100_000),
+        ("ITC12", "Vercelli", 2024, 100_000),
+    ]
+    pop = pd.DataFrame(rows, columns=["REF_AREA", "Territorio", "Anno", "Popolazione"])
+    pop["livello"] = "provincia"
+    pop[FONTE_COL] = "osservata"
+    return pop
+
+
+class TestBuildDati:
+    def test_tassonomie_per_livello(self):
+        tassonomie = {"allarme": {"RAPE": "Violenze sessuali"}, "tutto": {"RAPE": "X", "TOT": "X"}}
+        dati = build_dati(_df(), _pop(), tassonomie)
+        allarme = sezione_tassonomia(dati, "allarme", "regione")
+        assert allarme[["REF_AREA", "Categoria", "Delitti", "Popolazione"]].values.tolist() == [
+            ["ITD12", "Violenze sessuali", 1, 1_070],
+        ]
+        tutto = sezione_tassonomia(dati, "tutto", "italia")
+        assert tutto["Delitti"].tolist() == [1010]
+
+
+class TestMatriceProvince:
+    def test_cubo_denso(self):
+        matrice = build_matrice_province(build_cubo(_df_province(), _pop_province()))
+        assert matrice.province.tolist() == ["ITC11", "ITC12"]
+        assert matrice.territori.tolist() == ["Torino", "Vercelli"]
+        assert matrice.reati.tolist() == ["RAPE", "TOT"]
+        assert matrice.anni.tolist() == [2023, 2024]
+        assert matrice.delitti.shape == (2, 2, 2)
+        assert matrice.delitti[0, 1].tolist() == [200, 210]
+        assert np.isnan(matrice.delitti[1, 0]).all()
+        assert np.isnan(matrice.popolazione[1, 0])
+        assert matrice.tasso_per_100k()[0, 1, 0] == 10.0
+
+    def test_shard_per_provincia(self, tmp_path):
+        generate_province_reati_json(build_dati(_df_province(), _pop_province()), tmp_path)
+        out_dir = tmp_path / "public" / "data" / PROVINCE_REATI_DIR
+        index = json.loads((out_dir / "index.json").read_text(encoding="utf-8"))
+        assert [p["file"] for p in index["Province"]] == ["ITC11.json", "ITC12.json"]
+        assert index["Reati"][1] == {"codice": "TOT", "Reato": "Totale delitti"}
+
+        shard = json.loads((out_dir / "ITC12.json").read_text(encoding="utf-8"))
+        assert shard["Regione"] == "Piemonte"
+        assert shard["Popolazione"] == [None, 100_000]
+        assert shard["Delitti"] == [[None, None], [None, 50]]
+        assert shard["Tasso_per_100k"] == [[None, None], [None, 50.0]]
+
+
+class TestShardRegioni:
+    def test_uno_shard_per_regione(self, tmp_path):
+        result = pd.DataFrame({
+            "REF_AREA": ["ITC11", "ITC12", "ITD10", "ITC11"],
+            "Reato": ["Rapine", "Rapine", "Rapine", "Violenze sessuali"],
+            "Regione": ["Piemonte", "Piemonte", "Provincia Autonoma Bolzano / Bozen", "Piemonte"],
+            "Delitti": [1, 2, 3, 4],
+        })
+        write_shard_regioni(result, tmp_path / "shard")
+        index = json.loads((tmp_path / "shard" / "index.json").read_text(encoding="utf-8"))
+        assert [r["file"] for r in index] == ["ITC1.json", "ITD1.json"]
+
+        piemonte = json.loads((tmp_path / "shard" / "ITC1.json").read_text(encoding="utf-8"))
+        assert [r["Delitti"] for r in piemonte] == [1, 2, 4]
+        assert piemonte[0] == result.iloc[0].to_dict()
+
+
+def _scrivi_totale(dati, project_root: Path) -> None:
+    (project_root / "totale.txt").write_text(str(dati.cubo["Delitti"].sum()))
+
+
+def _scrivi_righe(dati, project_root: Path) -> None:
+    (project_root / "righe.txt").write_text(str(len(dati.cubo)))
+
+
+class TestRunGenerators:
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_dati_condivisi_e_tempi(self, tmp_path, monkeypatch, jobs):
+        monkeypatch.setattr(generate_delittips, "GENERATORS", (_scrivi_totale, _scrivi_righe))
+        dati = build_dati(_df(), _pop())
+        cubo = dati.cubo
+        tempi = run_generators(dati, tmp_path, jobs=jobs)
+        assert list(tempi) == ["_scrivi_totale", "_scrivi_righe"]
+        assert all(t >= 0 for t in tempi.values())
+        assert (tmp_path / "totale.txt").read_text() == str(cubo["Delitti"].sum())
+        assert (tmp_path / "righe.txt").read_text() == str(len(cubo))
+        assert generate_delittips._DATI is None
+
+
+class TestLoadDelittips:
+    HEADER = "REF_AREA;TYPE_CRIME;Y_KNOWN_OFFENDER_IDEN;REFERENCE_PERIOD_CRIME;DATA_TYPE;TIME_PERIOD;OBS_VALUE"
+
+    def _raw(self, tmp_path: Path, righe: list[str]) -> Path:
+        raw_dir = tmp_path / "data" / "raw" / "delittips"
+        raw_dir.mkdir(parents=True)
+        (raw_dir / "delittips_1.csv").write_text("\n".join([self.HEADER, *righe]) + "\n", encoding="utf-8")
+        return tmp_path
+
+    def test_filtri_a_blocchi(self, tmp_path):
+        project = self._raw(tmp_path, [
+            "IT;TOT;9;YRDUR;CRIMEN;2023;1000",
+            "IT;TOT;1;YRDUR;CRIMEN;2023;400",       # autore noto: escluso
+            "ITC1;RAPE;9;YRDUR;CRIMEN;2024;",       # valore mancante -> 0
+        ])
+        df = load_delittips(project, chunk_rows=1)
+        assert df[["REF_AREA", "Anno", "Delitti"]].values.tolist() == [["IT", 2023, 1000], ["ITC1", 2024, 0]]
+
+    def test_csv_senza_righe(self, tmp_path):
+        vuoto = load_delittips(self._raw(tmp_path, []))
+        pieno = load_delittips(self._raw(tmp_path / "pieno", ["IT;TOT;9;YRDUR;CRIMEN;2023;1000"]))
+        assert vuoto.empty
+        assert vuoto.dtypes.to_dict() == pieno.dtypes.to_dict()
+
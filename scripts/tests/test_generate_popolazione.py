@@ -0,0 +1,238 @@
+"""
+Test per le funzioni di generate_popolazione.py.
+
+Testa il parsing dei file intercensuaria su file sintetici minimali.
+Esecuzione: python -m pytest scripts/tests/test_generate_popolazione.py -v
+"""
+
+import shutil
+import sys
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from generate_popolazione import (
+    CACHE_SALT_MODULES,
+    age_band,
+    cache_salt,
+    classify_popres1,
+    classify_territory,
+    iter_intercensuaria_blocks,
+    load_intercensuaria_province,
+    parse_intercensuaria_blocks,
+    parse_intercensuaria_eta,
+)
+from raw_cache import SourceCache
+
+
+def _block(nome: str, totali: list[int], anni: list[int]) -> list[str]:
+    """Blocco intercensuaria: tutte le cittadinanze + maschi, con righe eta' fittizie."""
+    header = "Età/Anno;" + ";".join(str(a) for a in anni)
+    eta = [f"{i};" + ";".join("1" for _ in anni) for i in range(3)]
+    return [
+        f'"Tutte le cittadinanze - {nome}"',
+        header,
+        "Età;Totale",
+        *eta,
+        "Totale;" + ";".join(str(t) for t in totali),
+        header,
+        "Età;Maschi",
+        *eta,
+        "Totale;" + ";".join(str(t // 2) for t in totali),
+        "",
+        f'"Cittadinanza italiana - {nome}"',
+        header,
+        "Età;Totale",
+        "Totale;" + ";".join("7" for _ in anni),
+    ]
+
+
+def _write(tmp_path: Path, lines: list[str]) -> Path:
+    path = tmp_path / "pop.csv"
+    path.write_text(
+        '"Popolazione per età"\n\n' + "\n".join(lines) + "\n", encoding="utf-8"
+    )
+    return path
+
+
+# ===================================================================
+# iter_intercensuaria_blocks / parse_intercensuaria_blocks
+# ===================================================================
+
+class TestParseIntercensuaria:
+    def test_primo_totale_per_blocco(self, tmp_path):
+        anni = [2017, 2018, 2019]
+        path = _write(
+            tmp_path,
+            _block("Regione: Piemonte", [100, 110, 120], anni)
+            + _block("Regione: Liguria", [50, 55, 60], anni),
+        )
+        blocks = parse_intercensuaria_blocks(path, [2017, 2018])
+        assert blocks == [
+            {"nome_blocco": "Tutte le cittadinanze - Regione: Piemonte", 2017: 100, 2018: 110},
+            {"nome_blocco": "Tutte le cittadinanze - Regione: Liguria", 2017: 50, 2018: 55},
+        ]
+
+    def test_anno_assente(self, tmp_path):
+        path = _write(tmp_path, _block("Italia", [10, 20], [2017, 2018]))
+        blocks = parse_intercensuaria_blocks(path, [2016, 2018])
+        assert blocks == [{"nome_blocco": "Tutte le cittadinanze - Italia", 2018: 20}]
+
+    def test_file_vuoto(self, tmp_path):
+        path = _write(tmp_path, [])
+        assert parse_intercensuaria_blocks(path, [2018]) == []
+
+    def test_streaming_primo_blocco(self, tmp_path):
+        anni = [2018]
+        # Il secondo blocco e' malformato: non deve essere letto se ci si ferma al primo
+        path = _write(
+            tmp_path,
+            _block("Provincia: Bari", [1000], anni)
+            + ['"Tutte le cittadinanze - Provincia: Rotta"', "Età/Anno;2018", "Totale;x"],
+        )
+        block = next(iter_intercensuaria_blocks(path, anni))
+        assert block == {"nome_blocco": "Tutte le cittadinanze - Provincia: Bari", 2018: 1000}
+
+
+# ===================================================================
+# load_intercensuaria_province
+# ===================================================================
+
+class TestLoadIntercensuariaProvince:
+    def _raw_dir(self, tmp_path: Path) -> Path:
+        prov_dir = tmp_path / "PopolazioneEta-SingolaArea-Province"
+        prov_dir.mkdir()
+        for nome, base in [("Torino", 2000), ("Bari", 1000), ("Sconosciuta", 5), ("Roma", 3000)]:
+            (prov_dir / f"PopolazioneEta-SingolaArea-Provincia_{nome}.csv").write_text(
+                "\n".join(_block(f"Provincia: {nome}", [base, base + 1], [2017, 2018])) + "\n",
+                encoding="utf-8",
+            )
+        return tmp_path
+
+    def test_seriale(self, tmp_path):
+        rows = load_intercensuaria_province(self._raw_dir(tmp_path), [2017, 2018])
+        assert [(r["REF_AREA"], r["Anno"], r["Popolazione"]) for r in rows] == [
+            ("ITF42", 2017, 1000), ("ITF42", 2018, 1001),
+            ("ITE43", 2017, 3000), ("ITE43", 2018, 3001),
+            ("ITC11", 2017, 2000), ("ITC11", 2018, 2001),
+        ]
+
+    def test_parallelo_uguale_a_seriale(self, tmp_path):
+        raw_dir = self._raw_dir(tmp_path)
+        seriale = load_intercensuaria_province(raw_dir, [2017, 2018])
+        parallelo = load_intercensuaria_province(raw_dir, [2017, 2018], workers=2)
+        assert parallelo == seriale
+
+    def test_archivio_zip_uguale_a_cartella(self, tmp_path):
+        raw_dir = self._raw_dir(tmp_path)
+        prov_dir = raw_dir / "PopolazioneEta-SingolaArea-Province"
+        da_cartella = load_intercensuaria_province(raw_dir, [2017, 2018])
+
+        with zipfile.ZipFile(raw_dir / "PopolazioneEta-SingolaArea-Province.zip", "w") as zf:
+            for path in prov_dir.glob("*.csv"):
+                zf.write(path, arcname=path.name)
+                path.unlink()
+
+        assert load_intercensuaria_province(raw_dir, [2017, 2018]) == da_cartella
+
+
+# ===================================================================
+# classify_popres1
+# ===================================================================
+
+class TestClassifyPopres1:
+    def test_equivalente_a_classify_territory(self):
+        codes = ["IT", "ITC", "ITC1", "ITC11", "IT111", "ITD1", "ITD10", "IT108", "ITG", "XX"]
+        df = pd.DataFrame({
+            "REF_AREA": codes * 2,
+            "Anno": [2019] * len(codes) + [2020] * len(codes),
+            "Popolazione": range(2 * len(codes)),
+        })
+        result = classify_popres1(df)
+
+        expected = [
+            (row.REF_AREA, *classify_territory(row.REF_AREA), row.Anno, row.Popolazione)
+            for row in df.itertuples()
+            if classify_territory(row.REF_AREA)[0] is not None
+        ]
+        actual = list(zip(
+            result["REF_AREA"], result["livello"], result["Territorio"],
+            result["Anno"], result["Popolazione"],
+        ))
+        assert actual == expected
+        assert list(result.columns) == ["REF_AREA", "Territorio", "Anno", "Popolazione", "livello"]
+
+    def test_nessun_territorio_valido(self):
+        df = pd.DataFrame({"REF_AREA": ["ITC", "ITF"], "Anno": [2019, 2019], "Popolazione": [1, 2]})
+        assert classify_popres1(df).empty
+
+
+# ===================================================================
+# Cubo eta' x sesso
+# ===================================================================
+
+class TestAgeBand:
+    def test_confini(self):
+        eta = np.array([0, 13, 14, 17, 18, 64, 65, 100])
+        assert list(age_band(eta)) == [
+            "Y_UN14", "Y_UN14", "Y14-17", "Y14-17", "Y18-24", "Y55-64", "Y_GE65", "Y_GE65",
+        ]
+
+    def test_ordinato(self):
+        assert age_band(np.array([5])).ordered
+
+
+class TestParseIntercensuariaEta:
+    def test_solo_maschi_femmine_tutte_cittadinanze(self, tmp_path):
+        lines = _block("Italia", [10, 20], [2017, 2018])
+        lines.insert(-4, "Età;Femmine")
+        lines.insert(-4, "100 e oltre;4;5")
+        df = parse_intercensuaria_eta(_write(tmp_path, lines), [2018])
+        assert set(df["SEX"]) == {1, 2}
+        assert list(df["Anno"].unique()) == [2018]
+        maschi = df[df["SEX"] == 1]
+        assert list(maschi["eta"]) == [0, 1, 2]
+        assert list(maschi["Popolazione"]) == [1, 1, 1]
+        femmine = df[df["SEX"] == 2]
+        assert list(femmine["eta"]) == [100]
+        assert list(femmine["Popolazione"]) == [5]
+
+    def test_file_vuoto(self, tmp_path):
+        df = parse_intercensuaria_eta(_write(tmp_path, []), [2018])
+        assert df.empty
+
+
+# ============================================================
+# cache_salt
+# ============================================================
+
+class TestCacheSalt:
+    def _scripts(self, tmp_path: Path) -> Path:
+        scripts_dir = tmp_path / "scripts"
+        scripts_dir.mkdir()
+        for name in CACHE_SALT_MODULES:
+            shutil.copy(Path(__file__).resolve().parent.parent / name, scripts_dir / name)
+        return scripts_dir
+
+    def test_stabile(self, tmp_path):
+        scripts_dir = self._scripts(tmp_path)
+        assert cache_salt(scripts_dir) == cache_salt(scripts_dir)
+
+    def test_nome_territorio_invalida_cache(self, tmp_path):
+        scripts_dir = self._scripts(tmp_path)
+        cache = SourceCache(tmp_path / "cache", salt=cache_salt(scripts_dir))
+        cache.put("province:2002-2018", "fp1", [{"REF_AREA": "ITC11", "Territorio": "Torino"}])
+        cache.save()
+
+        territori = scripts_dir / "territori.py"
+        source = territori.read_text(encoding="utf-8")
+        assert '"Torino"' in source
+        territori.write_text(source.replace('"Torino"', '"Torino (citta\' metropolitana)"', 1), encoding="utf-8")
+
+        reloaded = SourceCache(tmp_path / "cache", salt=cache_salt(scripts_dir))
+        assert reloaded.get("province:2002-2018", "fp1") == (False, None)
+
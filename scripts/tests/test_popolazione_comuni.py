@@ -0,0 +1,98 @@
+"""
+Test per l'importazione della popolazione comunale (popolazione_comuni.py).
+
+Esecuzione: python -m pytest scripts/tests/test_popolazione_comuni.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+pytest.importorskip("pyarrow")
+
+from popolazione_comuni import (
+    COMUNI_DIR,
+    confronta_aggregati,
+    ingest_popres1_comuni,
+    read_popolazione_comuni,
+)
+
+HEADER = "FREQ;REF_AREA;DATA_TYPE;SEX;AGE;TIME_PERIOD;OBS_VALUE"
+
+
+def _write_extract(path: Path, rows: list[tuple[str, int, int, int]]) -> Path:
+    """rows: (REF_AREA, SEX, TIME_PERIOD, OBS_VALUE)."""
+    lines = [HEADER] + [f"A;{ref};JAN;{sex};TOTAL;{anno};{val}" for ref, sex, anno, val in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def _estratto(tmp_path: Path) -> Path:
+    return _write_extract(tmp_path / "popres1_comuni.csv", [
+        ("001272", 9, 2023, 850_000),   # Torino (provincia 001 -> ITC11)
+        ("001272", 1, 2023, 410_000),   # solo maschi: escluso
+        ("001001", 9, 2023, 150_000),
+        ("001272", 9, 2024, 845_000),
+        ("001001", 9, 2024, 149_000),
+        ("007003", 9, 2024, 34_000),    # Aosta (007 -> ITC20)
+        ("ITC11", 9, 2024, 999),        # riga provinciale nello stesso file: esclusa
+        ("999001", 9, 2024, 1),         # provincia ISTAT sconosciuta: scartata
+    ])
+
+
+# ============================================================
+# ingest_popres1_comuni
+# ============================================================
+
+class TestIngestComuni:
+    def test_aggregato_provinciale(self, tmp_path):
+        province = ingest_popres1_comuni(_estratto(tmp_path), tmp_path / COMUNI_DIR, chunk_rows=3)
+        got = {(r.REF_AREA, r.Anno): r.Popolazione for r in province.itertuples()}
+        assert got == {
+            ("ITC11", 2023): 1_000_000,
+            ("ITC11", 2024): 994_000,
+            ("ITC20", 2024): 34_000,
+        }
+
+    def test_dataset_partizionato(self, tmp_path):
+        ingest_popres1_comuni(_estratto(tmp_path), tmp_path / COMUNI_DIR, chunk_rows=3)
+        assert sorted(p.name for p in (tmp_path / COMUNI_DIR).iterdir()) == ["Anno=2023", "Anno=2024"]
+
+        df = read_popolazione_comuni(tmp_path, anni=[2024])
+        assert sorted(df["PRO_COM"]) == ["001001", "001272", "007003"]
+        assert set(df["Anno"]) == {2024}
+        assert df["Popolazione"].sum() == 1_028_000
+
+    def test_riesecuzione_sovrascrive(self, tmp_path):
+        src = _estratto(tmp_path)
+        ingest_popres1_comuni(src, tmp_path / COMUNI_DIR, chunk_rows=3)
+        ingest_popres1_comuni(src, tmp_path / COMUNI_DIR, chunk_rows=100)
+        assert len(read_popolazione_comuni(tmp_path)) == 5
+
+
+# ============================================================
+# confronta_aggregati
+# ============================================================
+
+class TestConfrontaAggregati:
+    def test_livelli_e_differenze(self):
+        province = pd.DataFrame({
+            "REF_AREA": ["ITC11", "ITC12", "ITD10"],
+            "Anno": [2024, 2024, 2024],
+            "Popolazione": [100, 50, 30],
+        })
+        pop = pd.DataFrame({
+            "REF_AREA": ["IT", "ITC1", "ITD1", "ITC11", "ITC12", "ITD10"],
+            "Anno": 2024,
+            "Popolazione": [180, 150, 30, 100, 51, 30],
+            "livello": ["italia", "regione", "regione", "provincia", "provincia", "provincia"],
+        })
+        result = confronta_aggregati(province, pop).set_index("REF_AREA")
+        assert len(result) == 6
+        assert result.loc["ITC12", "Differenza"] == -1
+        assert result.loc["ITD1", "Popolazione_comuni"] == 30
+        assert (result.drop(index="ITC12")["Differenza"] == 0).all()
@@ -0,0 +1,97 @@
+"""
+Test per il completamento della popolazione (popolazione_interpolazione.py).
+
+Esecuzione: python -m pytest scripts/tests/test_popolazione_interpolazione.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from popolazione_interpolazione import FONTE_COL, complete_popolazione, fill_matrix
+
+
+def _pop(rows: list[tuple[str, int, int]]) -> pd.DataFrame:
+    return pd.DataFrame({
+        "REF_AREA": [r[0] for r in rows],
+        "Territorio": [f"Terr {r[0]}" for r in rows],
+        "Anno": [r[1] for r in rows],
+        "Popolazione": [r[2] for r in rows],
+        "livello": "regione",
+    }).astype({"Anno": "int16", "Popolazione": "int32"})
+
+
+# ============================================================
+# fill_matrix
+# ============================================================
+
+class TestFillMatrix:
+    def test_interpolazione_lineare(self):
+        values = np.array([[100.0, np.nan, np.nan, 400.0]])
+        filled, fonte = fill_matrix(values, np.array([2002, 2003, 2004, 2005]))
+        assert filled.tolist() == [[100.0, 200.0, 300.0, 400.0]]
+        assert fonte.tolist() == [[0, 1, 1, 0]]
+
+    def test_interpolazione_geometrica(self):
+        values = np.array([[100.0, np.nan, 400.0]])
+        filled, _ = fill_matrix(values, np.array([2002, 2003, 2004]), metodo="geometrica")
+        assert filled[0, 1] == pytest.approx(200.0)
+
+    def test_estrapolazione_limitata(self):
+        values = np.array([[100.0, 110.0, np.nan, np.nan]])
+        filled, fonte = fill_matrix(values, np.array([2020, 2021, 2022, 2023]), max_estrapolazione=1)
+        assert filled[0, 2] == pytest.approx(120.0)
+        assert np.isnan(filled[0, 3])
+        assert fonte.tolist() == [[0, 0, 2, -1]]
+
+    def test_estrapolazione_con_un_solo_osservato_costante(self):
+        values = np.array([[np.nan, 500.0, np.nan]])
+        filled, fonte = fill_matrix(values, np.array([2020, 2021, 2022]))
+        assert np.isnan(filled[0, 0])  # prima del primo osservato: non coperta
+        assert filled[0, 2] == 500.0
+        assert fonte.tolist() == [[-1, 0, 2]]
+
+    def test_righe_indipendenti(self):
+        values = np.array([[1.0, np.nan, 3.0], [10.0, 20.0, np.nan]])
+        filled, _ = fill_matrix(values, np.array([2000, 2001, 2002]))
+        assert filled.tolist() == [[1.0, 2.0, 3.0], [10.0, 20.0, 30.0]]
+
+    def test_metodo_non_valido(self):
+        with pytest.raises(ValueError):
+            fill_matrix(np.array([[1.0]]), np.array([2000]), metodo="spline")
+
+
+# ============================================================
+# complete_popolazione
+# ============================================================
+
+class TestCompletePopolazione:
+    def test_senza_buchi_invariato(self):
+        pop = _pop([("A", 2020, 100), ("A", 2021, 110)])
+        result = complete_popolazione(pop)
+        assert result["Popolazione"].tolist() == [100, 110]
+        assert (result[FONTE_COL] == "osservata").all()
+
+    def test_buco_e_anno_nuovo(self):
+        pop = _pop([("A", 2020, 100), ("A", 2022, 120), ("B", 2021, 50), ("B", 2022, 60)])
+        result = complete_popolazione(pop, years=[2023])
+        a = result[result["REF_AREA"] == "A"].set_index("Anno")
+        assert a.loc[2021, "Popolazione"] == 110
+        assert a.loc[2021, FONTE_COL] == "interpolata"
+        assert a.loc[2023, "Popolazione"] == 130
+        assert a.loc[2023, FONTE_COL] == "estrapolata"
+        b = result[result["REF_AREA"] == "B"]
+        assert 2020 not in b["Anno"].tolist()  # prima del primo osservato: omessa
+        assert b["Territorio"].unique().tolist() == ["Terr B"]
+
+    def test_tipi_preservati(self):
+        pop = _pop([("A", 2020, 100), ("A", 2022, 120)])
+        result = complete_popolazione(pop)
+        assert str(result["Anno"].dtype) == "int16"
+        assert str(result["Popolazione"].dtype) == "int32"
+        assert result[FONTE_COL].cat.ordered
@@ -0,0 +1,56 @@
+"""
+Test per la lettura tipizzata della popolazione (popolazione_io.py).
+
+Esecuzione: python -m pytest scripts/tests/test_popolazione_io.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from popolazione_io import (
+    POPOLAZIONE_ARROW,
+    POPOLAZIONE_CSV,
+    read_popolazione,
+    write_popolazione_sidecar,
+)
+
+
+def _write_csv(tmp_path: Path, pop_it: int = 59_000_000) -> pd.DataFrame:
+    df = pd.DataFrame({
+        "REF_AREA": ["IT", "ITC1", "ITC11"],
+        "Territorio": ["Italia", "Piemonte", "Torino"],
+        "Anno": [2024, 2024, 2024],
+        "Popolazione": [pop_it, 4_250_000, 2_200_000],
+        "livello": ["italia", "regione", "provincia"],
+    })
+    df.to_csv(tmp_path / POPOLAZIONE_CSV, index=False)
+    return df
+
+
+class TestReadPopolazione:
+    def test_sidecar_tipizzato(self, tmp_path):
+        df = _write_csv(tmp_path)
+        write_popolazione_sidecar(df, tmp_path)
+        pop = read_popolazione(tmp_path)
+        assert (tmp_path / POPOLAZIONE_ARROW).exists()
+        assert str(pop["Anno"].dtype) == "int16"
+        assert str(pop["Popolazione"].dtype) == "int32"
+        assert isinstance(pop["REF_AREA"].dtype, pd.CategoricalDtype)
+        assert list(pop["Popolazione"]) == list(df["Popolazione"])
+
+    def test_sidecar_uguale_a_csv(self, tmp_path):
+        df = _write_csv(tmp_path)
+        da_csv = read_popolazione(tmp_path)
+        write_popolazione_sidecar(df, tmp_path)
+        pd.testing.assert_frame_equal(read_popolazione(tmp_path), da_csv)
+
+    def test_csv_modificato_fallback(self, tmp_path):
+        df = _write_csv(tmp_path)
+        write_popolazione_sidecar(df, tmp_path)
+        _write_csv(tmp_path, pop_it=1)
+        pop = read_popolazione(tmp_path)
+        assert pop.loc[pop["REF_AREA"] == "IT", "Popolazione"].item() == 1
@@ -0,0 +1,81 @@
+"""
+Test per la cache dei file raw (raw_cache.py).
+
+Esecuzione: python -m pytest scripts/tests/test_raw_cache.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from raw_cache import SourceCache, cached, cached_frame, sha256_file
+
+
+class TestSourceCache:
+    def test_hit_dopo_save(self, tmp_path):
+        cache = SourceCache(tmp_path, salt="v1")
+        cache.put("popres1", "fp1", [{"a": 1}])
+        cache.save()
+
+        reloaded = SourceCache(tmp_path, salt="v1")
+        assert reloaded.get("popres1", "fp1") == (True, [{"a": 1}])
+        assert reloaded.hits == 1
+
+    def test_fingerprint_cambiato(self, tmp_path):
+        cache = SourceCache(tmp_path, salt="v1")
+        cache.put("popres1", "fp1", 1)
+        cache.save()
+        assert SourceCache(tmp_path, salt="v1").get("popres1", "fp2") == (False, None)
+
+    def test_salt_cambiato_invalida(self, tmp_path):
+        cache = SourceCache(tmp_path, salt="v1")
+        cache.put("popres1", "fp1", 1)
+        cache.save()
+        assert SourceCache(tmp_path, salt="v2").get("popres1", "fp1") == (False, None)
+
+
+class TestCached:
+    def test_ricalcola_solo_se_cambiato(self, tmp_path):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        cache = SourceCache(tmp_path)
+        assert cached(cache, "k", "fp1", compute) == 1
+        assert cached(cache, "k", "fp1", compute) == 1
+        assert cached(cache, "k", "fp2", compute) == 2
+        assert len(calls) == 2
+
+    def test_senza_cache(self):
+        assert cached(None, "k", "fp", lambda: 42) == 42
+
+
+class TestCachedFrame:
+    def test_rilettura_e_invalidazione(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        path = tmp_path / "frame.arrow"
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return pd.DataFrame({"REF_AREA": ["IT", "ITC1"], "Anno": [2023, 2024], "Delitti": [10, 20]})
+
+        first = cached_frame(path, "fp1", compute)
+        second = cached_frame(path, "fp1", compute)
+        pd.testing.assert_frame_equal(first, second)
+        assert len(calls) == 1
+
+        cached_frame(path, "fp2", compute)
+        assert len(calls) == 2
+
+
+def test_sha256_file(tmp_path):
+    path = tmp_path / "x.csv"
+    path.write_bytes(b"abc")
+    assert sha256_file(path) == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
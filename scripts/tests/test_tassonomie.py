@@ -0,0 +1,130 @@
+"""
+Test per il motore delle tassonomie dei reati (tassonomie.py).
+
+Esecuzione: python -m pytest scripts/tests/test_tassonomie.py -v
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_delittips import ALLARME_CODES
+from generate_insights import REATI_GERARCHIA_STRETTA
+from tassonomie import aggrega_tassonomie, build_matrice, carica_tassonomie, codici_non_mappati
+
+TASSONOMIE_DIR = Path(__file__).resolve().parents[2] / "data" / "tassonomie"
+
+TASSONOMIE = {
+    "macro": {"THEFT": "Furti", "ROBBER": "Rapine", "RAPE": "Violenze", "BLOWS": "Violenze"},
+    "allarme": {"RAPE": "Violenze sessuali", "HOUSEROB": "Rapine in abitazione"},
+}
+
+
+def _df() -> pd.DataFrame:
+    rows = [
+        ("IT", 2023, "THEFT", 100), ("IT", 2023, "BURGTHEF", 40), ("IT", 2023, "RAPE", 5),
+        ("IT", 2023, "BLOWS", 7), ("IT", 2024, "THEFT", 90), ("IT", 2024, "HOUSEROB", 3),
+        ("ITC1", 2023, "BLOWS", 0),
+    ]
+    df = pd.DataFrame(rows, columns=["REF_AREA", "Anno", "TYPE_CRIME", "Delitti"])
+    df["Popolazione"] = df["REF_AREA"].map({"IT": 59_000, "ITC1": 4_000})
+    return df
+
+
+def _atteso(df: pd.DataFrame, nome: str) -> pd.DataFrame:
+    """Riferimento: .map + groupby sulle righe mappate, come i generatori storici."""
+    out = df.assign(Categoria=df["TYPE_CRIME"].map(TASSONOMIE[nome])).dropna(subset=["Categoria"])
+    return out.groupby(["REF_AREA", "Anno", "Categoria"], as_index=False)["Delitti"].sum()
+
+
+# ============================================================
+# build_matrice
+# ============================================================
+
+class TestBuildMatrice:
+    def test_colonne_e_codici_assenti(self):
+        tax = build_matrice(TASSONOMIE, ["THEFT", "RAPE", "OTHCRIM"])
+        assert list(tax.colonne) == [
+            ("macro", "Furti"), ("macro", "Rapine"), ("macro", "Violenze"),
+            ("allarme", "Violenze sessuali"), ("allarme", "Rapine in abitazione"),
+        ]
+        assert tax.matrice.toarray().tolist() == [
+            [1, 0, 0, 0, 0],
+            [0, 0, 1, 1, 0],
+            [0, 0, 0, 0, 0],
+        ]
+
+
+# ============================================================
+# aggrega_tassonomie
+# ============================================================
+
+class TestAggregaTassonomie:
+    @pytest.mark.parametrize("nome", ["macro", "allarme"])
+    def test_uguale_a_map_groupby(self, nome):
+        df = _df()
+        result = aggrega_tassonomie(df, TASSONOMIE, keys=["REF_AREA", "Anno"], value_col="Delitti")
+        got = result[result["Tassonomia"] == nome][["REF_AREA", "Anno", "Categoria", "Delitti"]]
+        got = got.sort_values(["REF_AREA", "Anno", "Categoria"]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(got, _atteso(df, nome), check_dtype=False)
+
+    def test_attributi_e_categorie_a_zero(self):
+        result = aggrega_tassonomie(
+            _df(), TASSONOMIE, keys=["REF_AREA", "Anno"], value_col="Delitti", attrs=["Popolazione"],
+        )
+        itc1 = result[result["REF_AREA"] == "ITC1"]
+        # BLOWS presente con 0 delitti: la categoria c'e', con valore 0
+        assert itc1[["Categoria", "Delitti", "Popolazione"]].values.tolist() == [["Violenze", 0, 4_000]]
+        assert str(result["Delitti"].dtype) == "int64"
+
+
+def test_codici_non_mappati():
+    assert codici_non_mappati(TASSONOMIE["macro"], ["THEFT", "BURGTHEF", "TOT"]) == ["BURGTHEF", "TOT"]
+
+
+def test_carica_tassonomie(tmp_path):
+    a = tmp_path / "a.json"
+    a.write_text(json.dumps({"iccs": {"THEFT": "05"}}), encoding="utf-8")
+    b = tmp_path / "b.json"
+    b.write_text(json.dumps({"iccs": {"RAPE": "03"}}), encoding="utf-8")
+    assert carica_tassonomie([a]) == {"iccs": {"THEFT": "05"}}
+    with pytest.raises(ValueError):
+        carica_tassonomie([a, b])
+
+
+def test_iccs_di_esempio():
+    path = TASSONOMIE_DIR / "iccs_sezioni.json"
+    iccs = carica_tassonomie([path])["iccs_sezioni"]
+    # Solo codici padre, come CATEGORY_MAP: i figli di Furti/Rapine non sono mappati
+    assert "THEFT" in iccs and "BURGTHEF" not in iccs
+    assert "ROBBER" in iccs and "HOUSEROB" not in iccs
+    assert "ARSON" in iccs and "DAMARS" not in iccs
+    assert "RAPE" in iccs and "RAPEUN18" not in iccs
+
+
+# Tassonomie da controllare: quelle distribuite in data/tassonomie/ e allarme.
+# CATEGORY_MAP resta fuori: la serie storica delitti_categorie somma ARSON+DAMARS
+# e RAPE+RAPEUN18 nella stessa categoria fin dalla prima versione.
+_TASSONOMIE_GERARCHIA = {
+    "allarme": ALLARME_CODES,
+    **carica_tassonomie(sorted(TASSONOMIE_DIR.glob("*.json"))),
+}
+
+
+@pytest.mark.parametrize("nome", sorted(_TASSONOMIE_GERARCHIA))
+def test_padre_e_figlio_mai_nella_stessa_categoria(nome):
+    """Un figlio di REATI_GERARCHIA_STRETTA e' gia' contato nel padre: mapparli insieme lo conta due volte."""
+    mapping = _TASSONOMIE_GERARCHIA[nome]
+    doppi = [
+        (parent, child)
+        for parent, children in REATI_GERARCHIA_STRETTA.items()
+        for child in sorted(children)
+        if parent in mapping and mapping.get(child) == mapping[parent]
+    ]
+    assert doppi == []
+
@@ -0,0 +1,189 @@
+"""
+Test per l'indice dei territori NUTS (territori.py).
+
+Esecuzione: python -m pytest scripts/tests/test_territori.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from territori import (
+    NUTS1_NAMES,
+    NUTS2_NAMES,
+    NUTS2_SHORT_NAMES,
+    NUTS3_DISPLAY_NAMES,
+    PROVINCE_SPECIALI,
+    REGIONI_VIRTUALI,
+    REGIONI_VIRTUALI_NOMI,
+    TERRITORI,
+    aggrega_virtuali,
+)
+
+
+# ============================================================
+# Tabelle
+# ============================================================
+
+class TestTabelle:
+    def test_province_speciali_in_tabella(self):
+        for code, regione in PROVINCE_SPECIALI.items():
+            assert code in NUTS3_DISPLAY_NAMES
+            assert regione in NUTS2_NAMES
+
+    def test_province_agganciate_a_regioni_note(self):
+        regioni = TERRITORI.regione(list(NUTS3_DISPLAY_NAMES))
+        assert set(regioni) <= set(NUTS2_NAMES)
+
+    def test_nomi_brevi_stesse_chiavi(self):
+        assert NUTS2_SHORT_NAMES.keys() == NUTS2_NAMES.keys()
+
+
+# ============================================================
+# Lookup vettoriali
+# ============================================================
+
+class TestLookup:
+    CODES = pd.Series(["IT", "ITC", "ITC1", "ITC11", "ITC4B", "IT108", "IT111", "ITG29", None])
+
+    def test_livello(self):
+        assert TERRITORI.livello(self.CODES).tolist() == [
+            "italia", "ripartizione", "regione", "provincia", "provincia",
+            "provincia", "provincia", "provincia", None,
+        ]
+
+    def test_regione(self):
+        assert TERRITORI.regione(self.CODES).tolist() == [
+            None, None, "ITC1", "ITC1", "ITC4", "ITC4", "ITG2", "ITG2", None,
+        ]
+
+    def test_nome(self):
+        nomi = TERRITORI.nome(self.CODES).tolist()
+        assert nomi[:4] == ["Italia", "Nord-ovest", "Piemonte", "Torino"]
+        assert nomi[7] is None  # codice non in tabella
+
+    def test_nome_regione_default(self):
+        nomi = TERRITORI.nome_regione(["ITD10", "ITZZZ", "IT"], default="Sconosciuta")
+        assert nomi.tolist() == ["Provincia Autonoma Bolzano / Bozen", "Sconosciuta", "Sconosciuta"]
+
+    def test_nome_regione_senza_default_ritorna_codice(self):
+        nomi = TERRITORI.nome_regione(["ITD10", "ITZZZ"], names=NUTS2_SHORT_NAMES)
+        assert nomi.tolist() == ["Provincia Autonoma Bolzano", "ITZZ"]
+
+    def test_is_nuts2_is_nuts3(self):
+        codes = ["ITC1", "ITC11", "ITD1", "ITD10", "IT109", "ITC"]
+        assert TERRITORI.is_nuts2(codes).tolist() == [True, False, True, False, False, False]
+        assert TERRITORI.is_nuts3(codes).tolist() == [False, True, False, True, True, False]
+
+    def test_colonna_categorica(self):
+        codes = pd.Series(["ITC11", "ITC1", "ITC11"], dtype="category")
+        assert TERRITORI.regione(codes).tolist() == ["ITC1", "ITC1", "ITC1"]
+
+
+# ============================================================
+# Equivalenza con le funzioni scalari storiche
+# ============================================================
+
+# Logica delle funzioni per codice che generate_delittips e
+# generate_autori_vittime usavano prima di territori.py, come riferimento.
+_LEGACY_PROVINCE_TO_REGIONE = {"IT108": "Lombardia", "IT109": "Marche", "IT110": "Puglia"}
+
+
+def _legacy_nuts3_to_regione(code: str) -> str:
+    if code in _LEGACY_PROVINCE_TO_REGIONE:
+        return _LEGACY_PROVINCE_TO_REGIONE[code]
+    prefix = code[:4]
+    if prefix in NUTS2_NAMES:
+        return NUTS2_NAMES[prefix]
+    return "Sconosciuta"
+
+
+def _legacy_get_region_name(code: str) -> str:
+    if code in _LEGACY_PROVINCE_TO_REGIONE:
+        return _LEGACY_PROVINCE_TO_REGIONE[code]
+    region_code = code[:4] if len(code) >= 5 else code
+    return NUTS2_SHORT_NAMES.get(region_code, region_code)
+
+
+def _legacy_is_nuts2(code: str) -> bool:
+    return code in NUTS2_NAMES
+
+
+def _legacy_is_nuts3(code: str) -> bool:
+    if code in _LEGACY_PROVINCE_TO_REGIONE:
+        return True
+    return len(code) >= 5 and code[:2] == "IT"
+
+
+# Tutti i codici in tabella piu' codici ISTAT fuori tabella (vecchie province sarde)
+_CODES = ["IT", *NUTS1_NAMES, *NUTS2_NAMES, *NUTS3_DISPLAY_NAMES, "ITG29", "ITG2A", "ITZZZ"]
+# IT111 (Sud Sardegna, 2016) non era tra le province speciali storiche: "Sconosciuta"
+_CODES_REGIONE = [c for c in _CODES if c != "IT111"]
+
+
+class TestEquivalenzaStorica:
+    @pytest.mark.parametrize("dtype", [object, "category"])
+    def test_nome_regione(self, dtype):
+        col = pd.Series(_CODES_REGIONE * 3, dtype=dtype)
+        province = col[[_legacy_is_nuts3(c) for c in col]]
+        got = TERRITORI.nome_regione(province, default="Sconosciuta")
+        assert got.tolist() == [_legacy_nuts3_to_regione(c) for c in province]
+
+        got = TERRITORI.nome_regione(province, names=NUTS2_SHORT_NAMES)
+        assert got.tolist() == [_legacy_get_region_name(c) for c in province]
+
+    @pytest.mark.parametrize("dtype", [object, "category"])
+    def test_is_nuts2_is_nuts3(self, dtype):
+        col = pd.Series(_CODES * 3, dtype=dtype)
+        assert TERRITORI.is_nuts2(col).tolist() == [_legacy_is_nuts2(c) for c in col]
+        assert TERRITORI.is_nuts3(col).tolist() == [_legacy_is_nuts3(c) for c in col]
+
+    def test_sud_sardegna(self):
+        assert TERRITORI.nome_regione(["IT111"]).tolist() == ["Sardegna"]
+
+    def test_categorica_uguale_a_object(self):
+        col = pd.Series(["ITC11", None, "ITG29", "ITC1", "ITC11"])
+        cat = col.astype(pd.CategoricalDtype(["ITC11", "ITC1", "ITG29", "ITF11"]))  # categoria inutilizzata
+        for lookup in (TERRITORI.livello, TERRITORI.regione, TERRITORI.nome, TERRITORI.nome_regione):
+            assert lookup(cat).tolist() == lookup(col).tolist()
+
+
+# ============================================================
+# Regioni virtuali
+# ============================================================
+
+class TestAggregaVirtuali:
+    def _df(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "REF_AREA": ["ITC1", "ITD1", "ITD2", "ITD1", "ITD2", "ITD1"],
+            "Anno": [2023, 2023, 2023, 2024, 2024, 2023],
+            "Reato": ["TOT", "TOT", "TOT", "TOT", "TOT", "RAPE"],
+            "Delitti": [100, 10, 20, 11, None, 1],
+            "Popolazione": [4_000, 500, 600, 510, 610, 500],
+        })
+
+    def test_somma_tutte_le_misure(self):
+        out = aggrega_virtuali(
+            self._df(), REGIONI_VIRTUALI, by=["Anno", "Reato"],
+            agg={"Delitti": "sum", "Popolazione": "sum"}, nomi=REGIONI_VIRTUALI_NOMI,
+        )
+        assert not out["REF_AREA"].isin(["ITD1", "ITD2"]).any()
+        got = out.set_index(["REF_AREA", "Anno", "Reato"])
+        assert got.loc[("ITD12", 2023, "TOT"), "Delitti"] == 30
+        assert got.loc[("ITD12", 2023, "TOT"), "Popolazione"] == 1_100
+        assert got.loc[("ITD12", 2024, "TOT"), "Delitti"] == 11   # componente mancante ignorato
+        assert got.loc[("ITD12", 2023, "RAPE"), "Delitti"] == 1
+        assert got.loc[("ITC1", 2023, "TOT"), "Delitti"] == 100
+        assert set(got.loc["ITD12", "Territorio"]) == {"Trentino-Alto Adige"}
+
+    def test_codice_virtuale_personalizzato(self):
+        out = aggrega_virtuali(
+            self._df(), {"ITD1+ITD2": ("ITD1", "ITD2")}, by=["Anno"], agg={"Popolazione": "max"},
+        )
+        got = out.set_index(["REF_AREA", "Anno"])["Popolazione"]
+        assert got[("ITD1+ITD2", 2023)] == 600
+        assert got[("ITD1+ITD2", 2024)] == 610
@@ -126,6 +126,8 @@ export default function DatiECodice() {
                   6 CSV in data/processed/,
                   reati_allarme_sociale_regioni.json,
                   reati_allarme_sociale_province.json
+                  (+ shard per regione),
+                  delitti_province_reati/ (shard per provincia)
                 </td>
               </tr>
               <tr className="border-b">
@@ -155,7 +157,7 @@ export default function DatiECodice() {
                 </td>
                 <td className="py-2 text-xs">
                   autori_vittime_trend.json,
-                  autori_vittime_regioni.json,
+                  autori_vittime_regioni.json (+ _colonne, compatto per i grafici),
                   autori_vittime_reati.json,
                   autori_vittime_province.json
                 </td>
@@ -35,6 +35,14 @@ interface AllarmeProvincia {
   Tasso_per_100k: number;
 }
 
+// Shard per regione di reati_allarme_sociale_province.json (generate_delittips.py)
+const SHARD_DIR = "/data/reati_allarme_sociale_province";
+
+interface ShardRegione {
+  REF_AREA: string;
+  Regione: string;
+  file: string;
+}
 
 interface Props {
   reato: string;
@@ -44,8 +52,8 @@ type Metrica = "tasso" | "assoluto";
 
 export function ChartAllarmeTrendProvincia({ reato }: Props) {
   const isMobile = useIsMobile();
-  const { data, loading } = useFetchData<AllarmeProvincia[]>(
-    "/data/reati_allarme_sociale_province.json"
+  const { data: index, loading: indexLoading, error: indexError } = useFetchData<ShardRegione[]>(
+    `${SHARD_DIR}/index.json`
   );
   const [regione, setRegione] = useState<string>("");
   const [provincia, setProvincia] = useState<string>("");
@@ -53,13 +61,20 @@ export function ChartAllarmeTrendProvincia({ reato }: Props) {
   const setRegioneStable = useCallback((v: string) => { setRegione(v); setProvincia(""); }, []);
 
   const regioni = useMemo(() => {
-    if (!data) return [];
-    return [...new Set(data.map((d) => d.Regione))].sort((a, b) => a.localeCompare(b, "it"));
-  }, [data]);
+    if (!index) return [];
+    return index.map((r) => r.Regione).sort((a, b) => a.localeCompare(b, "it"));
+  }, [index]);
 
-  const selectedRegione = regione || regioni[0] || "";
+  // Una regione senza shard (es. sincronizzata da un altro grafico) ripiega sulla prima
+  const selectedRegione = regioni.includes(regione) ? regione : regioni[0] || "";
   const { handleSync } = useFilterSync("regione", selectedRegione, setRegioneStable);
 
+  // Scarica solo lo shard della regione selezionata
+  const shardFile = index?.find((r) => r.Regione === selectedRegione)?.file;
+  const { data, loading: shardLoading, error: shardError } = useFetchData<AllarmeProvincia[]>(
+    shardFile ? `${SHARD_DIR}/${shardFile}` : null
+  );
+
   const province = useMemo(() => {
     if (!data) return [];
     return [...new Set(
@@ -90,13 +105,12 @@ export function ChartAllarmeTrendProvincia({ reato }: Props) {
     return map;
   }, [data, selectedRegione, reato]);
 
-  if (loading)
-    return <div className="h-[400px] animate-pulse bg-muted rounded" />;
-  if (!data) return null;
+  if (indexLoading) return <div className="h-[400px] animate-pulse bg-muted rounded" />;
+  if (indexError) return <p className="text-destructive">Errore: {indexError}</p>;
 
   const isAssoluto = metrica === "assoluto";
 
-  const provData = data
+  const provData = (data ?? [])
     .filter(
       (d) => d.Territorio === selectedProvincia && d.Reato === reato
     )
@@ -176,54 +190,62 @@ export function ChartAllarmeTrendProvincia({ reato }: Props) {
         </div>
       </div>
 
-      <ChartFullscreenWrapper ariaDescription={`Grafico trend ${reato} per ${selectedProvincia} vs media ${selectedRegione}, 2014-2024`}>
-        <Plot
-          data={[
-            {
-              x: anni,
-              y: provData.map((d) => isAssoluto ? d.Delitti : d.Tasso_per_100k),
-              mode: "lines+markers" as const,
-              name: selectedProvincia,
-              hovertemplate: isAssoluto
-                ? "<b>%{fullData.name}</b>: %{y:,.0f}<extra></extra>"
-                : "<b>%{fullData.name}</b>: %{y:.2f} per 100k ab.<extra></extra>",
-              line: { width: 3, color: lineColor },
-              marker: { size: 6 },
-            },
-            ...(!isAssoluto ? [{
-              x: anni,
-              y: mediaRegArr,
-              mode: "lines" as const,
-              name: `Media ${selectedRegione}`,
-              hovertemplate: "<b>%{fullData.name}</b>: %{y:.2f} per 100k ab.<extra></extra>",
-              line: { width: 2, color: COLORS.grigioMedia, dash: "dash" as const },
-            }] : []),
-          ]}
-          key={metrica}
-          layout={{
-            separators: PLOTLY_IT_SEPARATORS,
-            dragmode: false as const,
-            hovermode: "x unified" as const,
-            plot_bgcolor: "white",
-            paper_bgcolor: "white",
-            height: CHART_HEIGHT_SMALL,
-            xaxis: getAxisYear(isMobile),
-            yaxis: { ...AXIS_FIXED,
-              title: { text: isAssoluto ? "Delitti denunciati" : "Tasso per 100k ab.", font: { size: PLOTLY_FONT.axisTitle } },
-              ...(isAssoluto && { tickformat: "~s", hoverformat: ",.0f" }),
-            },
-            legend: LEGEND_BOTTOM_LEFT,
-            margin: { l: 50, r: 20, t: 20, b: 55 },
-            shapes: COVID_SHAPES,
-            annotations: COVID_ANNOTATIONS,
-          }}
-          config={PLOTLY_CONFIG}
-          useResizeHandler
-          className="w-full"
-        />
-      </ChartFullscreenWrapper>
-
-      {varProvincia !== null && (
+      {!shardFile ? (
+        <p className="text-sm text-muted-foreground">Dati non disponibili per {selectedRegione || "questa regione"}.</p>
+      ) : shardError ? (
+        <p className="text-destructive">Errore: {shardError}</p>
+      ) : shardLoading || !data ? (
+        <div className="h-[400px] animate-pulse bg-muted rounded" />
+      ) : (
+        <ChartFullscreenWrapper ariaDescription={`Grafico trend ${reato} per ${selectedProvincia} vs media ${selectedRegione}, 2014-2024`}>
+          <Plot
+            data={[
+              {
+                x: anni,
+                y: provData.map((d) => isAssoluto ? d.Delitti : d.Tasso_per_100k),
+                mode: "lines+markers" as const,
+                name: selectedProvincia,
+                hovertemplate: isAssoluto
+                  ? "<b>%{fullData.name}</b>: %{y:,.0f}<extra></extra>"
+                  : "<b>%{fullData.name}</b>: %{y:.2f} per 100k ab.<extra></extra>",
+                line: { width: 3, color: lineColor },
+                marker: { size: 6 },
+              },
+              ...(!isAssoluto ? [{
+                x: anni,
+                y: mediaRegArr,
+                mode: "lines" as const,
+                name: `Media ${selectedRegione}`,
+                hovertemplate: "<b>%{fullData.name}</b>: %{y:.2f} per 100k ab.<extra></extra>",
+                line: { width: 2, color: COLORS.grigioMedia, dash: "dash" as const },
+              }] : []),
+            ]}
+            key={metrica}
+            layout={{
+              separators: PLOTLY_IT_SEPARATORS,
+              dragmode: false as const,
+              hovermode: "x unified" as const,
+              plot_bgcolor: "white",
+              paper_bgcolor: "white",
+              height: CHART_HEIGHT_SMALL,
+              xaxis: getAxisYear(isMobile),
+              yaxis: { ...AXIS_FIXED,
+                title: { text: isAssoluto ? "Delitti denunciati" : "Tasso per 100k ab.", font: { size: PLOTLY_FONT.axisTitle } },
+                ...(isAssoluto && { tickformat: "~s", hoverformat: ",.0f" }),
+              },
+              legend: LEGEND_BOTTOM_LEFT,
+              margin: { l: 50, r: 20, t: 20, b: 55 },
+              shapes: COVID_SHAPES,
+              annotations: COVID_ANNOTATIONS,
+            }}
+            config={PLOTLY_CONFIG}
+            useResizeHandler
+            className="w-full"
+          />
+        </ChartFullscreenWrapper>
+      )}
+
+      {data && varProvincia !== null && (
         <p className="text-sm text-muted-foreground">
           <strong>{selectedProvincia} ({TRIENNALE_PERIODI}):</strong>{" "}
           <span
@@ -2,7 +2,7 @@
 
 import { useState, useMemo } from "react";
 import dynamic from "next/dynamic";
-import { useFetchData } from "@/lib/use-fetch-data";
+import { useFetchColonnare } from "@/lib/colonnare";
 import { PLOTLY_CONFIG, AXIS_FIXED, COLORS, VICTIM_DEFAULT, CHART_HEIGHT_RANKING, CHART_HEIGHT_RANKING_MOBILE, MEDIA_ANNOTATION_FONT } from "@/lib/config";
 import { fmtNum, fmtPct, PLOTLY_IT_SEPARATORS } from "@/lib/format";
 import { useIsMobile } from "@/lib/use-is-mobile";
@@ -37,8 +37,8 @@ interface Props {
 
 export function ChartAutoriRankingRegioni({ dataType }: Props) {
   const isMobile = useIsMobile();
-  const { data, loading, error } = useFetchData<RegioneRecord[]>(
-    "/data/autori_vittime_regioni.json"
+  const { data, loading, error } = useFetchColonnare<RegioneRecord>(
+    "/data/autori_vittime_regioni_colonne.json"
   );
   const [codiceReato, setCodiceReato] = useState("TOT");
   const [anno, setAnno] = useState(2022);
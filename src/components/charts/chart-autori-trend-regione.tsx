@@ -2,7 +2,7 @@
 
 import { useState, useMemo, useCallback } from "react";
 import dynamic from "next/dynamic";
-import { useFetchData } from "@/lib/use-fetch-data";
+import { useFetchColonnare } from "@/lib/colonnare";
 import {
   COLORS,
   CHART_HEIGHT_SMALL,
@@ -50,8 +50,8 @@ type Metrica = "tasso" | "assoluto";
 
 export function ChartAutoriTrendRegione({ dataType }: Props) {
   const isMobile = useIsMobile();
-  const { data, loading, error } = useFetchData<RegioneRecord[]>(
-    "/data/autori_vittime_regioni.json"
+  const { data, loading, error } = useFetchColonnare<RegioneRecord>(
+    "/data/autori_vittime_regioni_colonne.json"
   );
   const [regione, setRegione] = useState("");
   const setRegioneStable = useCallback((v: string) => setRegione(v), []);
@@ -2,7 +2,7 @@
 
 import { useState, useMemo, useCallback } from "react";
 import dynamic from "next/dynamic";
-import { useFetchData } from "@/lib/use-fetch-data";
+import { useFetchColonnare } from "@/lib/colonnare";
 import { PLOTLY_CONFIG, AXIS_FIXED, MetricaProfilo, METRICHE_PROFILO, COLORS, MIN_CASI, TOP_N, CHART_HEIGHT_RANKING, CHART_HEIGHT_RANKING_MOBILE } from "@/lib/config";
 import { fmtNum, fmtPct, fmtPctSigned, PLOTLY_IT_SEPARATORS } from "@/lib/format";
 import { useIsMobile } from "@/lib/use-is-mobile";
@@ -50,8 +50,8 @@ interface ChartItem {
 
 export function ChartProfiloTerritorio({ dataType }: Props) {
   const isMobile = useIsMobile();
-  const { data, loading, error } = useFetchData<RegioneRecord[]>(
-    "/data/autori_vittime_regioni.json"
+  const { data, loading, error } = useFetchColonnare<RegioneRecord>(
+    "/data/autori_vittime_regioni_colonne.json"
   );
   const [selectedRegione, setSelectedRegione] = useState<string | null>(null);
   const setRegioneStable = useCallback((v: string) => setSelectedRegione(v), []);
@@ -0,0 +1,39 @@
+"use client";
+
+import { useMemo } from "react";
+import { useFetchData } from "@/lib/use-fetch-data";
+
+/** Colonna stringa codificata a dizionario: valore i-esimo = valori[codici[i]]. */
+interface ColonnaDizionario {
+  valori: string[];
+  codici: number[];
+}
+
+/** JSON colonnare scritto da colonnare() in scripts/generate_autori_vittime.py. */
+export interface JsonColonnare {
+  n: number;
+  colonne: Record<string, (number | null)[] | ColonnaDizionario>;
+}
+
+/** Ricostruisce la lista di record ({campo: valore}) da un JSON colonnare. */
+export function decodeColonnare<T>(json: JsonColonnare): T[] {
+  const nomi = Object.keys(json.colonne);
+  const colonne = nomi.map((nome) => {
+    const col = json.colonne[nome];
+    return Array.isArray(col) ? col : col.codici.map((c) => col.valori[c]);
+  });
+  const records = new Array<T>(json.n);
+  for (let i = 0; i < json.n; i++) {
+    const record: Record<string, unknown> = {};
+    for (let j = 0; j < nomi.length; j++) record[nomi[j]] = colonne[j][i];
+    records[i] = record as T;
+  }
+  return records;
+}
+
+/** Come useFetchData, per un JSON colonnare: restituisce i record decodificati. */
+export function useFetchColonnare<T>(url: string | null) {
+  const { data: json, loading, error } = useFetchData<JsonColonnare>(url);
+  const data = useMemo(() => (json ? decodeColonnare<T>(json) : null), [json]);
+  return { data, loading, error };
+}
@@ -2,12 +2,22 @@
 
 import { useState, useEffect } from "react";
 
-export function useFetchData<T>(url: string) {
-  const [data, setData] = useState<T | null>(null);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState<string | null>(null);
+interface FetchState<T> {
+  url: string | null;
+  data: T | null;
+  error: string | null;
+}
+
+/**
+ * Scarica un JSON da public/. Con url null non scarica nulla (fetch dipendente da altri dati).
+ * Lo stato e' legato all'url: quando cambia, data ed error tornano null e loading true
+ * finche' non arriva la nuova risposta.
+ */
+export function useFetchData<T>(url: string | null) {
+  const [state, setState] = useState<FetchState<T>>({ url: null, data: null, error: null });
 
   useEffect(() => {
+    if (url === null) return;
     let cancelled = false;
 
     const base = process.env.NEXT_PUBLIC_BASE_PATH ?? "";
@@ -17,16 +27,10 @@ export function useFetchData<T>(url: string) {
         return res.json();
       })
       .then((json: T) => {
-        if (!cancelled) {
-          setData(json);
-          setLoading(false);
-        }
+        if (!cancelled) setState({ url, data: json, error: null });
       })
       .catch((err: Error) => {
-        if (!cancelled) {
-          setError(err.message);
-          setLoading(false);
-        }
+        if (!cancelled) setState({ url, data: null, error: err.message });
       });
 
     return () => {
@@ -34,5 +38,11 @@ export function useFetchData<T>(url: string) {
     };
   }, [url]);
 
-  return { data, loading, error };
+  // Risposta di un url precedente: non ancora valida per quello corrente
+  const current = url !== null && state.url === url;
+  return {
+    data: current ? state.data : null,
+    loading: url !== null && !current,
+    error: current ? state.error : null,
+  };
 }